@@ -0,0 +1,239 @@
+"""
+Bias distribution analytics over precomputed rollups.
+
+The biasrollup table holds, per publication day, source, category and bias
+label, the number of articles and the sum of their bias scores. Ingestion
+adds each batch to it in the same transaction as the insert, and rescoring
+moves articles between labels as their scores change, so answering "how is
+X covered" reads a few hundred rollup rows instead of scanning articles.
+
+rebuild_bias_rollups() recomputes the table from the articles, e.g. after
+the label thresholds change (scripts/rebuild_bias_rollups.py). It holds
+bias_score_lock() like rescoring does, so a rebuild never writes back scores
+that a concurrent rescore has since moved.
+"""
+from collections import defaultdict
+from contextlib import asynccontextmanager
+from datetime import date, datetime
+from typing import AsyncIterator, Dict, Iterable, List, Mapping, Optional, Tuple
+
+from sqlalchemy import delete, func, text
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.future import select
+
+from app.bias_analyzer import get_bias_label
+from app.core.config import settings
+from app.db.session import async_session
+from app.models import Article, BiasRollup, Source
+
+BIAS_LABELS = ["Left", "Center-Left", "Center", "Center-Right", "Right"]
+
+# (day, source_id, category, label)
+RollupKey = Tuple[date, int, str, str]
+# {key: [article count, bias score sum]}
+RollupDeltas = Dict[RollupKey, List[float]]
+
+# 6 columns per row; stays well under asyncpg's bind-parameter limit
+ROLLUP_UPSERT_CHUNK_SIZE = 2000
+
+# PostgreSQL advisory lock key shared by rescoring and rollup rebuilds
+BIAS_SCORE_LOCK_KEY = 0x62696173
+
+
+def rollup_key(published_at: datetime, source_id: Optional[int], category: Optional[str], bias_score: Optional[float]) -> RollupKey:
+    return published_at.date(), source_id or 0, category or "General", get_bias_label(bias_score or 0.0)
+
+
+def rollup_deltas(articles: Iterable, sign: int = 1) -> RollupDeltas:
+    """Count and score-sum deltas for adding (sign=1) or removing (sign=-1) articles."""
+    deltas: RollupDeltas = defaultdict(lambda: [0, 0.0])
+    for article in articles:
+        delta = deltas[rollup_key(article.published_at, article.source_id, article.category, article.bias_score)]
+        delta[0] += sign
+        delta[1] += sign * (article.bias_score or 0.0)
+    return deltas
+
+
+def rescore_deltas(changes: Iterable[Tuple[object, float]]) -> RollupDeltas:
+    """Deltas moving each (article, new bias score) from its stored score to the new one."""
+    deltas: RollupDeltas = defaultdict(lambda: [0, 0.0])
+    for article, bias_score in changes:
+        old = deltas[rollup_key(article.published_at, article.source_id, article.category, article.bias_score)]
+        old[0] -= 1
+        old[1] -= article.bias_score or 0.0
+        new = deltas[rollup_key(article.published_at, article.source_id, article.category, bias_score)]
+        new[0] += 1
+        new[1] += bias_score
+    return deltas
+
+
+def _upsert(dialect_name: str, rows: List[dict]):
+    if dialect_name == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert as dialect_insert
+    else:
+        from sqlalchemy.dialects.sqlite import insert as dialect_insert
+    statement = dialect_insert(BiasRollup).values(rows)
+    return statement.on_conflict_do_update(
+        index_elements=[BiasRollup.day, BiasRollup.source_id, BiasRollup.category, BiasRollup.label],
+        set_={
+            "article_count": BiasRollup.article_count + statement.excluded.article_count,
+            "bias_score_sum": BiasRollup.bias_score_sum + statement.excluded.bias_score_sum,
+        },
+    )
+
+
+async def apply_rollup_deltas(session: AsyncSession, deltas: Mapping[RollupKey, List[float]]) -> None:
+    """Add deltas to the rollup rows, creating missing ones, without committing."""
+    rows = [
+        {"day": day, "source_id": source_id, "category": category, "label": label,
+         "article_count": count, "bias_score_sum": score_sum}
+        for (day, source_id, category, label), (count, score_sum) in deltas.items()
+        if count or score_sum
+    ]
+    if not rows:
+        return
+    dialect_name = session.get_bind().dialect.name
+    if dialect_name in ("postgresql", "sqlite"):
+        for start in range(0, len(rows), ROLLUP_UPSERT_CHUNK_SIZE):
+            await session.execute(_upsert(dialect_name, rows[start:start + ROLLUP_UPSERT_CHUNK_SIZE]))
+        return
+    for row in rows:
+        rollup = await session.get(BiasRollup, (row["day"], row["source_id"], row["category"], row["label"]))
+        if rollup is None:
+            session.add(BiasRollup(**row))
+        else:
+            rollup.article_count += row["article_count"]
+            rollup.bias_score_sum += row["bias_score_sum"]
+    await session.flush()
+
+
+async def add_to_bias_rollups(session: AsyncSession, articles: Iterable) -> None:
+    """Count newly inserted articles (anything with published_at, source_id, category, bias_score)."""
+    await apply_rollup_deltas(session, rollup_deltas(articles))
+
+
+async def get_bias_distribution(
+    session: AsyncSession,
+    date_from: date,
+    date_to: date,
+    group_by: str = "all",
+    source_id: Optional[int] = None,
+    category: Optional[str] = None,
+) -> List[dict]:
+    """
+    Bias label distribution of articles published from date_from to date_to
+    (inclusive), overall or per source, category or day.
+    """
+    group_column = {
+        "all": None,
+        "source": BiasRollup.source_id,
+        "category": BiasRollup.category,
+        "day": BiasRollup.day,
+    }[group_by]
+    group_columns = [group_column] if group_column is not None else []
+    query = (
+        select(*group_columns, BiasRollup.label, func.sum(BiasRollup.article_count), func.sum(BiasRollup.bias_score_sum))
+        .where(BiasRollup.day >= date_from, BiasRollup.day <= date_to)
+        .group_by(*group_columns, BiasRollup.label)
+    )
+    if source_id is not None:
+        query = query.where(BiasRollup.source_id == source_id)
+    if category is not None:
+        query = query.where(BiasRollup.category == category)
+    result = await session.execute(query)
+
+    groups: Dict[object, Dict[str, Tuple[int, float]]] = defaultdict(dict)
+    for row in result.all():
+        key = row[0] if group_columns else None
+        label, count, score_sum = row[-3:]
+        if count:
+            groups[key][label] = (int(count), float(score_sum))
+
+    names: Dict[int, str] = {}
+    if group_by == "source" and groups:
+        sources = await session.execute(select(Source.id, Source.name).where(Source.id.in_(list(groups))))
+        names = dict(sources.all())
+
+    distribution = []
+    for key in sorted(groups, key=lambda key: (key is None, key)):
+        labels = groups[key]
+        total = sum(count for count, _ in labels.values())
+        total_score = sum(score_sum for _, score_sum in labels.values())
+        distribution.append({
+            "key": key,
+            "name": names.get(key) if group_by == "source" else None,
+            "article_count": total,
+            "avg_bias_score": total_score / total,
+            "labels": {
+                label: {
+                    "count": labels[label][0] if label in labels else 0,
+                    "share": labels[label][0] / total if label in labels else 0.0,
+                    "avg_bias_score": labels[label][1] / labels[label][0] if label in labels else None,
+                }
+                for label in BIAS_LABELS
+            },
+        })
+    return distribution
+
+
+@asynccontextmanager
+async def bias_score_lock(session: AsyncSession) -> AsyncIterator[None]:
+    """
+    Serialise jobs that rewrite stored bias scores or rebuild the rollups from
+    them, across processes. Waits for a PostgreSQL advisory lock held on the
+    connection of `session`, which should be used for nothing else; a no-op on
+    other databases.
+    """
+    if session.get_bind().dialect.name != "postgresql":
+        yield
+        return
+    await session.execute(text("SELECT pg_advisory_lock(:key)"), {"key": BIAS_SCORE_LOCK_KEY})
+    try:
+        yield
+    finally:
+        # Session-level lock: release it before the connection goes back to the pool
+        await session.execute(text("SELECT pg_advisory_unlock(:key)"), {"key": BIAS_SCORE_LOCK_KEY})
+        await session.commit()
+
+
+async def _scan_articles(session: AsyncSession, after_id: int, chunk_size: int, deltas: RollupDeltas) -> Tuple[int, int]:
+    """Add every article with id > after_id to deltas, chunk by chunk. Returns (articles seen, last id)."""
+    seen = 0
+    while True:
+        result = await session.execute(
+            select(Article.id, Article.published_at, Article.source_id, Article.category, Article.bias_score)
+            .where(Article.id > after_id)
+            .order_by(Article.id)
+            .limit(chunk_size)
+        )
+        rows = result.all()
+        if not rows:
+            return seen, after_id
+        for key, delta in rollup_deltas(rows).items():
+            deltas[key][0] += delta[0]
+            deltas[key][1] += delta[1]
+        seen += len(rows)
+        after_id = rows[-1].id
+
+
+async def rebuild_bias_rollups(chunk_size: int = settings.BIAS_ROLLUP_REBUILD_CHUNK_SIZE) -> int:
+    """
+    Recompute the rollups from every stored article. Returns the number of articles counted.
+
+    Articles are read in keyset chunks and aggregated in memory, which only
+    holds one entry per rollup row. The old rows are replaced in a single
+    transaction that first catches up with articles stored during the scan.
+    """
+    deltas: RollupDeltas = defaultdict(lambda: [0, 0.0])
+    # Scores must not change between the scan and the swap; new articles are caught up below
+    async with async_session() as lock_session, bias_score_lock(lock_session):
+        async with async_session() as session:
+            counted, last_id = await _scan_articles(session, 0, chunk_size, deltas)
+
+        async with async_session() as session:
+            await session.execute(delete(BiasRollup))
+            # Batches committed since the scan added themselves to rows that were just deleted
+            caught_up, _ = await _scan_articles(session, last_id, chunk_size, deltas)
+            await apply_rollup_deltas(session, deltas)
+            await session.commit()
+    return counted + caught_up
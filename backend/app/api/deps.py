@@ -1,31 +1,98 @@
-from typing import Generator, Optional
-from fastapi import Depends, HTTPException, status
+from typing import AsyncIterator, Generator, Optional
+from fastapi import Depends, HTTPException, Request, status
 from fastapi.security import OAuth2PasswordBearer
 from jose import jwt, JWTError
+from pydantic import ValidationError
 from sqlalchemy.ext.asyncio import AsyncSession
-from app.db.session import get_session
+from app.cache import response_cache
+from app.db.session import async_read_session, async_session
 from app.core.config import settings
+from app.core.security import user_cache
 from app.crud import get_user_by_email
 from app.models import User
+from app.schemas import Principal, TokenPayload
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl=f"{settings.API_V1_STR}/login/access-token")
 
-async def get_current_user(
-    session: AsyncSession = Depends(get_session), token: str = Depends(oauth2_scheme)
-) -> User:
-    credentials_exception = HTTPException(
-        status_code=status.HTTP_401_UNAUTHORIZED,
-        detail="Could not validate credentials",
-        headers={"WWW-Authenticate": "Bearer"},
-    )
+credentials_exception = HTTPException(
+    status_code=status.HTTP_401_UNAUTHORIZED,
+    detail="Could not validate credentials",
+    headers={"WWW-Authenticate": "Bearer"},
+)
+
+# Requests that cannot write, and so can be served from the read replica
+READ_METHODS = {"GET", "HEAD"}
+
+async def get_session(request: Request) -> AsyncIterator[AsyncSession]:
+    """
+    Session on the read replica (DATABASE_REPLICA_URL) for GET/HEAD requests
+    and on the primary for everything else. Without a replica both are the primary.
+    """
+    make_session = async_read_session if request.method in READ_METHODS else async_session
+    async with make_session() as session:
+        yield session
+
+async def get_cached_session(request: Request) -> AsyncIterator[AsyncSession]:
+    """
+    Session for endpoints served through the response cache.
+
+    A cached response outlives the read that built it: filled from a replica
+    that has not replayed the latest ingest yet, it would keep the old rows
+    under the new cache version for RESPONSE_CACHE_TTL. So while the cache is
+    on, these endpoints read from the primary; cache hits do not open a
+    connection at all. Without the cache this is get_session.
+    """
+    if not response_cache.enabled:
+        async for session in get_session(request):
+            yield session
+        return
+    async with async_session() as session:
+        yield session
+
+def decode_token(token: str) -> TokenPayload:
     try:
-        payload = jwt.decode(token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
-        email: str = payload.get("sub")
-        if email is None:
-            raise credentials_exception
-    except JWTError:
+        payload = TokenPayload.model_validate(
+            jwt.decode(token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
+        )
+    except (JWTError, ValidationError):
         raise credentials_exception
-    user = await get_user_by_email(session, email=email)
-    if user is None:
+    if payload.sub is None:
         raise credentials_exception
+    return payload
+
+async def _resolve_user(session: AsyncSession, payload: TokenPayload) -> User:
+    # Cached per subject, for at most USER_CACHE_TTL and never past the token's expiry
+    user = user_cache.get(payload.sub)
+    if user is None:
+        user = await get_user_by_email(session, email=payload.sub)
+        if user is None:
+            raise credentials_exception
+        user_cache.set(payload.sub, user, expires_at=payload.exp)
     return user
+
+async def get_current_user(
+    session: AsyncSession = Depends(get_session), token: str = Depends(oauth2_scheme)
+) -> User:
+    return await _resolve_user(session, decode_token(token))
+
+async def get_current_principal(
+    session: AsyncSession = Depends(get_session), token: str = Depends(oauth2_scheme)
+) -> Principal:
+    """
+    The authenticated user, taken straight from the token claims when present.
+
+    Tokens issued before the claims were added fall back to the (cached) user lookup.
+    """
+    payload = decode_token(token)
+    if payload.uid is not None and payload.is_active is not None and payload.is_superuser is not None:
+        principal = Principal(
+            id=payload.uid, email=payload.sub, is_active=payload.is_active, is_superuser=payload.is_superuser
+        )
+    else:
+        user = await _resolve_user(session, payload)
+        principal = Principal(
+            id=user.id, email=user.email, is_active=user.is_active, is_superuser=user.is_superuser
+        )
+    if not principal.is_active:
+        raise HTTPException(status_code=400, detail="Inactive user")
+    return principal
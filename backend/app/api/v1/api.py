@@ -1,9 +1,12 @@
 from fastapi import APIRouter
-from app.api.v1.endpoints import articles, sources, login, users, sports
+from app.api.v1.endpoints import articles, sources, login, users, sports, stories, analytics, thumbnails
 
 api_router = APIRouter()
 api_router.include_router(login.router, tags=["login"])
 api_router.include_router(users.router, prefix="/users", tags=["users"])
 api_router.include_router(articles.router, prefix="/articles", tags=["articles"])
+api_router.include_router(stories.router, prefix="/stories", tags=["stories"])
 api_router.include_router(sources.router, prefix="/sources", tags=["sources"])
+api_router.include_router(analytics.router, prefix="/analytics", tags=["analytics"])
 api_router.include_router(sports.router, prefix="/sports", tags=["sports"])
+api_router.include_router(thumbnails.router, prefix="/thumbnails", tags=["thumbnails"])
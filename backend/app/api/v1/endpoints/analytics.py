@@ -0,0 +1,43 @@
+from datetime import date, timedelta
+from typing import Literal, Optional
+from fastapi import APIRouter, Depends, HTTPException, Request
+from pydantic import TypeAdapter
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.api import deps
+from app import analytics, schemas
+from app.cache import response_cache
+from app.core.config import settings
+
+router = APIRouter()
+
+BIAS_DISTRIBUTION = TypeAdapter(schemas.BiasDistribution)
+
+@router.get("/bias", response_model=schemas.BiasDistribution)
+async def read_bias_distribution(
+    request: Request,
+    date_from: Optional[date] = None,
+    date_to: Optional[date] = None,
+    group_by: Literal["all", "source", "category", "day"] = "all",
+    source_id: Optional[int] = None,
+    category: Optional[str] = None,
+    session: AsyncSession = Depends(deps.get_cached_session)
+):
+    """
+    How coverage splits across bias labels (Left ... Right) for articles
+    published in [date_from, date_to], overall or per source, category or day.
+
+    Defaults to the last BIAS_ANALYTICS_DEFAULT_DAYS days.
+    """
+    date_to = date_to or date.today()
+    date_from = date_from or date_to - timedelta(days=settings.BIAS_ANALYTICS_DEFAULT_DAYS - 1)
+    if date_from > date_to:
+        raise HTTPException(status_code=400, detail="date_from must not be after date_to")
+
+    async def build():
+        groups = await analytics.get_bias_distribution(
+            session, date_from, date_to, group_by=group_by, source_id=source_id, category=category
+        )
+        body = {"group_by": group_by, "date_from": date_from, "date_to": date_to, "groups": groups}
+        return BIAS_DISTRIBUTION.dump_json(BIAS_DISTRIBUTION.validate_python(body)), {}
+
+    return await response_cache.respond(request, build)
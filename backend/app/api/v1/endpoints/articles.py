@@ -1,31 +1,109 @@
-from typing import List, Optional
-from fastapi import APIRouter, Depends, HTTPException
+from typing import List, Literal, Optional, Union
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
+from fastapi.responses import StreamingResponse
+from pydantic import TypeAdapter
 from sqlalchemy.ext.asyncio import AsyncSession
 from app.api import deps
-from app import crud, schemas
+from app import crud, export, schemas, search
+from app.article_json import ArticleShape, InvalidFields
+from app.cache import response_cache
+from app.pagination import InvalidCursor, decode_cursor, encode_cursor
 
 router = APIRouter()
 
-@router.get("/", response_model=List[schemas.ArticleRead])
+ARTICLE = TypeAdapter(schemas.ArticleRead)
+SEARCH_RESULTS = TypeAdapter(List[schemas.ArticleSearchResult])
+
+@router.get("/", response_model=Union[List[schemas.ArticleRead], schemas.ArticlesWithSources])
 async def read_articles(
+    request: Request,
     skip: int = 0,
-    limit: int = 100,
-    category: Optional[str] = None,
-    source_id: Optional[int] = None,
-    session: AsyncSession = Depends(deps.get_session)
+    limit: int = Query(100, ge=1, le=500),
+    cursor: Optional[str] = None,
+    fields: Optional[str] = Query(None, description="Comma-separated article fields to return; id is always included"),
+    include: Optional[Literal["sources"]] = Query(None, description="sources: list each source once instead of nesting it"),
+    filters: schemas.ArticleFilter = Depends(),
+    session: AsyncSession = Depends(deps.get_cached_session)
+):
+    """
+    List articles, newest first.
+
+    Paginate by passing the `X-Next-Cursor` response header back as `cursor`;
+    the header is absent on the last page.
+
+    `fields=title,url,source` trims each article to those fields. With
+    `include=sources` the reply is {"articles": [...], "sources": [...]}: each
+    source appears once and articles carry its source_id instead of a copy.
+    """
+    after = None
+    if cursor:
+        try:
+            after = decode_cursor(cursor)
+        except InvalidCursor as e:
+            raise HTTPException(status_code=400, detail=str(e))
+    try:
+        shape = ArticleShape(fields, include_sources=include == "sources")
+    except InvalidFields as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    async def build():
+        rows = await crud.get_article_rows(
+            session, shape.columns, filters, skip=skip, limit=limit, after=after, join_source=shape.join_source
+        )
+        headers = {}
+        if len(rows) == limit:
+            headers["X-Next-Cursor"] = encode_cursor(*shape.cursor(rows[-1]))
+        return shape.dumps(rows), headers
+
+    return await response_cache.respond(request, build)
+
+@router.get("/search", response_model=List[schemas.ArticleSearchResult])
+async def search_articles(
+    request: Request,
+    q: str = Query(..., min_length=1, max_length=200),
+    skip: int = Query(0, ge=0),
+    limit: int = Query(20, ge=1, le=100),
+    filters: schemas.ArticleFilter = Depends(),
+    session: AsyncSession = Depends(deps.get_cached_session)
+):
+    """
+    Full-text search over article titles and summaries, best matches first.
+
+    Accepts web-search syntax on PostgreSQL ("quoted phrases", -exclusions, or).
+    """
+    async def build():
+        matches = await search.search_articles(session, q, filters, limit=limit, offset=skip)
+        results = SEARCH_RESULTS.validate_python([
+            {**ARTICLE.validate_python(article, from_attributes=True).model_dump(), "rank": rank, "highlight": highlight}
+            for article, rank, highlight in matches
+        ])
+        return SEARCH_RESULTS.dump_json(results), {}
+
+    return await response_cache.respond(request, build)
+
+@router.get("/export", response_class=StreamingResponse)
+async def export_articles(
+    format: Literal["ndjson", "csv"] = "ndjson",
+    filters: schemas.ArticleFilter = Depends(),
 ):
-    articles = await crud.get_articles(session, skip=skip, limit=limit, category=category, source_id=source_id)
-    return articles
+    """
+    Every matching article, newest first, streamed as NDJSON (one object per
+    line) or CSV with a header row. Rows are flat: the source is given as
+    source_id and source_name. Use this rather than paging through the list
+    endpoint for bulk pulls.
+    """
+    return StreamingResponse(
+        export.export_articles(filters, format),
+        media_type=export.MEDIA_TYPES[format],
+        headers={"Content-Disposition": f'attachment; filename="articles.{format}"'},
+    )
 
 @router.get("/{article_id}", response_model=schemas.ArticleRead)
-async def read_article(article_id: int, session: AsyncSession = Depends(deps.get_session)):
-    # This is a simplified read, in real app we'd have a get_article_by_id crud
-    articles = await crud.get_articles(session, skip=0, limit=1) # Placeholder if no direct get
-    # Implementing direct get here for correctness
-    from app.models import Article
-    from sqlalchemy.future import select
-    result = await session.execute(select(Article).where(Article.id == article_id))
-    article = result.scalars().first()
-    if not article:
-        raise HTTPException(status_code=404, detail="Article not found")
-    return article
+async def read_article(article_id: int, request: Request, session: AsyncSession = Depends(deps.get_cached_session)):
+    async def build():
+        article = await crud.get_article(session, article_id)
+        if not article:
+            raise HTTPException(status_code=404, detail="Article not found")
+        return ARTICLE.dump_json(ARTICLE.validate_python(article, from_attributes=True)), {}
+
+    return await response_cache.respond(request, build)
@@ -6,7 +6,7 @@ from sqlalchemy.ext.asyncio import AsyncSession
 from app.api import deps
 from app import crud, schemas
 from app.core.config import settings
-from jose import jwt
+from app.core.security import create_access_token, verify_password
 
 router = APIRouter()
 
@@ -15,13 +15,17 @@ async def login_access_token(
     session: AsyncSession = Depends(deps.get_session), form_data: OAuth2PasswordRequestForm = Depends()
 ) -> Any:
     user = await crud.get_user_by_email(session, email=form_data.username)
-    if not user or not crud.verify_password(form_data.password, user.hashed_password):
+    if not user:
+        raise HTTPException(status_code=400, detail="Incorrect email or password")
+    valid, new_hash = await verify_password(form_data.password, user.hashed_password)
+    if not valid:
         raise HTTPException(status_code=400, detail="Incorrect email or password")
     if not user.is_active:
         raise HTTPException(status_code=400, detail="Inactive user")
+    if new_hash:
+        # The hash cost changed since this password was stored; upgrade it transparently
+        user = await crud.update_user_password_hash(session, user, new_hash)
     
     access_token_expires = timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
-    access_token = jwt.encode(
-        {"sub": user.email}, settings.SECRET_KEY, algorithm=settings.ALGORITHM
-    )
+    access_token = create_access_token(user, expires_delta=access_token_expires)
     return {"access_token": access_token, "token_type": "bearer"}
@@ -1,26 +1,36 @@
 from typing import List
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Request
+from pydantic import TypeAdapter
 from sqlalchemy.ext.asyncio import AsyncSession
 from app.api import deps
 from app import crud, schemas
+from app.cache import response_cache
 
 router = APIRouter()
 
+SOURCE_LIST = TypeAdapter(List[schemas.SourceRead])
+
 @router.get("/", response_model=List[schemas.SourceRead])
 async def read_sources(
+    request: Request,
     skip: int = 0,
     limit: int = 100,
-    session: AsyncSession = Depends(deps.get_session)
+    session: AsyncSession = Depends(deps.get_cached_session)
 ):
-    sources = await crud.get_sources(session, skip=skip, limit=limit)
-    return sources
+    async def build():
+        sources = await crud.get_sources(session, skip=skip, limit=limit)
+        return SOURCE_LIST.dump_json(SOURCE_LIST.validate_python(sources, from_attributes=True)), {}
+
+    return await response_cache.respond(request, build)
 
 @router.post("/", response_model=schemas.SourceRead)
 async def create_source(
     source: schemas.SourceCreate,
     session: AsyncSession = Depends(deps.get_session),
-    current_user = Depends(deps.get_current_user)
+    current_user: schemas.Principal = Depends(deps.get_current_principal)
 ):
     if not current_user.is_superuser:
         raise HTTPException(status_code=403, detail="Not enough privileges")
-    return await crud.create_source(session, source=source)
+    db_source = await crud.create_source(session, source=source)
+    await response_cache.bump_version()
+    return db_source
@@ -1,85 +1,80 @@
-from fastapi import APIRouter, HTTPException
-import httpx
-from typing import List, Dict, Any
-import os
+import asyncio
+import json
+from fastapi import APIRouter, Query, Response, WebSocket
+from fastapi.responses import StreamingResponse
+from typing import List, Dict, Any, Optional
+from app.live_scores import live_scores
+from app.live_stream import RESYNC, broadcaster, sse_stream
 
 router = APIRouter()
 
-# Free sports API - using API-FOOTBALL (you can also use other free APIs)
-# For production, get your API key from https://www.api-football.com/
-SPORTS_API_KEY = os.getenv("SPORTS_API_KEY", "test")  # Replace with actual API key
-
 @router.get("/live-scores")
-async def get_live_scores() -> List[Dict[str, Any]]:
+async def get_live_scores(
+    since: Optional[int] = Query(None, ge=0, description="Only return changes after this version"),
+) -> Response:
     """
-    Fetch live sports scores from multiple sources.
-    Returns only matches that are currently live.
+    Live matches from every configured score provider.
+
+    Providers are polled in the background (see app.live_scores); this only
+    returns the latest snapshot, so it never calls upstream APIs itself.
+
+    Without `since` this is the list of live matches. With it, the reply is
+    {"version", "changed", "removed"}: the matches whose score changed after
+    that version, each with its recent score history, and the ids of matches
+    that ended. Pass the returned version as `since` on the next poll. A
+    reply with "reset": true carries every live match under "matches" instead.
     """
-    live_matches = []
-    
-    try:
-        # Fetch live cricket scores (using cricapi or similar)
-        cricket_matches = await fetch_live_cricket()
-        live_matches.extend(cricket_matches)
-        
-        # Fetch live football scores
-        football_matches = await fetch_live_football()
-        live_matches.extend(football_matches)
-        
-    except Exception as e:
-        print(f"Error fetching live scores: {e}")
-        # Return empty list if API fails
-        return []
-    
-    # Filter to only return matches that are actually live
-    return [match for match in live_matches if match.get("isLive", False)]
+    if since is None:
+        return Response(content=live_scores.snapshot, media_type="application/json")
+    return Response(content=json.dumps(live_scores.changes_since(since)), media_type="application/json")
 
 
-async def fetch_live_cricket() -> List[Dict[str, Any]]:
-    """Fetch live cricket matches"""
-    matches = []
-    
-    try:
-        # Using cricapi.com free tier (25 requests/hour)
-        # You can also use: https://www.cricbuzz.com/api or espncricinfo
-        async with httpx.AsyncClient(timeout=10.0) as client:
-            # This is a mock response structure - replace with actual API call
-            # response = await client.get(
-            #     "https://api.cricapi.com/v1/currentMatches",
-            #     params={"apikey": SPORTS_API_KEY}
-            # )
-            
-            # For now, return structured empty data
-            # In production, parse the API response here
-            pass
-            
-    except Exception as e:
-        print(f"Cricket API error: {e}")
-    
-    return matches
+@router.get("/live-scores/stream")
+async def stream_live_scores() -> StreamingResponse:
+    """
+    Server-sent events with live score changes.
 
+    Sends a `snapshot` event with every live match on connect, then an
+    `update` event ({"version", "changed", "removed"}) whenever matches change.
+    """
+    return StreamingResponse(
+        sse_stream(broadcaster),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
 
-async def fetch_live_football() -> List[Dict[str, Any]]:
-    """Fetch live football matches"""
-    matches = []
-    
-    try:
-        # Using API-Football free tier
-        async with httpx.AsyncClient(timeout=10.0) as client:
-            # Example API call structure
-            # response = await client.get(
-            #     "https://v3.football.api-sports.io/fixtures",
-            #     headers={"x-apisports-key": SPORTS_API_KEY},
-            #     params={"live": "all"}
-            # )
-            
-            # For now, return structured empty data
-            pass
-            
-    except Exception as e:
-        print(f"Football API error: {e}")
-    
-    return matches
+
+@router.websocket("/live-scores/ws")
+async def live_scores_socket(websocket: WebSocket):
+    """The same stream as /live-scores/stream over a WebSocket, as {"type": ..., ...} messages."""
+    await websocket.accept()
+    async with broadcaster.subscribe("websocket") as queue:
+        async def send():
+            await websocket.send_text('{"type":"snapshot",' + broadcaster.snapshot_message()[1:].decode())
+            while True:
+                event = await queue.get()
+                if event is RESYNC:
+                    await websocket.send_text('{"type":"snapshot",' + broadcaster.snapshot_message()[1:].decode())
+                else:
+                    await websocket.send_text(json.dumps({"type": "update", **event}))
+
+        async def receive():
+            # Nothing is expected from the client; this just notices when it goes away
+            async for _ in websocket.iter_text():
+                pass
+
+        tasks = [asyncio.create_task(send()), asyncio.create_task(receive())]
+        await asyncio.wait(tasks, return_when=asyncio.FIRST_COMPLETED)
+        for task in tasks:
+            task.cancel()
+        # A send to a client that already left just ends the connection
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+
+@router.get("/live-scores/stream/metrics")
+async def live_score_stream_metrics() -> Dict[str, Any]:
+    """Open stream connections and fan-out latency on this worker."""
+    return broadcaster.metrics.as_dict()
 
 
 @router.get("/live-scores/demo")
@@ -0,0 +1,62 @@
+from datetime import datetime
+from typing import List, Optional
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
+from pydantic import TypeAdapter
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.api import deps
+from app import crud, schemas
+from app.bias_analyzer import get_bias_label
+from app.cache import response_cache
+
+router = APIRouter()
+
+STORY_LIST = TypeAdapter(List[schemas.StoryRead])
+STORY = TypeAdapter(schemas.StoryDetail)
+
+def _with_coverage(story, coverage: List[dict]) -> dict:
+    return {
+        **story.model_dump(),
+        "coverage": [{**item, "bias_label": get_bias_label(item["avg_bias_score"])} for item in coverage],
+    }
+
+@router.get("/", response_model=List[schemas.StoryRead])
+async def read_stories(
+    request: Request,
+    skip: int = 0,
+    limit: int = Query(50, ge=1, le=200),
+    min_sources: int = Query(2, ge=1, description="Only stories covered by at least this many sources"),
+    date_from: Optional[datetime] = None,
+    date_to: Optional[datetime] = None,
+    session: AsyncSession = Depends(deps.get_cached_session)
+):
+    """
+    Stories (articles from different sources about the same event), most
+    recently covered first, with each source's article count and average bias.
+    """
+    async def build():
+        stories = await crud.get_stories(
+            session, skip=skip, limit=limit, min_sources=min_sources, date_from=date_from, date_to=date_to
+        )
+        coverage = await crud.get_story_coverage(session, [story.id for story in stories])
+        body = [_with_coverage(story, coverage[story.id]) for story in stories]
+        return STORY_LIST.dump_json(STORY_LIST.validate_python(body)), {}
+
+    return await response_cache.respond(request, build)
+
+@router.get("/{story_id}", response_model=schemas.StoryDetail)
+async def read_story(
+    request: Request,
+    story_id: int,
+    session: AsyncSession = Depends(deps.get_cached_session)
+):
+    async def build():
+        story = await crud.get_story(session, id=story_id)
+        if story is None:
+            raise HTTPException(status_code=404, detail="Story not found")
+        coverage = await crud.get_story_coverage(session, [story.id])
+        articles = await crud.get_story_articles(session, story.id)
+        body = _with_coverage(story, coverage[story.id])
+        body["articles"] = [schemas.ArticleRead.model_validate(article, from_attributes=True) for article in articles]
+        return STORY.dump_json(STORY.validate_python(body)), {}
+
+    return await response_cache.respond(request, build)
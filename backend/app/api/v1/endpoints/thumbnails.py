@@ -0,0 +1,40 @@
+from fastapi import APIRouter, Depends, Header, HTTPException, Query
+from fastapi.responses import Response
+from typing import Optional
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.api import deps
+from app import crud
+from app.core.config import settings
+from app.thumbnails import FORMATS, ThumbnailError, negotiate_format, thumbnails
+
+router = APIRouter()
+
+# A thumbnail's URL always maps to the same bytes (articles never change their image)
+CACHE_CONTROL = "public, max-age=31536000, immutable"
+
+@router.get("/{article_id}", response_class=Response)
+async def read_thumbnail(
+    article_id: int,
+    width: int = Query(settings.THUMBNAIL_WIDTHS[-1], description=f"One of {settings.THUMBNAIL_WIDTHS}"),
+    accept: Optional[str] = Header(None),
+    session: AsyncSession = Depends(deps.get_session),
+):
+    """
+    The article's image, resized to `width` pixels wide and served from the
+    thumbnail cache: WebP when the client accepts it, JPEG otherwise.
+    """
+    if width not in settings.THUMBNAIL_WIDTHS:
+        raise HTTPException(status_code=400, detail=f"width must be one of {settings.THUMBNAIL_WIDTHS}")
+    image_url = await crud.get_article_image_url(session, article_id)
+    if not image_url:
+        raise HTTPException(status_code=404, detail="Article has no image")
+    format = negotiate_format(accept)
+    try:
+        data = await thumbnails.get(image_url, width, format)
+    except ThumbnailError:
+        raise HTTPException(status_code=502, detail="Image could not be fetched")
+    return Response(
+        content=data,
+        media_type=FORMATS[format],
+        headers={"Cache-Control": CACHE_CONTROL, "Vary": "Accept"},
+    )
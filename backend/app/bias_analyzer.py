@@ -3,6 +3,12 @@ Bias Detection Algorithm for News Articles
 
 This module analyzes article content to determine political bias on a scale from -100 (left) to +100 (right).
 """
+import hashlib
+import json
+from typing import Dict, List, Optional, Sequence, Set, Tuple
+
+from app.categories import CATEGORY_KEYWORDS
+from app.keyword_matcher import KeywordMatcher
 
 # Left-wing indicators
 LEFT_KEYWORDS = {
@@ -56,23 +62,71 @@ EMOTIONAL_RIGHT = {
 }
 
 
-def calculate_bias_score(title: str, summary: str = "") -> float:
+# Group names used in keyword match results
+LEFT = "left"
+RIGHT = "right"
+NEUTRAL = "neutral"
+EMOTIONAL_LEFT_GROUP = "emotional_left"
+EMOTIONAL_RIGHT_GROUP = "emotional_right"
+
+# Every lexicon that feeds into the bias score
+BIAS_LEXICON = {
+    LEFT: LEFT_KEYWORDS,
+    RIGHT: RIGHT_KEYWORDS,
+    NEUTRAL: NEUTRAL_KEYWORDS,
+    EMOTIONAL_LEFT_GROUP: EMOTIONAL_LEFT,
+    EMOTIONAL_RIGHT_GROUP: EMOTIONAL_RIGHT,
+}
+
+# One matcher for every lexicon the enrichment step uses, built once at import
+KEYWORD_MATCHER = KeywordMatcher({**BIAS_LEXICON, **CATEGORY_KEYWORDS})
+
+
+def lexicon_terms() -> Dict[str, List[str]]:
+    """The current bias lexicon as {group: sorted terms}, suitable for storing as JSON."""
+    return {group: sorted(terms) for group, terms in BIAS_LEXICON.items()}
+
+
+def lexicon_version(terms: Dict[str, List[str]]) -> str:
+    """Content hash of a lexicon; any added, removed or regrouped term changes it."""
+    return hashlib.sha1(json.dumps(terms, sort_keys=True).encode()).hexdigest()[:12]
+
+
+# Stored on each article next to its bias_score
+LEXICON_VERSION = lexicon_version(lexicon_terms())
+
+
+def match_keywords(title: str, summary: str = "") -> Dict[str, Set[str]]:
+    """
+    Find every bias, neutral, emotional and category keyword in an article in one pass.
+
+    The result can be passed to both calculate_bias_score and categorize_article
+    so the text is only scanned once per article.
+    """
+    return KEYWORD_MATCHER.match(title + " " + (summary or ""))
+
+
+def calculate_bias_score(title: str, summary: str = "", matches: Optional[Dict[str, Set[str]]] = None) -> float:
     """
     Calculate bias score for an article based on content analysis.
     
+    Args:
+        matches: Result of match_keywords for this article, if already computed
+    
     Returns:
         float: Bias score from -100 (far left) to +100 (far right), 0 is center
     """
-    text = (title + " " + summary).lower()
+    if matches is None:
+        matches = match_keywords(title, summary)
     
     # Count keyword occurrences
-    left_count = sum(1 for keyword in LEFT_KEYWORDS if keyword in text)
-    right_count = sum(1 for keyword in RIGHT_KEYWORDS if keyword in text)
-    neutral_count = sum(1 for keyword in NEUTRAL_KEYWORDS if keyword in text)
+    left_count = len(matches[LEFT])
+    right_count = len(matches[RIGHT])
+    neutral_count = len(matches[NEUTRAL])
     
     # Count emotional language (weighted more heavily)
-    emotional_left = sum(2 for keyword in EMOTIONAL_LEFT if keyword in text)
-    emotional_right = sum(2 for keyword in EMOTIONAL_RIGHT if keyword in text)
+    emotional_left = 2 * len(matches[EMOTIONAL_LEFT_GROUP])
+    emotional_right = 2 * len(matches[EMOTIONAL_RIGHT_GROUP])
     
     # Total scores
     left_total = left_count + emotional_left
@@ -100,6 +154,32 @@ def calculate_bias_score(title: str, summary: str = "") -> float:
     return 0.0
 
 
+def calculate_bias_scores(
+    texts: Sequence[Tuple[str, str]], matches: Optional[Sequence[Dict[str, Set[str]]]] = None
+) -> List[float]:
+    """
+    Batch form of calculate_bias_score.
+    
+    Args:
+        texts: (title, summary) pairs
+        matches: match_keywords results for each pair, if already computed
+    
+    Returns:
+        list: One bias score per input, in order
+    """
+    if matches is None:
+        matches = [match_keywords(title, summary) for title, summary in texts]
+    return [
+        calculate_bias_score(title, summary, matches=article_matches)
+        for (title, summary), article_matches in zip(texts, matches)
+    ]
+
+
+def bias_terms(matches: Dict[str, Set[str]]) -> Set[str]:
+    """The bias-lexicon terms found in an article, as recorded in its term index."""
+    return set().union(*(matches[group] for group in BIAS_LEXICON))
+
+
 def get_bias_label(bias_score: float) -> str:
     """
     Convert bias score to human-readable label.
@@ -0,0 +1,151 @@
+"""
+Redis-backed response cache for the public read endpoints.
+
+Responses are cached per path and query string under a global version number.
+Ingestion bumps the version whenever it stores new rows, which invalidates
+every cached response at once without having to find and delete keys; stale
+entries just expire. Every cached response carries a strong ETag so clients
+revalidating with If-None-Match get an empty 304.
+
+Concurrent misses for the same key are coalesced: within a worker they share
+one in-flight build, and across workers a short Redis lock lets one worker
+build while the others wait for its result. If Redis is unavailable the
+endpoints fall back to building every response directly.
+"""
+import asyncio
+import hashlib
+import json
+import logging
+from dataclasses import dataclass, field
+from typing import Awaitable, Callable, Dict, Optional, Tuple
+
+from fastapi import Request, Response
+from redis.exceptions import RedisError
+
+from app.core.config import settings
+from app.db.redis import redis_client
+
+logger = logging.getLogger(__name__)
+
+VERSION_KEY = "cache:version"
+
+# (body, extra headers) produced by an endpoint on a cache miss
+Builder = Callable[[], Awaitable[Tuple[bytes, Dict[str, str]]]]
+
+
+@dataclass
+class CachedResponse:
+    body: bytes
+    etag: str
+    headers: Dict[str, str] = field(default_factory=dict)
+
+    @classmethod
+    def build(cls, body: bytes, headers: Dict[str, str]) -> "CachedResponse":
+        return cls(body=body, etag=f'"{hashlib.sha1(body).hexdigest()}"', headers=headers)
+
+    def dumps(self) -> str:
+        return json.dumps({"body": self.body.decode(), "etag": self.etag, "headers": self.headers})
+
+    @classmethod
+    def loads(cls, raw: str) -> "CachedResponse":
+        data = json.loads(raw)
+        return cls(body=data["body"].encode(), etag=data["etag"], headers=data["headers"])
+
+    def to_response(self, request: Request) -> Response:
+        headers = {**self.headers, "ETag": self.etag, "Cache-Control": "no-cache"}
+        if_none_match = request.headers.get("If-None-Match")
+        if if_none_match and self.etag in (tag.strip() for tag in if_none_match.split(",")):
+            return Response(status_code=304, headers=headers)
+        return Response(content=self.body, media_type="application/json", headers=headers)
+
+
+class ResponseCache:
+    def __init__(self, redis=redis_client, ttl: int = settings.RESPONSE_CACHE_TTL, enabled: bool = settings.RESPONSE_CACHE_ENABLED):
+        self.redis = redis
+        self.ttl = ttl
+        self.enabled = enabled
+        self._inflight: Dict[str, "asyncio.Future[CachedResponse]"] = {}
+
+    async def bump_version(self) -> None:
+        """Invalidate every cached response. Called after ingestion stores new rows."""
+        if not self.enabled:
+            return
+        try:
+            await self.redis.incr(VERSION_KEY)
+        except RedisError as e:
+            logger.warning("Could not bump response cache version: %r", e)
+
+    async def _key(self, request: Request) -> str:
+        version = await self.redis.get(VERSION_KEY) or "0"
+        query = "&".join(f"{name}={value}" for name, value in sorted(request.query_params.multi_items()))
+        digest = hashlib.sha1(f"{request.url.path}?{query}".encode()).hexdigest()
+        return f"cache:{version}:{digest}"
+
+    async def respond(self, request: Request, build: Builder) -> Response:
+        """Serve the cached response for this request, building and storing it on a miss."""
+        if not self.enabled:
+            return CachedResponse.build(*await build()).to_response(request)
+        try:
+            key = await self._key(request)
+            raw = await self.redis.get(key)
+        except RedisError as e:
+            logger.warning("Response cache unavailable: %r", e)
+            return CachedResponse.build(*await build()).to_response(request)
+        if raw is not None:
+            return CachedResponse.loads(raw).to_response(request)
+
+        inflight = self._inflight.get(key)
+        if inflight is not None:
+            return (await asyncio.shield(inflight)).to_response(request)
+
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[key] = future
+        try:
+            cached = await self._fill(key, build)
+            future.set_result(cached)
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except Exception as e:
+            future.set_exception(e)
+            # Nobody may be waiting; retrieve it so asyncio doesn't log it as unhandled
+            future.exception()
+            raise
+        finally:
+            del self._inflight[key]
+        return cached.to_response(request)
+
+    async def _fill(self, key: str, build: Builder) -> CachedResponse:
+        lock_key = f"{key}:lock"
+        lock_ms = settings.RESPONSE_CACHE_LOCK_MS
+        try:
+            locked = await self.redis.set(lock_key, "1", nx=True, px=lock_ms)
+            if not locked:
+                # Another worker is building this response; wait for it rather than hitting the database too
+                raw = await self._wait_for(key, lock_ms / 1000)
+                if raw is not None:
+                    return CachedResponse.loads(raw)
+        except RedisError as e:
+            logger.warning("Response cache lock failed: %r", e)
+            locked = False
+
+        cached = CachedResponse.build(*await build())
+        try:
+            await self.redis.set(key, cached.dumps(), ex=self.ttl)
+            if locked:
+                await self.redis.delete(lock_key)
+        except RedisError as e:
+            logger.warning("Could not store cached response: %r", e)
+        return cached
+
+    async def _wait_for(self, key: str, timeout: float) -> Optional[str]:
+        deadline = asyncio.get_running_loop().time() + timeout
+        while asyncio.get_running_loop().time() < deadline:
+            await asyncio.sleep(0.05)
+            raw = await self.redis.get(key)
+            if raw is not None:
+                return raw
+        return None
+
+
+response_cache = ResponseCache()
@@ -0,0 +1,12 @@
+"""Keyword lists used to assign each article a topical category."""
+
+# Order matters: ties between categories go to the one listed first
+CATEGORY_KEYWORDS = {
+    "Politics": ["election", "government", "minister", "parliament", "political", "party", "bjp", "congress", "vote", "policy", "law", "supreme court", "president", "prime minister"],
+    "Business": ["business", "economy", "market", "stock", "company", "corporate", "trade", "finance", "bank", "rupee", "gdp", "industry", "startup", "investment"],
+    "Technology": ["technology", "tech", "ai", "artificial intelligence", "software", "app", "digital", "internet", "cyber", "smartphone", "computer", "innovation", "startup"],
+    "Health": ["health", "medical", "hospital", "doctor", "disease", "covid", "vaccine", "medicine", "patient", "treatment", "healthcare"],
+    "Environment": ["environment", "climate", "pollution", "green", "renewable", "carbon", "weather", "forest", "wildlife", "conservation"],
+    "Sports": ["cricket", "football", "sports", "match", "player", "team", "tournament", "olympics", "ipl", "fifa", "championship"],
+    "Entertainment": ["film", "movie", "actor", "actress", "bollywood", "music", "celebrity", "entertainment", "show", "series", "netflix"]
+}
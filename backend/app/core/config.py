@@ -1,5 +1,5 @@
 from pydantic_settings import BaseSettings
-from typing import Optional
+from typing import List, Optional
 
 class Settings(BaseSettings):
     PROJECT_NAME: str = "Ground India"
@@ -12,13 +12,112 @@ class Settings(BaseSettings):
     POSTGRES_PORT: str = "5432"
     
     SQLALCHEMY_DATABASE_URI: Optional[str] = None
+    # Optional read replica; GET/HEAD API requests read from it when set, except response cache fills
+    DATABASE_REPLICA_URL: Optional[str] = None
+    SQL_ECHO: bool = False
+    DB_POOL_SIZE: int = 5
+    DB_MAX_OVERFLOW: int = 10
+    DB_POOL_RECYCLE: int = 1800  # seconds; -1 keeps connections forever
+    DB_POOL_PRE_PING: bool = False
+    DB_STATEMENT_CACHE_SIZE: int = 100  # asyncpg prepared statements per connection; 0 behind pgbouncer
 
     CELERY_BROKER_URL: str = "redis://redis:6379/0"
     CELERY_RESULT_BACKEND: str = "redis://redis:6379/0"
+    REDIS_URL: str = "redis://redis:6379/0"
 
     SECRET_KEY: str = "supersecretkey"
     ALGORITHM: str = "HS256"
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 30
+    USER_CACHE_SIZE: int = 1024
+    USER_CACHE_TTL: int = 60
+    # bcrypt cost; stored hashes with a different cost are rehashed on the next login
+    PASSWORD_HASH_ROUNDS: int = 12
+    PASSWORD_HASH_WORKERS: int = 4
+
+    # Feed fetching
+    FEED_FETCH_TIMEOUT: float = 20.0
+    FEED_MAX_CONNECTIONS: int = 50
+    FEED_PER_HOST_CONCURRENCY: int = 4
+    FEED_USER_AGENT: str = "GroundIndiaBot/1.0 (+https://github.com/Kitta06/ground-india)"
+
+    # Database pool of each Celery worker process
+    WORKER_DB_POOL_SIZE: int = 5
+    WORKER_DB_MAX_OVERFLOW: int = 10
+
+    # Share of routine per-feed ingest log lines kept; failures are always logged
+    INGEST_LOG_SAMPLE_RATE: float = 0.1
+
+    # Per-source fetch scheduling (seconds)
+    FEED_DISPATCH_INTERVAL: float = 60.0
+    FEED_DISPATCH_LEASE: float = 600.0
+    FEED_DEFAULT_INTERVAL: float = 1800.0
+    FEED_MIN_INTERVAL: float = 120.0
+    FEED_MAX_INTERVAL: float = 21600.0
+    FEED_EMPTY_BACKOFF: float = 1.5
+    FEED_FAILURE_BACKOFF: float = 2.0
+    FEED_INTERVAL_SMOOTHING: float = 0.5
+
+    # Offline replay of feed archives (scripts/trigger_fetch.py replay)
+    REPLAY_WORKERS: Optional[int] = None
+    REPLAY_BATCH_SIZE: int = 2000
+
+    # Known-URL pre-filter
+    SEEN_URL_WARM_DAYS: int = 14
+    SEEN_URL_SHARED: bool = False
+
+    # Story clustering: MinHash signatures with LSH banding (bands must divide permutations)
+    STORY_MINHASH_PERMUTATIONS: int = 64
+    STORY_LSH_BANDS: int = 32
+    STORY_SIMILARITY: float = 0.3
+    STORY_WINDOW_DAYS: int = 3
+    # Ids below the highest one seen that each sync re-reads, for inserts that committed out of id order
+    STORY_SYNC_ID_OVERLAP: int = 5000
+
+    # Bias rollups
+    BIAS_ROLLUP_REBUILD_CHUNK_SIZE: int = 5000
+    BIAS_ANALYTICS_DEFAULT_DAYS: int = 30
+
+    # Request profiling (app.profiling)
+    SLOW_REQUEST_MS: float = 500.0
+    SERVER_TIMING_ENABLED: bool = False
+    SQL_REPEAT_WARN_THRESHOLD: int = 10
+
+    # Bulk export (GET /articles/export): rows fetched from the server-side cursor at a time
+    EXPORT_BATCH_SIZE: int = 5000
+
+    # Thumbnail proxy for article images (app.thumbnails)
+    THUMBNAIL_CACHE_DIR: str = "/tmp/thumbnails"
+    THUMBNAIL_CACHE_MAX_BYTES: int = 1024 * 1024 * 1024
+    THUMBNAIL_WIDTHS: List[int] = [160, 320, 640]
+    THUMBNAIL_QUALITY: int = 80
+    THUMBNAIL_MAX_SOURCE_BYTES: int = 15 * 1024 * 1024
+    THUMBNAIL_MAX_PIXELS: int = 40_000_000  # larger images are refused before they are decoded
+    THUMBNAIL_FETCH_TIMEOUT: float = 10.0
+    THUMBNAIL_FAILURE_TTL: float = 3600.0  # seconds before an image that failed is tried again
+    # Render thumbnails for newly stored articles on the worker (needs a cache dir shared with the API)
+    THUMBNAIL_PREWARM: bool = False
+
+    # Response cache
+    RESPONSE_CACHE_ENABLED: bool = True
+    RESPONSE_CACHE_TTL: int = 1800
+    RESPONSE_CACHE_LOCK_MS: int = 5000
+
+    # Bias rescoring after lexicon changes
+    RESCORE_CHUNK_SIZE: int = 2000
+    RESCORE_WORKERS: Optional[int] = None
+
+    # Live sports scores: comma separated provider names (cricket, football, stub)
+    LIVE_SCORE_PROVIDERS: str = ""
+    SPORTS_API_KEY: str = "test"
+    CRICKET_POLL_INTERVAL: float = 180.0
+    FOOTBALL_POLL_INTERVAL: float = 60.0
+    LIVE_SCORE_STUB_URL: str = "http://localhost:9000/matches"
+    LIVE_SCORE_STUB_INTERVAL: float = 5.0
+    LIVE_SCORE_TIMEOUT: float = 10.0
+    LIVE_STREAM_QUEUE_SIZE: int = 100
+    LIVE_SCORE_HISTORY: int = 20
+    LIVE_SCORE_REMOVED_HISTORY: int = 256
+    LIVE_STREAM_KEEPALIVE: float = 15.0
 
     @property
     def assemble_db_connection(self) -> str:
@@ -0,0 +1,17 @@
+import json
+import logging
+import random
+
+def log_event(logger: logging.Logger, event: str, level: int = logging.INFO, sample_rate: float = 1.0, exc_info: bool = False, **fields) -> None:
+    """
+    Log one JSON object, {"event": event, **fields}, so log pipelines can
+    parse it whatever the handler's format. With sample_rate < 1 only that
+    share of calls is logged, and the rate is included so counts can be scaled back up.
+    """
+    if not logger.isEnabledFor(level):
+        return
+    if sample_rate < 1.0:
+        if random.random() >= sample_rate:
+            return
+        fields["sample_rate"] = sample_rate
+    logger.log(level, json.dumps({"event": event, **fields}, default=str), exc_info=exc_info)
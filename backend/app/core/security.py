@@ -0,0 +1,60 @@
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from typing import Optional, Tuple
+from jose import jwt
+from passlib.context import CryptContext
+from app.core.config import settings
+from app.core.ttl_cache import TTLCache
+from app.models import User
+
+# Resolved users keyed by token subject (email); entries never outlive the token they came from
+user_cache: TTLCache[User] = TTLCache(maxsize=settings.USER_CACHE_SIZE, ttl=settings.USER_CACHE_TTL)
+
+# Pinning min and max rounds to the configured cost makes any other cost "needs update"
+pwd_context = CryptContext(
+    schemes=["bcrypt"],
+    deprecated="auto",
+    bcrypt__default_rounds=settings.PASSWORD_HASH_ROUNDS,
+    bcrypt__min_rounds=settings.PASSWORD_HASH_ROUNDS,
+    bcrypt__max_rounds=settings.PASSWORD_HASH_ROUNDS,
+)
+
+# bcrypt releases the GIL, so a few threads keep hashing off the event loop;
+# the bound stops a burst of logins from starving everything else of CPU
+_password_executor = ThreadPoolExecutor(max_workers=settings.PASSWORD_HASH_WORKERS, thread_name_prefix="password")
+
+
+async def hash_password(password: str) -> str:
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_password_executor, pwd_context.hash, password)
+
+
+async def verify_password(password: str, hashed_password: str) -> Tuple[bool, Optional[str]]:
+    """
+    Check a password against its stored hash.
+
+    Returns:
+        (valid, new_hash): new_hash is set when the password is valid but the
+        stored hash uses an outdated scheme or cost and should be replaced.
+    """
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_password_executor, pwd_context.verify_and_update, password, hashed_password)
+
+
+def create_access_token(user: User, expires_delta: Optional[timedelta] = None) -> str:
+    """
+    Issue a JWT for `user`.
+
+    Besides the subject it carries the claims endpoints authorise on (uid,
+    is_active, is_superuser), so most requests never need a database lookup.
+    """
+    expire = datetime.utcnow() + (expires_delta or timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES))
+    claims = {
+        "sub": user.email,
+        "uid": user.id,
+        "is_active": user.is_active,
+        "is_superuser": user.is_superuser,
+        "exp": expire,
+    }
+    return jwt.encode(claims, settings.SECRET_KEY, algorithm=settings.ALGORITHM)
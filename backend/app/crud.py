@@ -1,29 +1,90 @@
+from datetime import datetime
 from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import delete, func, insert, tuple_, update
 from sqlalchemy.future import select
-from typing import List, Optional
-from app.models import Article, Source, User
-from app.schemas import ArticleCreate, SourceCreate, UserCreate
-from passlib.context import CryptContext
+from typing import Dict, Iterable, List, Mapping, Optional, Tuple
+from app.models import Article, ArticleTerm, BiasLexicon, Source, Story, User
+from app.schemas import ArticleCreate, ArticleFilter, SourceCreate, UserCreate
+from app.core.security import hash_password, user_cache
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+from sqlalchemy.orm import joinedload
 
-def get_password_hash(password):
-    return pwd_context.hash(password)
+def apply_article_filters(query, filters: ArticleFilter):
+    if filters.category:
+        query = query.where(Article.category == filters.category)
+    if filters.source_id:
+        query = query.where(Article.source_id == filters.source_id)
+    if filters.date_from:
+        query = query.where(Article.published_at >= filters.date_from)
+    if filters.date_to:
+        query = query.where(Article.published_at <= filters.date_to)
+    return query
 
-def verify_password(plain_password, hashed_password):
-    return pwd_context.verify(plain_password, hashed_password)
+def _page_articles(query, filters: ArticleFilter, skip: int, after: Optional[Tuple[datetime, int]]):
+    """Newest first by (published_at, id), filtered, from `after` (keyset) or `skip` (OFFSET)."""
+    query = apply_article_filters(query.order_by(Article.published_at.desc(), Article.id.desc()), filters)
+    if after is not None:
+        return query.where(tuple_(Article.published_at, Article.id) < tuple_(*after))
+    if skip:
+        return query.offset(skip)
+    return query
 
-from sqlalchemy.orm import selectinload
+async def get_articles(
+    session: AsyncSession,
+    skip: int = 0,
+    limit: int = 100,
+    category: Optional[str] = None,
+    source_id: Optional[int] = None,
+    date_from: Optional[datetime] = None,
+    date_to: Optional[datetime] = None,
+    after: Optional[Tuple[datetime, int]] = None,
+) -> List[Article]:
+    """
+    Newest articles first, ordered by (published_at, id).
 
-async def get_articles(session: AsyncSession, skip: int = 0, limit: int = 100, category: Optional[str] = None, source_id: Optional[int] = None) -> List[Article]:
-    query = select(Article).options(selectinload(Article.source)).offset(skip).limit(limit).order_by(Article.published_at.desc())
-    if category:
-        query = query.where(Article.category == category)
-    if source_id:
-        query = query.where(Article.source_id == source_id)
-    result = await session.execute(query)
+    Pass the (published_at, id) of the last row already seen as `after` for
+    keyset pagination; `skip` is kept for callers still using OFFSET.
+    """
+    # Many-to-one: join the source in rather than paying a second SELECT ... IN round trip
+    query = _page_articles(
+        select(Article).options(joinedload(Article.source)),
+        ArticleFilter(category=category, source_id=source_id, date_from=date_from, date_to=date_to),
+        skip,
+        after,
+    )
+    result = await session.execute(query.limit(limit))
     return result.scalars().all()
 
+async def get_article_rows(
+    session: AsyncSession,
+    columns: list,
+    filters: ArticleFilter,
+    skip: int = 0,
+    limit: int = 100,
+    after: Optional[Tuple[datetime, int]] = None,
+    join_source: bool = False,
+) -> list:
+    """
+    The page get_articles would return, as plain rows of the given columns.
+
+    With join_source, Source columns may be among them (outer join: articles without a source are kept).
+    """
+    query = select(*columns).select_from(Article)
+    if join_source:
+        query = query.outerjoin(Source, Article.source_id == Source.id)
+    result = await session.execute(_page_articles(query, filters, skip, after).limit(limit))
+    return result.all()
+
+async def get_article(session: AsyncSession, article_id: int) -> Optional[Article]:
+    result = await session.execute(
+        select(Article).options(joinedload(Article.source)).where(Article.id == article_id)
+    )
+    return result.scalars().first()
+
+async def get_article_image_url(session: AsyncSession, article_id: int) -> Optional[str]:
+    result = await session.execute(select(Article.image_url).where(Article.id == article_id))
+    return result.scalar_one_or_none()
+
 async def create_article(session: AsyncSession, article: ArticleCreate) -> Article:
     db_article = Article.model_validate(article)
     session.add(db_article)
@@ -31,10 +92,187 @@ async def create_article(session: AsyncSession, article: ArticleCreate) -> Artic
     await session.refresh(db_article)
     return db_article
 
+# Keeps a single multi-row INSERT well under asyncpg's 32767 bind-parameter limit
+ARTICLE_INSERT_CHUNK_SIZE = 1000
+
+def _insert_ignoring_url_conflicts(dialect_name: str, rows: List[dict]):
+    if dialect_name == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert as dialect_insert
+    else:
+        from sqlalchemy.dialects.sqlite import insert as dialect_insert
+    return (
+        dialect_insert(Article)
+        .values(rows)
+        .on_conflict_do_nothing(index_elements=[Article.url])
+        .returning(Article.id, Article.url)
+    )
+
+async def _insert_new_articles(session: AsyncSession, rows: List[dict]) -> Dict[str, int]:
+    """Insert rows whose URL is not stored yet, without committing. Returns {url: id} of inserted rows."""
+    dialect_name = session.get_bind().dialect.name
+    inserted = {}
+    for start in range(0, len(rows), ARTICLE_INSERT_CHUNK_SIZE):
+        chunk = rows[start:start + ARTICLE_INSERT_CHUNK_SIZE]
+        if dialect_name in ("postgresql", "sqlite"):
+            result = await session.execute(_insert_ignoring_url_conflicts(dialect_name, chunk))
+            inserted.update((url, article_id) for article_id, url in result.all())
+        else:
+            existing = await session.execute(
+                select(Article.url).where(Article.url.in_([row["url"] for row in chunk]))
+            )
+            known = set(existing.scalars().all())
+            fresh = [row for row in chunk if row["url"] not in known]
+            if fresh:
+                await session.execute(insert(Article), fresh)
+                result = await session.execute(
+                    select(Article.id, Article.url).where(Article.url.in_([row["url"] for row in fresh]))
+                )
+                inserted.update((url, article_id) for article_id, url in result.all())
+    return inserted
+
+async def insert_articles(
+    session: AsyncSession, articles: List[ArticleCreate], terms: Optional[Mapping[str, Iterable[str]]] = None
+) -> Dict[str, int]:
+    """
+    Bulk-insert a batch of articles, skipping any whose URL is already stored,
+    without committing.
+
+    Uses a single INSERT ... ON CONFLICT (url) DO NOTHING per chunk on
+    PostgreSQL and SQLite, and an existing-URL lookup followed by a plain
+    INSERT on other databases.
+
+    Args:
+        terms: Optional {url: bias-lexicon terms matched}; written to the
+            term index for the articles that were actually inserted.
+
+    Returns:
+        {url: id} of the articles that were inserted.
+    """
+    rows = {}
+    for article in articles:
+        rows.setdefault(article.url, article.model_dump())
+    if not rows:
+        return {}
+
+    inserted = await _insert_new_articles(session, list(rows.values()))
+    if terms:
+        term_rows = [
+            {"article_id": article_id, "term": term}
+            for url, article_id in inserted.items()
+            for term in terms.get(url, ())
+        ]
+        if term_rows:
+            await session.execute(insert(ArticleTerm), term_rows)
+    return inserted
+
+async def create_articles(
+    session: AsyncSession, articles: List[ArticleCreate], terms: Optional[Mapping[str, Iterable[str]]] = None
+) -> Tuple[int, int]:
+    """
+    insert_articles() and commit.
+
+    Returns:
+        (inserted, skipped) counts; skipped includes duplicates within the batch.
+    """
+    inserted = await insert_articles(session, articles, terms=terms)
+    await session.commit()
+    return len(inserted), len(articles) - len(inserted)
+
+async def replace_article_terms(session: AsyncSession, terms: Mapping[int, Iterable[str]]) -> None:
+    """Rewrite the term index for the given {article_id: terms}, without committing."""
+    if not terms:
+        return
+    await session.execute(delete(ArticleTerm).where(ArticleTerm.article_id.in_(list(terms))))
+    term_rows = [
+        {"article_id": article_id, "term": term}
+        for article_id, article_terms in terms.items()
+        for term in article_terms
+    ]
+    if term_rows:
+        await session.execute(insert(ArticleTerm), term_rows)
+
+async def get_bias_lexicon(session: AsyncSession, version: str) -> Optional[BiasLexicon]:
+    return await session.get(BiasLexicon, version)
+
+async def save_bias_lexicon(session: AsyncSession, version: str, terms: Dict[str, List[str]]) -> BiasLexicon:
+    lexicon = await get_bias_lexicon(session, version)
+    if lexicon is None:
+        lexicon = BiasLexicon(version=version, terms=terms)
+        session.add(lexicon)
+        await session.commit()
+    return lexicon
+
+async def get_stories(
+    session: AsyncSession,
+    skip: int = 0,
+    limit: int = 50,
+    min_sources: int = 1,
+    date_from: Optional[datetime] = None,
+    date_to: Optional[datetime] = None,
+) -> List[Story]:
+    """Stories with recent coverage first, optionally only those covered by at least `min_sources` sources."""
+    query = select(Story).where(Story.source_count >= min_sources)
+    if date_from is not None:
+        query = query.where(Story.last_published_at >= date_from)
+    if date_to is not None:
+        query = query.where(Story.first_published_at < date_to)
+    result = await session.execute(
+        query.order_by(Story.last_published_at.desc(), Story.id.desc()).offset(skip).limit(limit)
+    )
+    return result.scalars().all()
+
+async def get_story(session: AsyncSession, id: int) -> Optional[Story]:
+    return await session.get(Story, id)
+
+async def get_story_articles(session: AsyncSession, story_id: int) -> List[Article]:
+    result = await session.execute(
+        select(Article)
+        .options(joinedload(Article.source))
+        .where(Article.story_id == story_id)
+        .order_by(Article.published_at.desc(), Article.id.desc())
+    )
+    return result.scalars().all()
+
+async def get_story_coverage(session: AsyncSession, story_ids: List[int]) -> Dict[int, List[dict]]:
+    """{story_id: [{source_id, source_name, article_count, avg_bias_score}, ...]} in one grouped query."""
+    coverage: Dict[int, List[dict]] = {story_id: [] for story_id in story_ids}
+    if not story_ids:
+        return coverage
+    result = await session.execute(
+        select(
+            Article.story_id,
+            Article.source_id,
+            Source.name,
+            func.count(Article.id),
+            func.avg(func.coalesce(Article.bias_score, 0.0)),
+        )
+        .outerjoin(Source, Source.id == Article.source_id)
+        .where(Article.story_id.in_(story_ids))
+        .group_by(Article.story_id, Article.source_id, Source.name)
+        .order_by(Article.story_id, func.count(Article.id).desc(), Source.name)
+    )
+    for story_id, source_id, source_name, article_count, avg_bias_score in result.all():
+        coverage[story_id].append({
+            "source_id": source_id,
+            "source_name": source_name,
+            "article_count": article_count,
+            "avg_bias_score": float(avg_bias_score),
+        })
+    return coverage
+
 async def get_sources(session: AsyncSession, skip: int = 0, limit: int = 100) -> List[Source]:
     result = await session.execute(select(Source).offset(skip).limit(limit))
     return result.scalars().all()
 
+async def get_source(session: AsyncSession, id: int) -> Optional[Source]:
+    return await session.get(Source, id)
+
+async def update_source_validators(session: AsyncSession, source_id: int, etag: Optional[str], last_modified: Optional[str]) -> None:
+    await session.execute(
+        update(Source).where(Source.id == source_id).values(etag=etag, last_modified=last_modified)
+    )
+    await session.commit()
+
 async def create_source(session: AsyncSession, source: SourceCreate) -> Source:
     db_source = Source.model_validate(source)
     session.add(db_source)
@@ -47,9 +285,18 @@ async def get_user_by_email(session: AsyncSession, email: str) -> Optional[User]
     return result.scalars().first()
 
 async def create_user(session: AsyncSession, user: UserCreate) -> User:
-    hashed_password = get_password_hash(user.password)
+    hashed_password = await hash_password(user.password)
     db_user = User(email=user.email, hashed_password=hashed_password, is_active=user.is_active, is_superuser=user.is_superuser)
     session.add(db_user)
     await session.commit()
     await session.refresh(db_user)
+    user_cache.invalidate(db_user.email)
     return db_user
+
+async def update_user_password_hash(session: AsyncSession, user: User, hashed_password: str) -> User:
+    user.hashed_password = hashed_password
+    session.add(user)
+    await session.commit()
+    await session.refresh(user)
+    user_cache.invalidate(user.email)
+    return user
@@ -0,0 +1,5 @@
+from redis import asyncio as aioredis
+from app.core.config import settings
+
+# Connections are opened lazily on first command, so importing this is free
+redis_client = aioredis.from_url(settings.REDIS_URL, decode_responses=True)
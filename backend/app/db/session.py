@@ -1,19 +1,59 @@
-from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+from typing import Optional
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, create_async_engine
 from sqlalchemy.orm import sessionmaker
 from sqlmodel import SQLModel
 from app.core.config import settings
+from app.search import create_search_index
 
-engine = create_async_engine(settings.assemble_db_connection, echo=True, future=True)
+def make_engine(url: Optional[str] = None, pool_size: Optional[int] = None, max_overflow: Optional[int] = None) -> AsyncEngine:
+    url = url or settings.assemble_db_connection
+    options = {"echo": settings.SQL_ECHO, "future": True}
+    # SQLite (tests, local runs) manages its own pooling
+    if not url.startswith("sqlite"):
+        options.update(
+            pool_size=settings.DB_POOL_SIZE if pool_size is None else pool_size,
+            max_overflow=settings.DB_MAX_OVERFLOW if max_overflow is None else max_overflow,
+            pool_recycle=settings.DB_POOL_RECYCLE,
+            pool_pre_ping=settings.DB_POOL_PRE_PING,
+        )
+    if url.startswith("postgresql+asyncpg"):
+        # Prepared statement caches of SQLAlchemy's adapter and asyncpg itself; 0 disables both (pgbouncer)
+        options["connect_args"] = {
+            "prepared_statement_cache_size": settings.DB_STATEMENT_CACHE_SIZE,
+            "statement_cache_size": settings.DB_STATEMENT_CACHE_SIZE,
+        }
+    return create_async_engine(url, **options)
+
+engine = make_engine()
+# Read-only traffic goes to the replica when one is configured
+replica_engine = make_engine(settings.DATABASE_REPLICA_URL) if settings.DATABASE_REPLICA_URL else None
 
 async_session = sessionmaker(
     engine, class_=AsyncSession, expire_on_commit=False
 )
 
+async_read_session = sessionmaker(
+    replica_engine or engine, class_=AsyncSession, expire_on_commit=False
+)
+
+def use_engine(new_engine: AsyncEngine) -> None:
+    """Point engine and every session made from now on at new_engine (e.g. in a forked worker)."""
+    global engine
+    engine = new_engine
+    async_session.configure(bind=new_engine)
+    if replica_engine is None:
+        async_read_session.configure(bind=new_engine)
+
 async def get_session() -> AsyncSession:
     async with async_session() as session:
         yield session
 
+async def get_read_session() -> AsyncSession:
+    async with async_read_session() as session:
+        yield session
+
 async def init_db():
     async with engine.begin() as conn:
         # await conn.run_sync(SQLModel.metadata.drop_all)
         await conn.run_sync(SQLModel.metadata.create_all)
+        await create_search_index(conn)
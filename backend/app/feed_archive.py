@@ -0,0 +1,274 @@
+"""
+Feed archives: record raw feed bodies, replay them through ingestion offline.
+
+An archive is a gzip-compressed JSON lines file with one fetched feed per
+line: source id and name, feed URL, fetch time, status, validators, elapsed
+time and the body (base64). Recording appends, so one archive can collect
+many fetch cycles.
+
+replay() pushes an archive, or a bulk historical dump laid out as
+<dir>/<source_id>/*.xml, through the same enrichment and storage as live
+ingestion, built for throughput rather than latency: feed bodies are parsed
+and enriched in a process pool, entries already stored or seen earlier in
+the replay are dropped before they are written, and the articles of many
+feeds are written together in batches of REPLAY_BATCH_SIZE. No network is
+involved, so it also reproduces ingest performance problems offline.
+"""
+import asyncio
+import base64
+import gzip
+import json
+import logging
+import os
+from collections import deque
+from concurrent.futures import Executor, ProcessPoolExecutor
+from dataclasses import dataclass
+from datetime import datetime
+from pathlib import Path
+from typing import Deque, Dict, Iterator, List, Optional, Set, Tuple
+
+import feedparser
+from sqlalchemy.future import select
+
+from app.cache import response_cache
+from app.core.config import settings
+from app.core.log import log_event
+from app.db.session import async_session
+from app.fetcher import FeedFetcher, FeedResponse
+from app.models import Source
+from app.schemas import ArticleCreate
+from app.stories import StoryIndex
+from app.tasks import entry_to_article, feed_entries, prepare_ingest, store_articles
+from app.url_index import get_shared_redis, seen_urls
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class ArchivedFeed:
+    source_id: int
+    body: bytes
+    source_name: Optional[str] = None
+    feed_url: Optional[str] = None
+    fetched_at: Optional[str] = None
+    status_code: int = 200
+    etag: Optional[str] = None
+    last_modified: Optional[str] = None
+    elapsed: float = 0.0
+
+    def to_json(self) -> str:
+        record = {**self.__dict__, "body": base64.b64encode(self.body).decode()}
+        return json.dumps(record)
+
+    @classmethod
+    def from_json(cls, line: str) -> "ArchivedFeed":
+        record = json.loads(line)
+        record["body"] = base64.b64decode(record["body"])
+        return cls(**record)
+
+
+class ArchiveWriter:
+    """Appends fetched feeds to a gzip JSON lines archive. Use as a context manager."""
+
+    def __init__(self, path: str):
+        self._file = gzip.open(path, "at", encoding="utf-8")
+        self.written = 0
+
+    def write(self, source: Source, response: FeedResponse, fetched_at: Optional[datetime] = None) -> None:
+        feed = ArchivedFeed(
+            source_id=source.id,
+            body=response.content,
+            source_name=source.name,
+            feed_url=response.url,
+            fetched_at=(fetched_at or datetime.utcnow()).isoformat(),
+            status_code=response.status_code,
+            etag=response.etag,
+            last_modified=response.last_modified,
+            elapsed=response.elapsed,
+        )
+        self._file.write(feed.to_json() + "\n")
+        self.written += 1
+
+    def close(self) -> None:
+        self._file.close()
+
+    def __enter__(self) -> "ArchiveWriter":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+
+def read_archive(path: str) -> Iterator[ArchivedFeed]:
+    with gzip.open(path, "rt", encoding="utf-8") as f:
+        for line in f:
+            if line.strip():
+                yield ArchivedFeed.from_json(line)
+
+
+def read_dump(directory: str, source_ids: Optional[Set[int]] = None) -> Iterator[ArchivedFeed]:
+    """
+    Feed files of a historical dump: <directory>/<source_id>/<any name>, in name order.
+
+    With source_ids, every numbered directory is checked against them before
+    any file is read; ValueError names the ones that match no source.
+    """
+    source_dirs = sorted(path for path in Path(directory).iterdir() if path.is_dir() and path.name.isdigit())
+    if source_ids is not None:
+        unknown = [path.name for path in source_dirs if int(path.name) not in source_ids]
+        if unknown:
+            raise ValueError(f"Dump directories without a matching source id: {', '.join(unknown)}")
+    return (
+        ArchivedFeed(source_id=int(source_dir.name), body=feed_file.read_bytes(), feed_url=str(feed_file))
+        for source_dir in source_dirs
+        for feed_file in sorted(path for path in source_dir.iterdir() if path.is_file())
+    )
+
+
+def read_feeds(path: str, source_ids: Optional[Set[int]] = None) -> Iterator[ArchivedFeed]:
+    return read_dump(path, source_ids) if os.path.isdir(path) else read_archive(path)
+
+
+async def record(path: str, fetcher: Optional[FeedFetcher] = None) -> int:
+    """
+    Fetch every active source and append the bodies to the archive at path.
+    Fetches are unconditional, so every feed is captured, and nothing is ingested.
+    Returns the number of feeds recorded.
+    """
+    if fetcher is None:
+        async with FeedFetcher() as fetcher:
+            return await record(path, fetcher)
+    async with async_session() as session:
+        result = await session.execute(select(Source).where(Source.is_active.is_(True), Source.feed_url.is_not(None)))
+        sources = result.scalars().all()
+
+    with ArchiveWriter(path) as archive:
+        async def fetch(source: Source) -> None:
+            try:
+                response = await fetcher.fetch(source.feed_url)
+            except Exception as e:
+                log_event(logger, "feed_fetch_failed", logging.WARNING, source=source.name, url=source.feed_url, error=repr(e))
+                return
+            archive.write(source, response)
+
+        await asyncio.gather(*(fetch(source) for source in sources))
+        return archive.written
+
+
+def enrich_feed(body: bytes, source_id: int) -> Tuple[List[ArticleCreate], Dict[str, Set[str]], int, int]:
+    """
+    Parse a feed body and build articles for its entries not already known.
+    Runs in the replay's process pool, against the known URLs as of the fork.
+
+    Returns:
+        (articles, {url: bias terms}, entries in the feed, entries that failed)
+    """
+    entries, _ = feed_entries(feedparser.parse(body))
+    articles, terms, failed = [], {}, 0
+    for url, entry in entries.items():
+        if url in seen_urls:
+            continue
+        try:
+            article, terms[url] = entry_to_article(entry, url, source_id)
+            articles.append(article)
+        except Exception:
+            failed += 1
+    return articles, terms, len(entries), failed
+
+
+@dataclass
+class ReplayReport:
+    feeds: int = 0
+    entries: int = 0
+    inserted: int = 0
+    duplicates: int = 0
+    failed: int = 0
+    seconds: float = 0.0
+
+    @property
+    def articles_per_sec(self) -> float:
+        return self.inserted / self.seconds if self.seconds else 0.0
+
+
+class _Batch:
+    def __init__(self):
+        self.articles: List[ArticleCreate] = []
+        self.terms: Dict[str, Set[str]] = {}
+        self.urls: Set[str] = set()
+
+
+async def replay(
+    path: str, workers: Optional[int] = settings.REPLAY_WORKERS, batch_size: int = settings.REPLAY_BATCH_SIZE
+) -> ReplayReport:
+    """
+    Ingest every feed in an archive or dump directory as fast as possible.
+
+    Args:
+        workers: Parsing processes; defaults to the CPU count, 1 parses in-process
+        batch_size: Articles written per transaction
+    """
+    workers = workers or os.cpu_count() or 1
+    loop = asyncio.get_running_loop()
+    started = loop.time()
+    report = ReplayReport()
+    # A dump directory that names no source would only fail once its batch is written
+    async with async_session() as session:
+        source_ids = set((await session.execute(select(Source.id))).scalars().all())
+    feeds = read_feeds(path, source_ids)
+    # Known URLs are warmed before the pool forks, so workers skip them too
+    await prepare_ingest()
+    # Own index, so a long backfill does not grow the live worker's
+    index = StoryIndex()
+    redis = get_shared_redis()
+    batch = _Batch()
+
+    async def write(batch: _Batch) -> None:
+        if not batch.articles:
+            return
+        async with async_session() as session:
+            inserted_ids, _ = await store_articles(session, batch.articles, batch.terms, index=index)
+        report.inserted += len(inserted_ids)
+        report.duplicates += len(batch.articles) - len(inserted_ids)
+        await seen_urls.add(batch.urls, redis=redis)
+        index.prune(max(article.published_at for article in batch.articles))
+
+    async def collect(result: Tuple[List[ArticleCreate], Dict[str, Set[str]], int, int]) -> None:
+        nonlocal batch
+        articles, terms, entries, failed = result
+        report.entries += entries
+        report.failed += failed
+        report.duplicates += entries - len(articles) - failed
+        for article in articles:
+            if article.url in batch.urls or article.url in seen_urls:
+                report.duplicates += 1
+                continue
+            batch.articles.append(article)
+            batch.terms[article.url] = terms[article.url]
+            batch.urls.add(article.url)
+        if len(batch.articles) >= batch_size:
+            full, batch = batch, _Batch()
+            await write(full)
+
+    pool: Optional[Executor] = ProcessPoolExecutor(max_workers=workers) if workers > 1 else None
+    try:
+        # Keep every worker busy while batches are written, without reading the whole archive ahead
+        in_flight: Deque["asyncio.Future"] = deque()
+        for feed in feeds:
+            report.feeds += 1
+            if pool is None:
+                await collect(enrich_feed(feed.body, feed.source_id))
+                continue
+            in_flight.append(loop.run_in_executor(pool, enrich_feed, feed.body, feed.source_id))
+            if len(in_flight) >= workers * 2:
+                await collect(await in_flight.popleft())
+        while in_flight:
+            await collect(await in_flight.popleft())
+        await write(batch)
+    finally:
+        if pool is not None:
+            pool.shutdown(cancel_futures=True)
+
+    if report.inserted:
+        await response_cache.bump_version()
+    report.seconds = loop.time() - started
+    return report
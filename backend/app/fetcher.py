@@ -0,0 +1,128 @@
+"""
+Async HTTP layer for RSS/Atom feeds.
+
+One pooled httpx client is shared by every fetch in a cycle. Requests to the
+same host are capped by a per-host semaphore, each feed gets an overall
+deadline, and cached ETag/Last-Modified validators are sent so unchanged feeds
+come back as a cheap 304.
+"""
+import asyncio
+import time
+from dataclasses import dataclass
+from typing import Dict, Optional
+from urllib.parse import urlsplit
+
+import httpx
+
+from app.core.config import settings
+
+
+@dataclass
+class FeedResponse:
+    """Raw result of a single feed request."""
+    url: str
+    status_code: int
+    content: bytes = b""
+    etag: Optional[str] = None
+    last_modified: Optional[str] = None
+    elapsed: float = 0.0
+
+    @property
+    def not_modified(self) -> bool:
+        return self.status_code == 304
+
+
+class FeedFetcher:
+    """
+    Shared, pooled feed client. Use as an async context manager:
+
+        async with FeedFetcher() as fetcher:
+            response = await fetcher.fetch(url, etag=..., last_modified=...)
+    """
+
+    def __init__(
+        self,
+        timeout: float = settings.FEED_FETCH_TIMEOUT,
+        max_connections: int = settings.FEED_MAX_CONNECTIONS,
+        per_host_limit: int = settings.FEED_PER_HOST_CONCURRENCY,
+        transport: Optional[httpx.AsyncBaseTransport] = None,
+    ):
+        self.timeout = timeout
+        self.max_connections = max_connections
+        self.per_host_limit = per_host_limit
+        self.transport = transport
+        self._client: Optional[httpx.AsyncClient] = None
+        self._host_limits: Dict[str, asyncio.Semaphore] = {}
+
+    async def __aenter__(self) -> "FeedFetcher":
+        self._client = httpx.AsyncClient(
+            timeout=httpx.Timeout(self.timeout),
+            limits=httpx.Limits(
+                max_connections=self.max_connections,
+                max_keepalive_connections=self.max_connections,
+            ),
+            headers={"User-Agent": settings.FEED_USER_AGENT},
+            follow_redirects=True,
+            transport=self.transport,
+        )
+        return self
+
+    async def __aexit__(self, *exc_info) -> None:
+        await self.aclose()
+
+    async def aclose(self) -> None:
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+    def _host_semaphore(self, url: str) -> asyncio.Semaphore:
+        host = urlsplit(url).netloc.lower()
+        semaphore = self._host_limits.get(host)
+        if semaphore is None:
+            semaphore = asyncio.Semaphore(self.per_host_limit)
+            self._host_limits[host] = semaphore
+        return semaphore
+
+    async def fetch(
+        self, url: str, etag: Optional[str] = None, last_modified: Optional[str] = None
+    ) -> FeedResponse:
+        """
+        Conditionally GET a feed.
+
+        Raises httpx.HTTPError for transport errors and non-2xx/304 responses,
+        and asyncio.TimeoutError when the whole request exceeds the deadline.
+        """
+        if self._client is None:
+            raise RuntimeError("FeedFetcher must be entered before use")
+
+        headers = {}
+        if etag:
+            headers["If-None-Match"] = etag
+        if last_modified:
+            headers["If-Modified-Since"] = last_modified
+
+        async with self._host_semaphore(url):
+            started = time.perf_counter()
+            response = await asyncio.wait_for(
+                self._client.get(url, headers=headers), timeout=self.timeout
+            )
+            elapsed = time.perf_counter() - started
+
+        if response.status_code == 304:
+            return FeedResponse(
+                url=url,
+                status_code=304,
+                etag=etag,
+                last_modified=last_modified,
+                elapsed=elapsed,
+            )
+
+        response.raise_for_status()
+        return FeedResponse(
+            url=url,
+            status_code=response.status_code,
+            content=response.content,
+            etag=response.headers.get("ETag"),
+            last_modified=response.headers.get("Last-Modified"),
+            elapsed=elapsed,
+        )
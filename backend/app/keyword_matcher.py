@@ -0,0 +1,72 @@
+"""
+Single-pass multi-keyword matcher.
+
+The text is tokenised once with a compiled regex, and the resulting word set
+is intersected with the first words of every keyword, so the per-article cost
+depends on the text length rather than on the number of keywords. Multi-word
+phrases are only verified, against the space-joined token stream, when their
+first word is present. Matching is on
+whole words only: "ai" does not match "said" and "law" does not match "lawn".
+Overlapping phrases are all reported, e.g. "congress party" matches both
+"congress" and "congress party".
+"""
+import re
+from collections import defaultdict
+from typing import Dict, FrozenSet, Iterable, List, Mapping, Optional, Set, Tuple
+
+# Words are runs of [a-z0-9]; anything else separates them
+WORD_RE = re.compile(r"[a-z0-9]+")
+
+
+def tokenize(text: str) -> List[str]:
+    return WORD_RE.findall(text.lower())
+
+
+class KeywordMatcher:
+    """
+    Matches a fixed set of keyword groups against text.
+
+    Args:
+        groups: mapping of group name to the keywords in that group. A keyword
+            may belong to several groups.
+    """
+
+    def __init__(self, groups: Mapping[str, Iterable[str]]):
+        self.groups: Tuple[str, ...] = tuple(groups)
+        term_groups: Dict[Tuple[str, ...], Set[str]] = defaultdict(set)
+        term_names: Dict[Tuple[str, ...], str] = {}
+        for group, keywords in groups.items():
+            for keyword in keywords:
+                tokens = tuple(tokenize(keyword))
+                if not tokens:
+                    continue
+                term_groups[tokens].add(group)
+                term_names[tokens] = keyword
+
+        # first word -> [(" space joined phrase " or None for single words, keyword, groups)]
+        index: Dict[str, List[Tuple[Optional[str], str, FrozenSet[str]]]] = defaultdict(list)
+        for tokens, owners in term_groups.items():
+            phrase = " " + " ".join(tokens) + " " if len(tokens) > 1 else None
+            index[tokens[0]].append((phrase, term_names[tokens], frozenset(owners)))
+        self._index = dict(index)
+        self._first_words = frozenset(self._index)
+
+    def match(self, text: str) -> Dict[str, Set[str]]:
+        """Return {group: set of keywords found} for every group (empty sets included)."""
+        found: Dict[str, Set[str]] = {group: set() for group in self.groups}
+        tokens = WORD_RE.findall(text.lower())
+        hits = self._first_words.intersection(tokens)
+        if not hits:
+            return found
+        joined = None
+        index = self._index
+        for word in hits:
+            for phrase, keyword, owners in index[word]:
+                if phrase is not None:
+                    if joined is None:
+                        joined = " " + " ".join(tokens) + " "
+                    if phrase not in joined:
+                        continue
+                for group in owners:
+                    found[group].add(keyword)
+        return found
@@ -0,0 +1,400 @@
+"""
+Background aggregation of live sports scores.
+
+Each score provider is polled on its own schedule by a background task in
+the API process, all through one pooled httpx client, and the live matches
+are kept as a pre-serialised snapshot that GET /sports/live-scores returns
+as-is. Upstream traffic therefore depends on the poll intervals, not on the
+number of viewers.
+
+With several API workers, a short Redis lock per provider makes sure only one
+of them calls the provider per interval; the others pick up its result from
+Redis. If Redis is unavailable every worker simply polls for itself.
+
+Providers turn an upstream response into the match dicts already used by
+/sports/live-scores/demo. New providers subclass ScoreProvider and are added
+to PROVIDERS; the "stub" provider reads that shape straight from a URL, e.g.
+scripts/stub_score_provider.py.
+"""
+import asyncio
+import json
+import logging
+import time
+from abc import ABC, abstractmethod
+from collections import deque
+from datetime import datetime
+from typing import Any, Awaitable, Callable, Deque, Dict, List, Optional, Tuple
+
+import httpx
+from redis.exceptions import RedisError
+
+from app.core.config import settings
+from app.db.redis import redis_client
+
+logger = logging.getLogger(__name__)
+
+Match = Dict[str, Any]
+ScoreEvent = Dict[str, Any]
+ScoreState = Dict[str, Any]
+
+VERSION_KEY = "livescores:version"
+
+
+class ScoreProvider(ABC):
+    """An upstream source of matches, polled every `interval` seconds."""
+    name: str = ""
+
+    def __init__(self, interval: float):
+        self.interval = interval
+
+    @abstractmethod
+    async def fetch(self, client: httpx.AsyncClient) -> List[Match]:
+        """The provider's current matches, in the shared match shape."""
+
+
+class CricApiProvider(ScoreProvider):
+    """cricapi.com current matches. The free tier allows 25 requests an hour."""
+    name = "cricket"
+    url = "https://api.cricapi.com/v1/currentMatches"
+
+    def __init__(self, api_key: str, interval: float = settings.CRICKET_POLL_INTERVAL):
+        super().__init__(interval)
+        self.api_key = api_key
+
+    async def fetch(self, client: httpx.AsyncClient) -> List[Match]:
+        response = await client.get(self.url, params={"apikey": self.api_key, "offset": 0})
+        response.raise_for_status()
+        data = response.json()
+        if data.get("status") != "success":
+            raise ValueError(f"cricapi: {data.get('reason') or data.get('status')}")
+        return [self.parse(item) for item in data.get("data") or []]
+
+    @staticmethod
+    def parse(item: Dict[str, Any]) -> Match:
+        names = item.get("teams") or ["", ""]
+        info = {team.get("name"): team for team in item.get("teamInfo") or []}
+        scores = item.get("score") or []
+
+        def side(name: str) -> Dict[str, str]:
+            # Innings are labelled "<team> Inning <n>"; show the latest one
+            innings = [score for score in scores if (score.get("inning") or "").startswith(name)]
+            team = {"name": name, "short": (info.get(name) or {}).get("shortname") or name[:3].upper()}
+            if innings:
+                latest = innings[-1]
+                team["score"] = f"{latest.get('r', 0)}/{latest.get('w', 0)}"
+                team["overs"] = str(latest.get("o", ""))
+            else:
+                team["score"] = ""
+            return team
+
+        live = bool(item.get("matchStarted")) and not item.get("matchEnded")
+        return {
+            "id": f"cricket_{item.get('id')}",
+            "sport": "Cricket",
+            "league": item.get("name", ""),
+            "status": "LIVE" if live else item.get("status", ""),
+            "team1": side(names[0]),
+            "team2": side(names[1] if len(names) > 1 else ""),
+            "venue": item.get("venue", ""),
+            "detailsUrl": "https://www.espncricinfo.com",
+            "isLive": live,
+            "lastUpdated": datetime.now().isoformat(),
+        }
+
+
+class ApiFootballProvider(ScoreProvider):
+    """API-Football live fixtures."""
+    name = "football"
+    url = "https://v3.football.api-sports.io/fixtures"
+    live_statuses = {"1H", "HT", "2H", "ET", "BT", "P", "LIVE", "INT"}
+
+    def __init__(self, api_key: str, interval: float = settings.FOOTBALL_POLL_INTERVAL):
+        super().__init__(interval)
+        self.api_key = api_key
+
+    async def fetch(self, client: httpx.AsyncClient) -> List[Match]:
+        response = await client.get(self.url, headers={"x-apisports-key": self.api_key}, params={"live": "all"})
+        response.raise_for_status()
+        return [self.parse(item) for item in response.json().get("response") or []]
+
+    @classmethod
+    def parse(cls, item: Dict[str, Any]) -> Match:
+        fixture = item.get("fixture") or {}
+        status = fixture.get("status") or {}
+        teams = item.get("teams") or {}
+        goals = item.get("goals") or {}
+
+        def side(key: str) -> Dict[str, str]:
+            name = (teams.get(key) or {}).get("name") or ""
+            score = goals.get(key)
+            return {"name": name, "short": name[:3].upper(), "score": str(score if score is not None else 0)}
+
+        elapsed = status.get("elapsed")
+        return {
+            "id": f"football_{fixture.get('id')}",
+            "sport": "Football",
+            "league": (item.get("league") or {}).get("name", ""),
+            "status": "LIVE" if status.get("short") in cls.live_statuses else status.get("long", ""),
+            "team1": side("home"),
+            "team2": side("away"),
+            "time": f"{elapsed}'" if elapsed is not None else "",
+            "venue": (fixture.get("venue") or {}).get("name") or "",
+            "detailsUrl": "https://www.api-football.com",
+            "isLive": status.get("short") in cls.live_statuses,
+            "lastUpdated": datetime.now().isoformat(),
+        }
+
+
+class JsonFeedProvider(ScoreProvider):
+    """Reads a JSON list of matches that are already in our shape, e.g. a local stub server."""
+    name = "stub"
+
+    def __init__(self, url: str, interval: float = settings.LIVE_SCORE_STUB_INTERVAL):
+        super().__init__(interval)
+        self.url = url
+
+    async def fetch(self, client: httpx.AsyncClient) -> List[Match]:
+        response = await client.get(self.url)
+        response.raise_for_status()
+        return response.json()
+
+
+PROVIDERS: Dict[str, Callable[[], ScoreProvider]] = {
+    "cricket": lambda: CricApiProvider(settings.SPORTS_API_KEY),
+    "football": lambda: ApiFootballProvider(settings.SPORTS_API_KEY),
+    "stub": lambda: JsonFeedProvider(settings.LIVE_SCORE_STUB_URL),
+}
+
+
+def build_providers(names: str = settings.LIVE_SCORE_PROVIDERS) -> List[ScoreProvider]:
+    providers = []
+    for name in (part.strip() for part in names.split(",")):
+        if not name:
+            continue
+        if name not in PROVIDERS:
+            logger.warning("Unknown live score provider %r", name)
+            continue
+        providers.append(PROVIDERS[name]())
+    return providers
+
+
+class LiveScoreAggregator:
+    """
+    Polls every provider in the background and serves the combined snapshot.
+
+    Every change in the live matches gets a new version number (shared through
+    Redis) and is handed to `on_change` as an event:
+
+        {"provider": name, "version": n, "changed": [match, ...], "removed": [id, ...], "ts": epoch}
+
+    Args:
+        providers: Score providers to poll
+        redis: Client used to share polls between workers; None polls locally
+        transport: Optional httpx transport, for tests
+    """
+
+    def __init__(self, providers: List[ScoreProvider], redis=redis_client, transport: Optional[httpx.AsyncBaseTransport] = None):
+        self.providers = providers
+        self.redis = redis
+        self.transport = transport
+        self.version = 0
+        self.on_change: Optional[Callable[[ScoreEvent], Awaitable[None]]] = None
+        self._matches: Dict[str, Dict[str, Match]] = {provider.name: {} for provider in providers}
+        self._snapshot = b"[]"
+        # For ?since=: the version each live match last changed at, its recent
+        # score states, and recently removed matches
+        self._changed_at: Dict[str, int] = {}
+        self._history: Dict[str, Deque[ScoreState]] = {}
+        self._removed: Deque[Tuple[int, str]] = deque(maxlen=settings.LIVE_SCORE_REMOVED_HISTORY)
+        self._known_from: Optional[int] = None
+        self._client: Optional[httpx.AsyncClient] = None
+        self._tasks: List[asyncio.Task] = []
+
+    @property
+    def snapshot(self) -> bytes:
+        """The live matches of every provider, as a JSON array."""
+        return self._snapshot
+
+    def matches(self) -> List[Match]:
+        return [match for matches in self._matches.values() for match in matches.values()]
+
+    async def start(self) -> None:
+        if self._tasks or not self.providers:
+            return
+        self._tasks = [
+            asyncio.create_task(self._poll(provider), name=f"live-scores:{provider.name}")
+            for provider in self.providers
+        ]
+
+    async def stop(self) -> None:
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+    def _get_client(self) -> httpx.AsyncClient:
+        if self._client is None:
+            self._client = httpx.AsyncClient(
+                timeout=httpx.Timeout(settings.LIVE_SCORE_TIMEOUT),
+                headers={"User-Agent": settings.FEED_USER_AGENT},
+                transport=self.transport,
+            )
+        return self._client
+
+    async def _poll(self, provider: ScoreProvider) -> None:
+        while True:
+            try:
+                await self.refresh(provider)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                # Keep serving the last good matches; the next poll may succeed
+                logger.warning("Live score provider %s failed: %r", provider.name, e)
+            await asyncio.sleep(provider.interval)
+
+    async def refresh(self, provider: ScoreProvider) -> None:
+        """Poll one provider, or adopt the result of the worker that did, and update the snapshot."""
+        key = f"livescores:{provider.name}"
+        if self.redis is not None:
+            try:
+                polling = await self.redis.set(f"{key}:lock", "1", nx=True, px=int(provider.interval * 1000))
+                if not polling:
+                    raw = await self.redis.get(key)
+                    if raw is not None:
+                        # The polling worker has already broadcast these changes
+                        shared = json.loads(raw)
+                        event = self._diff(provider.name, shared["matches"])
+                        if event is not None:
+                            event["version"] = shared["version"]
+                            self.apply(event)
+                    return
+            except RedisError as e:
+                logger.warning("Live score coordination unavailable, polling locally: %r", e)
+
+        matches = [match for match in await provider.fetch(self._get_client()) if match.get("isLive", False)]
+        event = self._diff(provider.name, matches)
+        if event is not None:
+            event["version"] = await self._next_version()
+            self.apply(event)
+        if self.redis is not None:
+            try:
+                shared = {"version": self.version, "matches": list(self._matches[provider.name].values())}
+                await self.redis.set(key, json.dumps(shared), ex=int(provider.interval * 3))
+            except RedisError as e:
+                logger.warning("Could not share live scores: %r", e)
+        if event is not None and self.on_change is not None:
+            await self.on_change(event)
+
+    async def _next_version(self) -> int:
+        if self.redis is not None:
+            try:
+                return max(int(await self.redis.incr(VERSION_KEY)), self.version + 1)
+            except RedisError as e:
+                logger.warning("Could not allocate live score version: %r", e)
+        return self.version + 1
+
+    def _diff(self, name: str, matches: List[Match]) -> Optional[ScoreEvent]:
+        """The event turning this provider's current matches into `matches`, or None if nothing changed."""
+        current = self._matches.get(name, {})
+        changed = [
+            match for match in matches
+            if _comparable(current.get(match["id"])) != _comparable(match)
+        ]
+        ids = {match["id"] for match in matches}
+        removed = [match_id for match_id in current if match_id not in ids]
+        if not changed and not removed:
+            return None
+        return {"provider": name, "version": 0, "changed": changed, "removed": removed, "ts": time.time()}
+
+    def apply(self, event: ScoreEvent) -> None:
+        """Apply a change event. Events are idempotent, so one may arrive both by poll and by broadcast."""
+        version = event["version"]
+        if self._known_from is None:
+            # Removals before the first event this worker saw are unknown to it
+            self._known_from = version
+        matches = self._matches.setdefault(event["provider"], {})
+        for match in event["changed"]:
+            match_id = match["id"]
+            if self._changed_at.get(match_id, 0) > version:
+                continue
+            matches[match_id] = match
+            self._changed_at[match_id] = version
+            history = self._history.setdefault(match_id, deque(maxlen=settings.LIVE_SCORE_HISTORY))
+            state = score_state(match, version, event["ts"])
+            if not history or (history[-1]["v"] < version and _event_key(history[-1]) != _event_key(state)):
+                history.append(state)
+        for match_id in event["removed"]:
+            if self._changed_at.get(match_id, 0) > version or match_id not in matches:
+                continue
+            del matches[match_id]
+            self._changed_at.pop(match_id, None)
+            self._history.pop(match_id, None)
+            if len(self._removed) == self._removed.maxlen:
+                self._known_from = max(self._known_from, self._removed[0][0])
+            self._removed.append((version, match_id))
+        self.version = max(self.version, version)
+        self._snapshot = json.dumps(self.matches()).encode()
+
+    def history(self, match_id: str) -> List[ScoreState]:
+        return list(self._history.get(match_id, ()))
+
+    def changes_since(self, since: int) -> Dict[str, Any]:
+        """
+        What changed after version `since`: {"version", "changed", "removed"}.
+
+        Every returned match carries its recent score states under "history".
+        If this worker cannot tell what changed since then (too old, or from
+        before it started) the reply is {"version", "reset": true, "matches"}
+        with every live match instead.
+        """
+        if since == self.version:
+            return {"version": self.version, "changed": [], "removed": []}
+        if since > self.version or self._known_from is None or since < self._known_from:
+            return {"version": self.version, "reset": True, "matches": [self._with_history(match) for match in self.matches()]}
+        return {
+            "version": self.version,
+            "changed": [
+                self._with_history(match) for match in self.matches()
+                if self._changed_at.get(match["id"], 0) > since
+            ],
+            "removed": [match_id for version, match_id in self._removed if version > since],
+        }
+
+    def _with_history(self, match: Match) -> Match:
+        return {**match, "history": self.history(match["id"])}
+
+
+def score_state(match: Match, version: int, ts: float) -> ScoreState:
+    """Compact record of a match's score at one version: {"v", "at", "score": [team1, team2]} plus overs or time."""
+    team1 = match.get("team1") or {}
+    team2 = match.get("team2") or {}
+    state = {"v": version, "at": ts, "score": [team1.get("score", ""), team2.get("score", "")]}
+    overs = [team.get("overs") for team in (team1, team2) if team.get("overs")]
+    if overs:
+        state["overs"] = overs[-1]
+    if match.get("time"):
+        state["time"] = match["time"]
+    return state
+
+
+def _event_key(state: ScoreState) -> Tuple:
+    # A ball bowled or a goal scored is an event; the match clock ticking over is not
+    return tuple(state["score"]), state.get("overs")
+
+
+def _comparable(match: Optional[Match]) -> Optional[Match]:
+    # Only score changes are broadcast: lastUpdated is the poll time for some
+    # providers, and the football clock and cricket overs tick between scores
+    if match is None:
+        return None
+    comparable = {key: value for key, value in match.items() if key not in ("lastUpdated", "time")}
+    for side in ("team1", "team2"):
+        if isinstance(comparable.get(side), dict):
+            comparable[side] = {key: value for key, value in comparable[side].items() if key != "overs"}
+    return comparable
+
+
+live_scores = LiveScoreAggregator(build_providers())
@@ -0,0 +1,199 @@
+"""
+Push of live score changes to connected clients.
+
+The worker that polls a provider publishes each change event on a Redis
+channel. Every API worker runs one Broadcaster, which listens on that
+channel, applies the event to its local LiveScoreAggregator and copies it to
+a queue per connected SSE or WebSocket client. One upstream poll therefore
+reaches every viewer, and a client only receives the matches that changed.
+
+A client that falls more than LIVE_STREAM_QUEUE_SIZE events behind has its
+backlog dropped and is sent a fresh snapshot instead. Without Redis, events
+are delivered to this worker's clients only.
+"""
+import asyncio
+import json
+import logging
+import time
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Dict, List, Optional, Set
+
+from redis.exceptions import RedisError
+
+from app.core.config import settings
+from app.db.redis import redis_client
+from app.live_scores import LiveScoreAggregator, ScoreEvent, live_scores
+from app.metrics import REGISTRY, format_labels, format_value
+
+logger = logging.getLogger(__name__)
+
+CHANNEL = "livescores:changes"
+
+# Queued in place of an event when a client has to start over from a snapshot
+RESYNC: ScoreEvent = {"resync": True}
+
+
+class StreamMetrics:
+    """Connection counts and publish-to-queue fan-out latency for this worker."""
+
+    def __init__(self):
+        self.connections: Dict[str, int] = {"sse": 0, "websocket": 0}
+        self.events = 0
+        self.resyncs = 0
+        self.fanout_last = 0.0
+        self.fanout_max = 0.0
+        self.fanout_total = 0.0
+
+    def record_fanout(self, seconds: float) -> None:
+        self.events += 1
+        self.fanout_last = seconds
+        self.fanout_max = max(self.fanout_max, seconds)
+        self.fanout_total += seconds
+
+    def as_dict(self) -> Dict[str, object]:
+        return {
+            "connections": dict(self.connections),
+            "events": self.events,
+            "resyncs": self.resyncs,
+            "fanout_latency_ms": {
+                "last": round(self.fanout_last * 1000, 3),
+                "avg": round(self.fanout_total / self.events * 1000, 3) if self.events else 0.0,
+                "max": round(self.fanout_max * 1000, 3),
+            },
+        }
+
+    def prometheus_lines(self) -> List[str]:
+        """This worker's stream metrics in the Prometheus text format."""
+        lines = [
+            "# HELP live_stream_connections Open live score stream connections on this worker.",
+            "# TYPE live_stream_connections gauge",
+        ]
+        lines += [
+            "live_stream_connections{%s} %d" % (format_labels({"transport": transport}), count)
+            for transport, count in sorted(self.connections.items())
+        ]
+        lines += [
+            "# HELP live_stream_events Score change events delivered on this worker.",
+            "# TYPE live_stream_events counter",
+            f"live_stream_events_total {self.events}",
+            "# HELP live_stream_resyncs Clients sent a fresh snapshot after falling behind.",
+            "# TYPE live_stream_resyncs counter",
+            f"live_stream_resyncs_total {self.resyncs}",
+            "# HELP live_stream_fanout_seconds_max Slowest publish-to-queue fan-out on this worker.",
+            "# TYPE live_stream_fanout_seconds_max gauge",
+            f"live_stream_fanout_seconds_max {format_value(self.fanout_max)}",
+        ]
+        return lines
+
+
+class Broadcaster:
+    """
+    Fans score change events out to every client connected to this worker.
+
+    Args:
+        aggregator: Aggregator whose changes are broadcast and kept current
+        redis: Client for the pub/sub channel; None delivers in-process only
+        queue_size: Events buffered per client before it is resynced
+    """
+
+    def __init__(self, aggregator: LiveScoreAggregator, redis=redis_client, queue_size: int = settings.LIVE_STREAM_QUEUE_SIZE):
+        self.aggregator = aggregator
+        self.redis = redis
+        self.queue_size = queue_size
+        self.metrics = StreamMetrics()
+        self._subscribers: Set["asyncio.Queue[ScoreEvent]"] = set()
+        self._task: Optional[asyncio.Task] = None
+
+    async def start(self) -> None:
+        self.aggregator.on_change = self.publish
+        if self.redis is not None and self._task is None:
+            self._task = asyncio.create_task(self._listen(), name="live-scores:broadcast")
+
+    async def stop(self) -> None:
+        self.aggregator.on_change = None
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+    async def publish(self, event: ScoreEvent) -> None:
+        if self._task is not None:
+            try:
+                await self.redis.publish(CHANNEL, json.dumps(event))
+                return
+            except RedisError as e:
+                logger.warning("Could not publish live score change, delivering locally: %r", e)
+        self.deliver(event)
+
+    async def _listen(self) -> None:
+        while True:
+            pubsub = self.redis.pubsub()
+            try:
+                await pubsub.subscribe(CHANNEL)
+                async for message in pubsub.listen():
+                    if message["type"] == "message":
+                        self.deliver(json.loads(message["data"]))
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.warning("Live score channel lost, reconnecting: %r", e)
+                await asyncio.sleep(1)
+            finally:
+                await pubsub.aclose()
+
+    def deliver(self, event: ScoreEvent) -> None:
+        """Apply an event locally and queue it for every connected client."""
+        self.aggregator.apply(event)
+        for queue in self._subscribers:
+            if queue.full():
+                # Too slow to keep up: drop the backlog and let it start over from a snapshot
+                while not queue.empty():
+                    queue.get_nowait()
+                queue.put_nowait(RESYNC)
+                self.metrics.resyncs += 1
+            else:
+                queue.put_nowait(event)
+        self.metrics.record_fanout(time.time() - event["ts"])
+
+    @asynccontextmanager
+    async def subscribe(self, transport: str) -> AsyncIterator["asyncio.Queue[ScoreEvent]"]:
+        queue: "asyncio.Queue[ScoreEvent]" = asyncio.Queue(maxsize=self.queue_size)
+        self._subscribers.add(queue)
+        self.metrics.connections[transport] = self.metrics.connections.get(transport, 0) + 1
+        try:
+            yield queue
+        finally:
+            self._subscribers.discard(queue)
+            self.metrics.connections[transport] -= 1
+
+    def snapshot_message(self) -> bytes:
+        """{"version": n, "matches": [...]} for a client that is (re)starting."""
+        return b'{"version":%d,"matches":%s}' % (self.aggregator.version, self.aggregator.snapshot)
+
+
+def sse_message(event: str, data: bytes, event_id: Optional[int] = None) -> bytes:
+    message = b"event: " + event.encode() + b"\n"
+    if event_id is not None:
+        message += b"id: %d\n" % event_id
+    return message + b"data: " + data + b"\n\n"
+
+
+async def sse_stream(broadcaster: Broadcaster, keepalive: float = settings.LIVE_STREAM_KEEPALIVE) -> AsyncIterator[bytes]:
+    """Server-sent events: one "snapshot", then an "update" per change."""
+    async with broadcaster.subscribe("sse") as queue:
+        yield sse_message("snapshot", broadcaster.snapshot_message(), broadcaster.aggregator.version)
+        while True:
+            try:
+                event = await asyncio.wait_for(queue.get(), timeout=keepalive)
+            except asyncio.TimeoutError:
+                # Comment line; keeps proxies from closing an idle connection
+                yield b": keepalive\n\n"
+                continue
+            if event is RESYNC:
+                yield sse_message("snapshot", broadcaster.snapshot_message(), broadcaster.aggregator.version)
+            else:
+                yield sse_message("update", json.dumps(event).encode(), event["version"])
+
+
+broadcaster = Broadcaster(live_scores)
+REGISTRY.add_collector(broadcaster.metrics.prometheus_lines)
@@ -1,8 +1,15 @@
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import Response
 from app.core.config import settings
 from app.api.v1.api import api_router
+from app.db.redis import redis_client
 from app.db.session import init_db
+from app.live_scores import live_scores
+from app.live_stream import broadcaster
+from app.metrics import CONTENT_TYPE, REGISTRY
+from app.profiling import ProfilingMiddleware
+from app.thumbnails import thumbnails
 
 app = FastAPI(title=settings.PROJECT_NAME, openapi_url=f"{settings.API_V1_STR}/openapi.json")
 
@@ -13,14 +20,30 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor", "Server-Timing"],
 )
+# Outermost, so latency covers the whole stack
+app.add_middleware(ProfilingMiddleware)
 
 app.include_router(api_router, prefix=settings.API_V1_STR)
 
 @app.on_event("startup")
 async def on_startup():
     await init_db()
+    await broadcaster.start()
+    await live_scores.start()
+
+@app.on_event("shutdown")
+async def on_shutdown():
+    await live_scores.stop()
+    await broadcaster.stop()
+    await thumbnails.aclose()
 
 @app.get("/")
 def root():
     return {"message": "Welcome to Ground India API"}
+
+@app.get("/metrics", include_in_schema=False)
+async def metrics():
+    """Prometheus scrape endpoint: ingestion metrics from every worker plus this process's stream metrics."""
+    return Response(await REGISTRY.collect(redis_client), media_type=CONTENT_TYPE)
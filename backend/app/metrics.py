@@ -0,0 +1,217 @@
+"""
+Prometheus metrics shared between the Celery workers and the API.
+
+Ingestion runs in worker processes but /metrics is served by the API, so
+samples are kept in Redis: one hash per metric, one field per sample.
+Instrumented code only updates a dict in its own process; flush() writes
+the accumulated updates in one pipeline (once per feed fetch) and collect()
+renders every registered metric in the Prometheus text format. Without
+Redis the samples stay in the process, which is what tests use.
+
+Values that only make sense per process (e.g. open stream connections) are
+added at collect time by collectors instead of being stored.
+"""
+import logging
+from abc import ABC, abstractmethod
+from collections import defaultdict
+from typing import Callable, Dict, Iterable, List, Mapping, Sequence, Tuple
+
+from redis.exceptions import RedisError
+
+logger = logging.getLogger(__name__)
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+
+def format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return str(int(value)) if float(value).is_integer() else repr(float(value))
+
+
+def format_labels(labels: Mapping[str, object]) -> str:
+    """name="value" pairs, comma separated, escaped for the text format."""
+    return ",".join(
+        '%s="%s"' % (name, str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n"))
+        for name, value in labels.items()
+    )
+
+
+class Metric(ABC):
+    kind = ""
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (), registry: "MetricsRegistry" = None):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.registry = registry if registry is not None else REGISTRY
+        self.registry.register(self)
+
+    def _labels(self, labels: Mapping[str, object]) -> str:
+        if set(labels) != set(self.labelnames):
+            raise ValueError(f"{self.name} takes labels {self.labelnames}, got {tuple(labels)}")
+        return format_labels({name: labels[name] for name in self.labelnames})
+
+    @abstractmethod
+    def render(self, labels: str, samples: Mapping[str, float]) -> List[str]:
+        """Exposition lines for one label set, from its stored {field: value} samples."""
+
+
+class Counter(Metric):
+    kind = "counter"
+
+    def inc(self, amount: float = 1, **labels) -> None:
+        self.registry.increment(self.name, f"total|{self._labels(labels)}", amount)
+
+    def render(self, labels: str, samples: Mapping[str, float]) -> List[str]:
+        braces = "{%s}" % labels if labels else ""
+        return [f"{self.name}_total{braces} {format_value(samples.get('total', 0))}"]
+
+
+class Gauge(Metric):
+    kind = "gauge"
+
+    def set(self, value: float, **labels) -> None:
+        self.registry.put(self.name, f"value|{self._labels(labels)}", value)
+
+    def render(self, labels: str, samples: Mapping[str, float]) -> List[str]:
+        braces = "{%s}" % labels if labels else ""
+        return [f"{self.name}{braces} {format_value(samples.get('value', 0))}"]
+
+
+class Histogram(Metric):
+    kind = "histogram"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (), buckets: Sequence[float] = DEFAULT_BUCKETS,
+                 registry: "MetricsRegistry" = None):
+        self.buckets = tuple(sorted(buckets)) + (float("inf"),)
+        super().__init__(name, documentation, labelnames, registry)
+
+    def observe(self, value: float, **labels) -> None:
+        key = self._labels(labels)
+        registry = self.registry
+        for bound in self.buckets:
+            if value <= bound:
+                registry.increment(self.name, f"bucket:{format_value(bound)}|{key}", 1)
+        registry.increment(self.name, f"sum|{key}", value)
+        registry.increment(self.name, f"count|{key}", 1)
+
+    def render(self, labels: str, samples: Mapping[str, float]) -> List[str]:
+        prefix = labels + "," if labels else ""
+        braces = "{%s}" % labels if labels else ""
+        # observe() counts a value in every bucket it fits, so the stored counts are already cumulative
+        lines = [
+            f'{self.name}_bucket{{{prefix}le="{format_value(bound)}"}} {format_value(samples.get(f"bucket:{format_value(bound)}", 0))}'
+            for bound in self.buckets
+        ]
+        lines.append(f"{self.name}_sum{braces} {format_value(samples.get('sum', 0))}")
+        lines.append(f"{self.name}_count{braces} {format_value(samples.get('count', 0))}")
+        return lines
+
+
+class MetricsRegistry:
+    """
+    Registered metrics, this process's unflushed updates, and (without
+    Redis) the flushed values themselves.
+    """
+
+    def __init__(self, prefix: str = "metrics:"):
+        self.prefix = prefix
+        self._metrics: Dict[str, Metric] = {}
+        self._collectors: List[Callable[[], Iterable[str]]] = []
+        self._increments: Dict[Tuple[str, str], float] = defaultdict(float)
+        self._values: Dict[Tuple[str, str], float] = {}
+        self._local: Dict[str, Dict[str, float]] = defaultdict(dict)
+
+    def register(self, metric: Metric) -> None:
+        if metric.name in self._metrics:
+            raise ValueError(f"Metric {metric.name} is already registered")
+        self._metrics[metric.name] = metric
+
+    def add_collector(self, collector: Callable[[], Iterable[str]]) -> None:
+        """Add a callable returning extra exposition lines, rendered as they are."""
+        self._collectors.append(collector)
+
+    def increment(self, name: str, field: str, amount: float) -> None:
+        self._increments[(name, field)] += amount
+
+    def put(self, name: str, field: str, value: float) -> None:
+        self._values[(name, field)] = value
+
+    async def flush(self, redis=None) -> None:
+        """Write the updates accumulated since the last flush."""
+        increments, values = self._increments, self._values
+        if not increments and not values:
+            return
+        self._increments, self._values = defaultdict(float), {}
+        if redis is None:
+            for (name, field), amount in increments.items():
+                self._local[name][field] = self._local[name].get(field, 0) + amount
+            for (name, field), value in values.items():
+                self._local[name][field] = value
+            return
+        pipeline = redis.pipeline(transaction=False)
+        for (name, field), amount in increments.items():
+            pipeline.hincrbyfloat(self.prefix + name, field, amount)
+        for (name, field), value in values.items():
+            pipeline.hset(self.prefix + name, field, value)
+        try:
+            await pipeline.execute()
+        except RedisError as e:
+            logger.warning("Could not flush metrics, keeping them for the next flush: %r", e)
+            for key, amount in increments.items():
+                self._increments[key] += amount
+            for key, value in values.items():
+                self._values.setdefault(key, value)
+
+    async def collect(self, redis=None) -> str:
+        """Every registered metric, plus collector output, in the Prometheus text format."""
+        await self.flush(redis)
+        stored: Dict[str, Dict[str, float]] = {name: dict(fields) for name, fields in self._local.items()}
+        if redis is not None:
+            names = list(self._metrics)
+            pipeline = redis.pipeline(transaction=False)
+            for name in names:
+                pipeline.hgetall(self.prefix + name)
+            try:
+                for name, fields in zip(names, await pipeline.execute()):
+                    for field, value in fields.items():
+                        stored.setdefault(name, {})[field] = float(value)
+            except RedisError as e:
+                logger.warning("Could not read metrics from Redis: %r", e)
+
+        lines = []
+        for name, metric in self._metrics.items():
+            lines.append(f"# HELP {name} {metric.documentation}")
+            lines.append(f"# TYPE {name} {metric.kind}")
+            by_labels: Dict[str, Dict[str, float]] = defaultdict(dict)
+            for field, value in stored.get(name, {}).items():
+                sample, _, labels = field.partition("|")
+                by_labels[labels][sample] = value
+            for labels in sorted(by_labels):
+                lines.extend(metric.render(labels, by_labels[labels]))
+        for collector in self._collectors:
+            lines.extend(collector())
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = MetricsRegistry()
+
+# Ingestion, per source (app.tasks)
+FEED_FETCHES = Counter("ingest_feed_fetches", "Feed fetches by result (ok, not_modified, error).", ["source", "result"])
+FEED_INGEST_ERRORS = Counter("ingest_feed_errors", "Fetched feeds that then failed to parse or store.", ["source"])
+FEED_FETCH_SECONDS = Histogram("ingest_feed_fetch_seconds", "Time to download a feed.", ["source"])
+FEED_BYTES = Counter("ingest_feed_bytes", "Feed bytes downloaded.", ["source"])
+ENTRIES_PARSED = Counter("ingest_entries_parsed", "Feed entries parsed.", ["source"])
+ARTICLES_INSERTED = Counter("ingest_articles_inserted", "New articles stored.", ["source"])
+ARTICLES_DUPLICATE = Counter("ingest_articles_duplicate", "Entries skipped as already known or stored.", ["source"])
+ENTRIES_FAILED = Counter("ingest_entries_failed", "Entries that could not be turned into articles.", ["source"])
+ENRICHMENT_SECONDS = Histogram("ingest_enrichment_seconds", "Categorisation and bias scoring time per feed.", ["source"])
+DB_WRITE_SECONDS = Histogram("ingest_db_write_seconds", "Insert, rollup, clustering and commit time per feed.", ["source"])
+PUBLISH_LAG_SECONDS = Histogram(
+    "ingest_publish_lag_seconds", "Time from publication to ingestion of new articles.", ["source"],
+    buckets=(60, 120, 300, 600, 1200, 1800, 3600, 7200, 21600, 86400),
+)
+FETCH_INTERVAL_SECONDS = Gauge("ingest_fetch_interval_seconds", "Current adaptive fetch interval.", ["source"])
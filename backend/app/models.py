@@ -1,5 +1,6 @@
-from datetime import datetime
-from typing import Optional, List
+from datetime import date, datetime
+from typing import Dict, Optional, List
+from sqlalchemy import JSON, Column, Index, LargeBinary
 from sqlmodel import SQLModel, Field, Relationship
 
 class SourceBase(SQLModel):
@@ -13,6 +14,14 @@ class SourceBase(SQLModel):
 
 class Source(SourceBase, table=True):
     id: Optional[int] = Field(default=None, primary_key=True)
+    # HTTP validators from the last successful feed fetch (conditional GET)
+    etag: Optional[str] = None
+    last_modified: Optional[str] = None
+    # Adaptive fetch schedule (see app.scheduling); a NULL next_fetch_at is due now
+    next_fetch_at: Optional[datetime] = Field(default=None, index=True)
+    fetch_interval: Optional[float] = None  # seconds
+    last_fetched_at: Optional[datetime] = None
+    fetch_failures: int = 0
     articles: List["Article"] = Relationship(back_populates="source")
 
 class ArticleBase(SQLModel):
@@ -26,9 +35,51 @@ class ArticleBase(SQLModel):
     source_id: Optional[int] = Field(default=None, foreign_key="source.id")
 
 class Article(ArticleBase, table=True):
+    # Composite indexes backing keyset pagination, optionally narrowed by category or source
+    __table_args__ = (
+        Index("ix_article_published_at_id", "published_at", "id"),
+        Index("ix_article_category_published_at_id", "category", "published_at", "id"),
+        Index("ix_article_source_id_published_at_id", "source_id", "published_at", "id"),
+    )
+
     id: Optional[int] = Field(default=None, primary_key=True)
+    # Internal bookkeeping below, not part of ArticleRead
+    bias_lexicon_version: Optional[str] = Field(default=None, index=True)  # lexicon bias_score was computed with
+    story_id: Optional[int] = Field(default=None, foreign_key="story.id", index=True)  # cross-source story cluster
+    # MinHash signature of the title and summary, used to rebuild the story index after a restart
+    minhash: Optional[bytes] = Field(default=None, sa_column=Column(LargeBinary))
     source: Optional[Source] = Relationship(back_populates="articles")
 
+class Story(SQLModel, table=True):
+    """A news story: articles from any number of sources that cover the same event."""
+    id: Optional[int] = Field(default=None, primary_key=True)
+    title: str  # headline of the first article in the story
+    first_published_at: datetime
+    last_published_at: datetime = Field(index=True)
+    article_count: int = 0
+    source_count: int = 0
+    created_at: datetime = Field(default_factory=datetime.utcnow)
+
+class ArticleTerm(SQLModel, table=True):
+    """Term index: which bias-lexicon terms each article matched when it was scored."""
+    article_id: int = Field(foreign_key="article.id", primary_key=True)
+    term: str = Field(primary_key=True, index=True)
+
+class BiasLexicon(SQLModel, table=True):
+    """Snapshot of each bias lexicon version, so later versions can be diffed against it."""
+    version: str = Field(primary_key=True)
+    terms: Dict[str, List[str]] = Field(sa_column=Column(JSON, nullable=False))
+    created_at: datetime = Field(default_factory=datetime.utcnow)
+
+class BiasRollup(SQLModel, table=True):
+    """Article count and bias score sum per publication day, source, category and bias label."""
+    day: date = Field(primary_key=True)
+    source_id: int = Field(primary_key=True)  # 0 for articles without a source
+    category: str = Field(primary_key=True)
+    label: str = Field(primary_key=True)  # get_bias_label() of the article's bias_score
+    article_count: int = 0
+    bias_score_sum: float = 0.0
+
 class UserBase(SQLModel):
     email: str = Field(unique=True, index=True)
     is_active: bool = True
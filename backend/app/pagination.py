@@ -0,0 +1,28 @@
+"""
+Opaque keyset cursors for paginating articles by (published_at, id).
+
+A cursor encodes the sort key of the last row on a page; the next page starts
+strictly after it, so every page costs one index range scan no matter how deep
+it is, and rows inserted meanwhile never shift later pages.
+"""
+import base64
+from datetime import datetime
+from typing import Tuple
+
+
+class InvalidCursor(ValueError):
+    pass
+
+
+def encode_cursor(published_at: datetime, article_id: int) -> str:
+    raw = f"{published_at.isoformat()}|{article_id}".encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Tuple[datetime, int]:
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode()
+        published_at, article_id = raw.rsplit("|", 1)
+        return datetime.fromisoformat(published_at), int(article_id)
+    except (ValueError, UnicodeDecodeError) as e:
+        raise InvalidCursor(f"Invalid cursor: {cursor!r}") from e
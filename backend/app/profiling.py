@@ -0,0 +1,160 @@
+"""
+Per-request profiling.
+
+ProfilingMiddleware times every HTTP request and, through SQLAlchemy engine
+events, counts the SQL statements it runs and the time spent in them. Per
+route it records latency, statement count, DB time and response size as
+Prometheus histograms (app.metrics), logs requests slower than
+SLOW_REQUEST_MS (except streamed responses, which have no Content-Length),
+and with SERVER_TIMING_ENABLED adds a Server-Timing header that browser dev
+tools show next to the request.
+
+Statements are also counted by SQL text, so a request that runs the same
+statement SQL_REPEAT_WARN_THRESHOLD times or more (the N+1 pattern) is
+logged with that statement, even when it is not slow.
+"""
+import logging
+import time
+from collections import Counter as Tally
+from contextvars import ContextVar
+from typing import Dict, Optional
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from app.core.config import settings
+from app.core.log import log_event
+from app.metrics import Histogram
+
+logger = logging.getLogger(__name__)
+
+REQUEST_SECONDS = Histogram("http_request_duration_seconds", "Request latency.", ["method", "route", "status"])
+REQUEST_SQL_STATEMENTS = Histogram(
+    "http_request_sql_statements", "SQL statements run per request.", ["route"], buckets=(0, 1, 2, 3, 5, 10, 20, 50),
+)
+REQUEST_DB_SECONDS = Histogram("http_request_db_seconds", "Time spent in SQL per request.", ["route"])
+RESPONSE_BYTES = Histogram(
+    "http_response_size_bytes", "Response body size.", ["route"], buckets=(256, 1024, 4096, 16384, 65536, 262144, 1048576),
+)
+
+
+class RequestStats:
+    """SQL accounting for the request being handled."""
+
+    __slots__ = ("statements", "db_seconds", "by_sql")
+
+    def __init__(self):
+        self.statements = 0
+        self.db_seconds = 0.0
+        self.by_sql: Dict[str, int] = Tally()
+
+    def most_repeated(self):
+        """(sql, count) of the statement run most often, or (None, 0)."""
+        if not self.by_sql:
+            return None, 0
+        return max(self.by_sql.items(), key=lambda item: item[1])
+
+
+_current: ContextVar[Optional[RequestStats]] = ContextVar("request_stats", default=None)
+
+
+def current_stats() -> Optional[RequestStats]:
+    return _current.get()
+
+
+# Registered on the Engine class, so every engine (primary, replica, worker) is covered.
+# SQLAlchemy runs these inside the greenlet of the awaiting task, which shares its context.
+@event.listens_for(Engine, "before_cursor_execute")
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if _current.get() is not None:
+        conn.info.setdefault("profiling_started", []).append(time.perf_counter())
+
+
+@event.listens_for(Engine, "after_cursor_execute")
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    stats = _current.get()
+    started = conn.info.get("profiling_started")
+    if stats is None or not started:
+        return
+    stats.statements += 1
+    stats.db_seconds += time.perf_counter() - started.pop()
+    stats.by_sql[statement] += 1
+
+
+class ProfilingMiddleware:
+    """ASGI middleware; streaming responses pass through untouched."""
+
+    def __init__(
+        self,
+        app,
+        slow_request_ms: float = settings.SLOW_REQUEST_MS,
+        server_timing: bool = settings.SERVER_TIMING_ENABLED,
+        repeat_threshold: int = settings.SQL_REPEAT_WARN_THRESHOLD,
+    ):
+        self.app = app
+        self.slow_request_ms = slow_request_ms
+        self.server_timing = server_timing
+        self.repeat_threshold = repeat_threshold
+        self._routes: Dict[object, str] = {}
+
+    def _route(self, scope) -> str:
+        """Path template of the matched route, e.g. /api/v1/articles/{article_id}."""
+        endpoint = scope.get("endpoint")
+        if endpoint is None:
+            return "unmatched"
+        route = self._routes.get(endpoint)
+        if route is None:
+            route = next(
+                (r.path for r in getattr(scope.get("app"), "routes", []) if getattr(r, "endpoint", None) is endpoint),
+                getattr(endpoint, "__name__", "unknown"),
+            )
+            self._routes[endpoint] = route
+        return route
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        stats = RequestStats()
+        token = _current.set(stats)
+        started = time.perf_counter()
+        response = {"status": 500, "bytes": 0, "streaming": False}
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                response["status"] = message["status"]
+                headers = list(message.get("headers", []))
+                # Streamed bodies (SSE, exports) have no Content-Length and last as long as the client reads
+                response["streaming"] = not any(name == b"content-length" for name, _ in headers)
+                if self.server_timing:
+                    elapsed = (time.perf_counter() - started) * 1000
+                    timing = 'db;dur=%.1f;desc="%d queries", app;dur=%.1f' % (stats.db_seconds * 1000, stats.statements, elapsed)
+                    message = {**message, "headers": headers + [(b"server-timing", timing.encode())]}
+            elif message["type"] == "http.response.body":
+                response["bytes"] += len(message.get("body", b""))
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            _current.reset(token)
+            self._record(scope, stats, time.perf_counter() - started, response)
+
+    def _record(self, scope, stats: RequestStats, elapsed: float, response: dict) -> None:
+        route = self._route(scope)
+        REQUEST_SECONDS.observe(elapsed, method=scope["method"], route=route, status=response["status"])
+        REQUEST_SQL_STATEMENTS.observe(stats.statements, route=route)
+        REQUEST_DB_SECONDS.observe(stats.db_seconds, route=route)
+        RESPONSE_BYTES.observe(response["bytes"], route=route)
+
+        sql, repeats = stats.most_repeated()
+        fields = dict(
+            method=scope["method"], route=route, path=scope["path"], status=response["status"],
+            duration_ms=round(elapsed * 1000, 1), sql_statements=stats.statements,
+            db_ms=round(stats.db_seconds * 1000, 1), response_bytes=response["bytes"],
+        )
+        if elapsed * 1000 >= self.slow_request_ms and not response["streaming"]:
+            log_event(logger, "slow_request", logging.WARNING, most_repeated_sql=sql and sql[:300], repeats=repeats, **fields)
+        elif repeats >= self.repeat_threshold:
+            log_event(logger, "repeated_sql", logging.WARNING, sql=sql[:300], repeats=repeats, **fields)
@@ -0,0 +1,225 @@
+"""
+Targeted rescoring of stored articles after the bias lexicon changes.
+
+Every article records the lexicon version its bias_score was computed with,
+and every lexicon version is snapshotted in the biaslexicon table. When the
+keywords in app.bias_analyzer change, the old and new snapshots are diffed and
+only articles that can be affected are rescored:
+
+- articles that matched a removed or regrouped term, found through the
+  articleterm index;
+- articles whose text contains a newly added term. The term index only holds
+  terms of the lexicon an article was scored with, so these are found through
+  the GIN-indexed search_vector on PostgreSQL (a case-insensitive substring
+  scan elsewhere) and then confirmed by the matcher.
+
+Every other article keeps its score and just has its version bumped in a
+single UPDATE. Articles with no known lexicon version are rescored in full.
+Scoring runs in chunks across a process pool, under the same lock as rollup
+rebuilds (analytics.bias_score_lock).
+"""
+import asyncio
+import os
+from concurrent.futures import Executor, ProcessPoolExecutor
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Set, Tuple
+
+from sqlalchemy import and_, func, or_, update
+from sqlalchemy.future import select
+
+from app.bias_analyzer import (
+    LEXICON_VERSION, bias_terms, calculate_bias_scores, lexicon_terms, match_keywords,
+)
+from app.analytics import apply_rollup_deltas, bias_score_lock, rescore_deltas
+from app.cache import response_cache
+from app.core.config import settings
+from app.crud import get_bias_lexicon, replace_article_terms, save_bias_lexicon
+from app.db.session import async_session
+from app.keyword_matcher import tokenize
+from app.models import Article, ArticleTerm
+from app.search import search_config, search_vector
+
+
+@dataclass
+class RescoreReport:
+    version: str
+    rescored: int = 0
+    changed: int = 0
+    relabelled: int = 0
+
+
+def _term_groups(terms: Dict[str, List[str]]) -> Dict[str, Set[str]]:
+    groups: Dict[str, Set[str]] = {}
+    for group, group_terms in terms.items():
+        for term in group_terms:
+            groups.setdefault(term, set()).add(group)
+    return groups
+
+
+def diff_lexicons(old: Dict[str, List[str]], new: Dict[str, List[str]]) -> Tuple[Set[str], Set[str]]:
+    """
+    Compare two lexicon snapshots.
+
+    Returns:
+        (stale, added): terms of the old lexicon that were removed or moved to
+        different groups, and terms that only exist in the new lexicon.
+    """
+    old_groups = _term_groups(old)
+    new_groups = _term_groups(new)
+    stale = {term for term, groups in old_groups.items() if new_groups.get(term) != groups}
+    added = {term for term in new_groups if term not in old_groups}
+    return stale, added
+
+
+def _score_chunk(texts: List[Tuple[str, str]]) -> List[Tuple[float, List[str]]]:
+    """Process-pool worker: bias score and matched lexicon terms for each (title, summary)."""
+    matches = [match_keywords(title, summary) for title, summary in texts]
+    scores = calculate_bias_scores(texts, matches=matches)
+    return [(score, sorted(bias_terms(article_matches))) for score, article_matches in zip(scores, matches)]
+
+
+def _added_term_condition(term: str, dialect_name: str):
+    words = tokenize(term)
+    if not words:
+        # The matcher only finds words, so a term without any can never match
+        return None
+    # Any text containing the term contains its longest word, so this never misses a candidate
+    text = func.lower(func.coalesce(Article.title, "") + " " + func.coalesce(Article.summary, ""))
+    substring = text.contains(max(words, key=len), autoescape=True)
+    if dialect_name != "postgresql":
+        return substring
+    # Every word of the term, stemmed the same way as the indexed text
+    ts_query = func.plainto_tsquery(search_config, " ".join(words))
+    # Stop words are not indexed; a term made only of them falls back to the substring scan
+    return or_(search_vector.op("@@")(ts_query), and_(func.numnode(ts_query) == 0, substring))
+
+
+def _candidate_filter(stale: Set[str], added: Set[str], dialect_name: str):
+    conditions = []
+    if stale:
+        conditions.append(
+            Article.id.in_(select(ArticleTerm.article_id).where(ArticleTerm.term.in_(sorted(stale))))
+        )
+    for term in sorted(added):
+        condition = _added_term_condition(term, dialect_name)
+        if condition is not None:
+            conditions.append(condition)
+    return or_(*conditions) if conditions else None
+
+
+async def _rescore(condition, pool: Optional[Executor], workers: int, chunk_size: int, report: RescoreReport) -> None:
+    loop = asyncio.get_running_loop()
+    last_id = 0
+    while True:
+        async with async_session() as session:
+            result = await session.execute(
+                select(
+                    Article.id, Article.title, Article.summary, Article.bias_score,
+                    Article.published_at, Article.source_id, Article.category,
+                )
+                .where(condition, Article.id > last_id)
+                .order_by(Article.id)
+                .limit(chunk_size * workers)
+            )
+            rows = result.all()
+        if not rows:
+            return
+        last_id = rows[-1].id
+
+        chunks = [rows[start:start + chunk_size] for start in range(0, len(rows), chunk_size)]
+        texts = [[(row.title, row.summary or "") for row in chunk] for chunk in chunks]
+        if pool is None:
+            scored = [_score_chunk(chunk_texts) for chunk_texts in texts]
+        else:
+            scored = await asyncio.gather(*(loop.run_in_executor(pool, _score_chunk, chunk_texts) for chunk_texts in texts))
+        results = [item for chunk_results in scored for item in chunk_results]
+
+        async with async_session() as session:
+            await session.execute(
+                update(Article),
+                [
+                    {"id": row.id, "bias_score": score, "bias_lexicon_version": LEXICON_VERSION}
+                    for row, (score, _) in zip(rows, results)
+                ],
+            )
+            await replace_article_terms(session, {row.id: terms for row, (_, terms) in zip(rows, results)})
+            # Move changed articles between bias rollup rows in the same transaction
+            await apply_rollup_deltas(session, rescore_deltas(
+                (row, score) for row, (score, _) in zip(rows, results) if score != row.bias_score
+            ))
+            await session.commit()
+
+        report.rescored += len(rows)
+        report.changed += sum(1 for row, (score, _) in zip(rows, results) if score != row.bias_score)
+
+
+async def rescore_stale_articles(
+    chunk_size: int = settings.RESCORE_CHUNK_SIZE, workers: Optional[int] = settings.RESCORE_WORKERS
+) -> RescoreReport:
+    """
+    Bring every article's bias_score up to the current LEXICON_VERSION.
+
+    Args:
+        chunk_size: Articles scored per worker task
+        workers: Process pool size; defaults to the CPU count, 1 scores in-process
+    """
+    # A rollup rebuild running meanwhile would write back the scores it scanned
+    async with async_session() as lock_session, bias_score_lock(lock_session):
+        return await _rescore_stale_articles(chunk_size, workers)
+
+
+async def _rescore_stale_articles(chunk_size: int, workers: Optional[int]) -> RescoreReport:
+    workers = workers or os.cpu_count() or 1
+    current_terms = lexicon_terms()
+    report = RescoreReport(version=LEXICON_VERSION)
+
+    async with async_session() as session:
+        dialect_name = session.get_bind().dialect.name
+        await save_bias_lexicon(session, LEXICON_VERSION, current_terms)
+        result = await session.execute(
+            select(Article.bias_lexicon_version)
+            .where(or_(Article.bias_lexicon_version != LEXICON_VERSION, Article.bias_lexicon_version.is_(None)))
+            .distinct()
+        )
+        old_versions = result.scalars().all()
+    if not old_versions:
+        return report
+
+    pool = ProcessPoolExecutor(max_workers=workers) if workers > 1 else None
+    try:
+        for old_version in old_versions:
+            if old_version is None:
+                version_filter = Article.bias_lexicon_version.is_(None)
+            else:
+                version_filter = Article.bias_lexicon_version == old_version
+
+            old_lexicon = None
+            if old_version is not None:
+                async with async_session() as session:
+                    old_lexicon = await get_bias_lexicon(session, old_version)
+
+            if old_lexicon is None:
+                # No snapshot to diff against: every article of this version is a candidate
+                candidates = version_filter
+            else:
+                stale, added = diff_lexicons(old_lexicon.terms, current_terms)
+                term_filter = _candidate_filter(stale, added, dialect_name)
+                candidates = and_(version_filter, term_filter) if term_filter is not None else None
+
+            if candidates is not None:
+                await _rescore(candidates, pool, workers, chunk_size, report)
+
+            # Whatever is left could not have been affected by the change
+            async with async_session() as session:
+                result = await session.execute(
+                    update(Article).where(version_filter).values(bias_lexicon_version=LEXICON_VERSION)
+                )
+                report.relabelled += result.rowcount
+                await session.commit()
+    finally:
+        if pool is not None:
+            pool.shutdown()
+
+    if report.changed:
+        await response_cache.bump_version()
+    return report
@@ -0,0 +1,101 @@
+"""
+Per-source adaptive fetch scheduling.
+
+Every source carries its own next_fetch_at. A dispatcher task runs every
+FEED_DISPATCH_INTERVAL seconds, claims the sources that are due and enqueues
+one fetch task per source, so a slow feed only delays itself.
+
+After each fetch the interval is recomputed from the source's publish rate:
+the average gap between the most recent entries of its feed, smoothed with
+the previous interval. Fetches that bring nothing new back the interval off
+by FEED_EMPTY_BACKOFF, failed ones by FEED_FAILURE_BACKOFF, and the result is
+clamped to [FEED_MIN_INTERVAL, FEED_MAX_INTERVAL]. A busy wire service ends
+up polled every couple of minutes, a weekly feed a few times a day.
+"""
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
+from typing import List, Optional, Sequence
+
+from sqlalchemy import or_, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.models import Source
+
+# Entries of a feed used to estimate its publish rate
+RATE_SAMPLE_SIZE = 20
+
+
+@dataclass
+class FetchOutcome:
+    """What a single feed fetch found, as far as scheduling is concerned."""
+    ok: bool = True
+    new_articles: int = 0
+    # Publication times of the entries in the feed, new or not
+    published: List[datetime] = field(default_factory=list)
+
+
+def publish_gap(published: Sequence[datetime]) -> Optional[float]:
+    """Average seconds between the most recent entries, or None with fewer than two."""
+    recent = sorted(published, reverse=True)[:RATE_SAMPLE_SIZE]
+    if len(recent) < 2:
+        return None
+    return max((recent[0] - recent[-1]).total_seconds(), 0.0) / (len(recent) - 1)
+
+
+def next_interval(current: Optional[float], outcome: FetchOutcome) -> float:
+    """Seconds until the next fetch of a source whose last interval was current."""
+    current = current or settings.FEED_DEFAULT_INTERVAL
+    if not outcome.ok:
+        interval = current * settings.FEED_FAILURE_BACKOFF
+    elif not outcome.new_articles:
+        interval = current * settings.FEED_EMPTY_BACKOFF
+    else:
+        gap = publish_gap(outcome.published)
+        if gap is None:
+            interval = current
+        else:
+            # Aim for about one new entry per fetch
+            weight = settings.FEED_INTERVAL_SMOOTHING
+            interval = weight * gap + (1 - weight) * current
+    return min(max(interval, settings.FEED_MIN_INTERVAL), settings.FEED_MAX_INTERVAL)
+
+
+async def claim_due_sources(session: AsyncSession, now: Optional[datetime] = None) -> List[int]:
+    """
+    Ids of active sources due for a fetch, pushing their next_fetch_at out by
+    FEED_DISPATCH_LEASE so the next dispatcher run does not enqueue them again.
+    The lease expires by itself if the fetch task is lost. Commits.
+    """
+    now = now or datetime.utcnow()
+    result = await session.execute(
+        update(Source)
+        .where(
+            Source.is_active.is_(True),
+            Source.feed_url.is_not(None),
+            or_(Source.next_fetch_at.is_(None), Source.next_fetch_at <= now),
+        )
+        .values(next_fetch_at=now + timedelta(seconds=settings.FEED_DISPATCH_LEASE))
+        .returning(Source.id)
+    )
+    source_ids = sorted(result.scalars().all())
+    await session.commit()
+    return source_ids
+
+
+async def record_fetch(session: AsyncSession, source: Source, outcome: FetchOutcome, now: Optional[datetime] = None) -> float:
+    """Store the outcome of a fetch and schedule the next one. Commits; returns the new interval."""
+    now = now or datetime.utcnow()
+    interval = next_interval(source.fetch_interval, outcome)
+    await session.execute(
+        update(Source)
+        .where(Source.id == source.id)
+        .values(
+            fetch_interval=interval,
+            last_fetched_at=now,
+            next_fetch_at=now + timedelta(seconds=interval),
+            fetch_failures=0 if outcome.ok else Source.fetch_failures + 1,
+        )
+    )
+    await session.commit()
+    return interval
@@ -1,21 +1,70 @@
-from typing import List, Optional
-from datetime import datetime
+from typing import Any, Dict, List, Optional, Union
+from datetime import date, datetime
 from sqlmodel import SQLModel
 from app.models import ArticleBase, SourceBase, UserBase
 
 class ArticleCreate(ArticleBase):
-    pass
+    bias_lexicon_version: Optional[str] = None  # lexicon bias_score was computed with
 
 class ArticleRead(ArticleBase):
     id: int
     source: Optional[SourceBase] = None
 
+class ArticlesWithSources(SQLModel):
+    """Article list with include=sources: each source once, articles refer to it by source_id."""
+    articles: List[Dict[str, Any]]
+    sources: List["SourceRead"]
+
+class ArticleSearchResult(ArticleRead):
+    rank: float
+    highlight: Optional[str] = None  # HTML-escaped summary excerpt with matches wrapped in <mark></mark>
+
+class StoryCoverage(SQLModel):
+    """How one source covered a story."""
+    source_id: Optional[int] = None
+    source_name: Optional[str] = None
+    article_count: int
+    avg_bias_score: float
+    bias_label: str
+
+class StoryRead(SQLModel):
+    id: int
+    title: str
+    first_published_at: datetime
+    last_published_at: datetime
+    article_count: int
+    source_count: int
+    coverage: List[StoryCoverage] = []
+
+class StoryDetail(StoryRead):
+    articles: List[ArticleRead] = []
+
+class BiasLabelStats(SQLModel):
+    count: int
+    share: float  # of the group's articles
+    avg_bias_score: Optional[float] = None
+
+class BiasGroupStats(SQLModel):
+    key: Union[int, date, str, None] = None  # source id, day or category, depending on group_by
+    name: Optional[str] = None  # source name when grouped by source
+    article_count: int
+    avg_bias_score: float
+    labels: Dict[str, BiasLabelStats]
+
+class BiasDistribution(SQLModel):
+    group_by: str
+    date_from: date
+    date_to: date
+    groups: List[BiasGroupStats]
+
 class SourceCreate(SourceBase):
     pass
 
 class SourceRead(SourceBase):
     id: int
 
+ArticlesWithSources.model_rebuild()
+
 class UserRead(UserBase):
     id: int
 
@@ -33,4 +82,15 @@ class Token(SQLModel):
     token_type: str
 
 class TokenPayload(SQLModel):
-    sub: Optional[int] = None
+    sub: Optional[str] = None
+    uid: Optional[int] = None
+    is_active: Optional[bool] = None
+    is_superuser: Optional[bool] = None
+    exp: Optional[int] = None
+
+class Principal(SQLModel):
+    """The authenticated user as seen by endpoints; built from token claims or the users table."""
+    id: int
+    email: str
+    is_active: bool = True
+    is_superuser: bool = False
@@ -0,0 +1,128 @@
+"""
+Full-text search over article titles and summaries.
+
+On PostgreSQL, article.search_vector is a stored generated tsvector column
+(title weighted above summary) with a GIN index. It is created by init_db
+rather than declared on the model so that the ORM never loads it and other
+databases can still create the schema. Queries use websearch_to_tsquery, are
+ranked with ts_rank_cd, and only the returned page gets ts_headline
+highlighting.
+
+Elsewhere (SQLite in tests) search falls back to case-insensitive LIKE on
+every query word, newest first, with highlighting done in Python.
+
+Summaries are publisher HTML, so highlights are built as escaped text with
+only the <mark></mark> tags added: ts_headline marks matches with control
+character sentinels, and the result is escaped before they are replaced.
+"""
+import html
+import re
+from typing import List, Optional, Tuple
+
+from sqlalchemy import func, literal_column, or_, text
+from sqlalchemy.ext.asyncio import AsyncConnection, AsyncSession
+from sqlalchemy.future import select
+from sqlalchemy.orm import selectinload
+
+from app.crud import apply_article_filters
+from app.models import Article
+from app.schemas import ArticleFilter
+
+SEARCH_CONFIG = "english"
+HIGHLIGHT_START = "<mark>"
+HIGHLIGHT_STOP = "</mark>"
+# Delimiters ts_headline puts around matches, replaced by the tags above after escaping
+START_SENTINEL = "\x02"
+STOP_SENTINEL = "\x03"
+HEADLINE_OPTIONS = (
+    f'StartSel="{START_SENTINEL}", StopSel="{STOP_SENTINEL}", MaxWords=35, MinWords=15, MaxFragments=2'
+)
+
+SEARCH_DDL = [
+    f"""
+    ALTER TABLE article ADD COLUMN IF NOT EXISTS search_vector tsvector
+    GENERATED ALWAYS AS (
+        setweight(to_tsvector('{SEARCH_CONFIG}', coalesce(title, '')), 'A') ||
+        setweight(to_tsvector('{SEARCH_CONFIG}', coalesce(summary, '')), 'B')
+    ) STORED
+    """,
+    "CREATE INDEX IF NOT EXISTS ix_article_search_vector ON article USING GIN (search_vector)",
+]
+
+search_vector = literal_column("article.search_vector")
+search_config = literal_column(f"'{SEARCH_CONFIG}'::regconfig")
+
+
+async def create_search_index(conn: AsyncConnection) -> None:
+    """Add the generated tsvector column and its GIN index (PostgreSQL only, idempotent)."""
+    if conn.dialect.name != "postgresql":
+        return
+    for statement in SEARCH_DDL:
+        await conn.execute(text(statement))
+
+
+def _highlight(text_value: Optional[str], words: List[str]) -> Optional[str]:
+    """text_value HTML-escaped, with every occurrence of the words wrapped in <mark></mark>."""
+    if not text_value:
+        return text_value
+    if not words:
+        return html.escape(text_value)
+    pattern = re.compile("|".join(re.escape(word) for word in words), re.IGNORECASE)
+    # Matched on the raw text, so a search for "&" does not match inside "&amp;"
+    parts = pattern.split(text_value)
+    matches = pattern.findall(text_value)
+    highlighted = [html.escape(parts[0])]
+    for match, part in zip(matches, parts[1:]):
+        highlighted.append(f"{HIGHLIGHT_START}{html.escape(match)}{HIGHLIGHT_STOP}{html.escape(part)}")
+    return "".join(highlighted)
+
+
+def _escape_headline(headline: Optional[str]) -> Optional[str]:
+    """A ts_headline result HTML-escaped, with its match sentinels turned into <mark></mark>."""
+    if not headline:
+        return headline
+    return html.escape(headline).replace(START_SENTINEL, HIGHLIGHT_START).replace(STOP_SENTINEL, HIGHLIGHT_STOP)
+
+
+async def search_articles(
+    session: AsyncSession, q: str, filters: ArticleFilter, limit: int = 20, offset: int = 0
+) -> List[Tuple[Article, float, Optional[str]]]:
+    """
+    Return (article, rank, highlight) for the best matches of `q`, narrowed by
+    the same filters as the article list.
+    """
+    if session.get_bind().dialect.name == "postgresql":
+        ts_query = func.websearch_to_tsquery(search_config, q)
+        rank = func.ts_rank_cd(search_vector, ts_query).label("rank")
+        ranked = apply_article_filters(
+            select(Article.id, rank).where(search_vector.op("@@")(ts_query)), filters
+        ).order_by(rank.desc(), Article.published_at.desc()).limit(limit).offset(offset).subquery()
+
+        # Headlines are expensive, so only compute them for the page being returned
+        headline = func.ts_headline(
+            search_config, func.coalesce(func.nullif(Article.summary, ""), Article.title), ts_query, HEADLINE_OPTIONS
+        )
+        query = (
+            select(Article, ranked.c.rank, headline)
+            .join(ranked, ranked.c.id == Article.id)
+            .options(selectinload(Article.source))
+            .order_by(ranked.c.rank.desc(), Article.published_at.desc())
+        )
+        result = await session.execute(query)
+        return [
+            (article, float(article_rank), _escape_headline(headline)) for article, article_rank, headline in result.all()
+        ]
+
+    words = [word for word in q.lower().split() if word]
+    query = apply_article_filters(select(Article).options(selectinload(Article.source)), filters)
+    for word in words:
+        query = query.where(or_(
+            func.lower(Article.title).contains(word, autoescape=True),
+            func.lower(func.coalesce(Article.summary, "")).contains(word, autoescape=True),
+        ))
+    query = query.order_by(Article.published_at.desc(), Article.id.desc()).limit(limit).offset(offset)
+    result = await session.execute(query)
+    return [
+        (article, 0.0, _highlight(article.summary or article.title, words))
+        for article in result.scalars().all()
+    ]
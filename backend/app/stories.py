@@ -0,0 +1,322 @@
+"""
+Cross-source story clustering.
+
+Each new article gets a MinHash signature over the distinct content words of
+its title and summary. The signatures of recent articles (STORY_WINDOW_DAYS)
+sit in an in-memory LSH index: the signature is cut into bands and articles
+sharing any band are candidates. The new article joins the story of its most
+similar candidate if the estimated Jaccard similarity reaches
+STORY_SIMILARITY; otherwise it starts a new story. Assignment is a few
+hundred microseconds of pure Python per article and never queries the
+database. The story rows are written in the same transaction as the batch.
+
+Signatures are stored on the article (Article.minhash) and the hash
+functions are seeded deterministically, so after a restart the index is
+rebuilt by loading the stored signatures rather than re-hashing any text.
+The index also catches up incrementally with articles stored by other worker
+processes before each batch.
+"""
+import hashlib
+import struct
+from collections import deque
+from datetime import datetime, timedelta
+from typing import Deque, Dict, Iterable, List, Optional, Sequence, Set, Tuple
+
+from sqlalchemy import distinct, func, insert, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.future import select
+
+from app.core.config import settings
+from app.keyword_matcher import tokenize
+from app.models import Article, Story
+from app.schemas import ArticleCreate
+
+Signature = Tuple[int, ...]
+
+# Large enough that a band bucket for a common word cannot blow up candidate checks
+MAX_BUCKET_SIZE = 500
+SUMMARY_WORDS = 60
+
+STOPWORDS = frozenset("""
+    a about after against all also an and any are as at be been before being between both but by
+    can could did do does during each for from had has have he her here him his how i if in into
+    is it its just last may me more most new news not now of off on one only or other our out over
+    said says she should so some than that the their them then there these they this those through
+    to too under up us very was we were what when where which while who why will with would year
+    years you your latest live today update updates report reports watch video photos
+""".split())
+
+
+def content_words(title: str, summary: Optional[str] = None) -> Set[str]:
+    """Distinct non-stopword tokens of the title and the start of the summary."""
+    words = tokenize(title)
+    if summary:
+        words += tokenize(summary)[:SUMMARY_WORDS]
+    return {word for word in words if len(word) > 1 and word not in STOPWORDS}
+
+
+class MinHasher:
+    """
+    MinHash with one SHAKE-128 digest per word.
+
+    The digest is read as num_perm independent 32-bit hashes, so a word costs
+    one hash call however many permutations there are, and the signature is
+    the element-wise minimum over the words. Digests are deterministic, so
+    stored signatures stay comparable across restarts.
+    """
+
+    def __init__(self, num_perm: int = settings.STORY_MINHASH_PERMUTATIONS):
+        self.num_perm = num_perm
+        self._format = struct.Struct(f"<{num_perm}I")
+
+    def signature(self, words: Iterable[str]) -> Signature:
+        unpack, size = self._format.unpack, self._format.size
+        vectors = [unpack(hashlib.shake_128(word.encode()).digest(size)) for word in words]
+        if not vectors:
+            return ()
+        return tuple(map(min, *vectors)) if len(vectors) > 1 else vectors[0]
+
+    def pack(self, signature: Signature) -> bytes:
+        return self._format.pack(*signature)
+
+    def unpack(self, data: bytes) -> Optional[Signature]:
+        if len(data) != self._format.size:
+            # Stored with a different number of permutations; not comparable
+            return None
+        return self._format.unpack(data)
+
+
+def similarity(a: Signature, b: Signature) -> float:
+    """Estimated Jaccard similarity of the word sets behind two signatures."""
+    return sum(x == y for x, y in zip(a, b)) / len(a)
+
+
+class StoryIndex:
+    """
+    Incremental LSH index of recent article signatures, mapping articles to stories.
+
+    Args:
+        num_perm: MinHash permutations per signature
+        bands: LSH bands; rows per band is num_perm / bands
+        threshold: Minimum estimated similarity to join an existing story
+        window_days: How far back, by publication date, articles stay indexed
+        sync_overlap: Ids below the highest one seen that sync reads again
+    """
+
+    def __init__(
+        self,
+        num_perm: int = settings.STORY_MINHASH_PERMUTATIONS,
+        bands: int = settings.STORY_LSH_BANDS,
+        threshold: float = settings.STORY_SIMILARITY,
+        window_days: int = settings.STORY_WINDOW_DAYS,
+        sync_overlap: int = settings.STORY_SYNC_ID_OVERLAP,
+    ):
+        if num_perm % bands:
+            raise ValueError("STORY_LSH_BANDS must divide STORY_MINHASH_PERMUTATIONS")
+        self.hasher = MinHasher(num_perm)
+        self.bands = bands
+        self.rows = num_perm // bands
+        self.threshold = threshold
+        self.window = timedelta(days=window_days)
+        self.sync_overlap = sync_overlap
+        self._buckets: Dict[Tuple[int, ...], Dict[int, None]] = {}
+        self._signatures: Dict[int, Signature] = {}
+        self._stories: Dict[int, int] = {}
+        self._order: Deque[Tuple[datetime, int]] = deque()
+        self._last_id = 0
+
+    def __len__(self) -> int:
+        return len(self._signatures)
+
+    def _band_keys(self, signature: Signature) -> List[Tuple[int, ...]]:
+        rows = self.rows
+        return [(band, *signature[band * rows:(band + 1) * rows]) for band in range(self.bands)]
+
+    def find(self, signature: Signature) -> Tuple[Optional[int], float]:
+        """The story of the most similar indexed article, if similar enough, and that similarity."""
+        if not signature:
+            return None, 0.0
+        candidates: Set[int] = set()
+        for key in self._band_keys(signature):
+            bucket = self._buckets.get(key)
+            if bucket:
+                candidates.update(bucket)
+        best_story, best = None, 0.0
+        for article_id in candidates:
+            score = similarity(signature, self._signatures[article_id])
+            if score > best:
+                best_story, best = self._stories[article_id], score
+        if best < self.threshold:
+            return None, best
+        return best_story, best
+
+    def add(self, article_id: int, signature: Signature, story_id: int, published_at: datetime) -> None:
+        if not signature or article_id in self._signatures:
+            return
+        self._signatures[article_id] = signature
+        self._stories[article_id] = story_id
+        self._order.append((published_at, article_id))
+        for key in self._band_keys(signature):
+            bucket = self._buckets.setdefault(key, {})
+            bucket[article_id] = None
+            if len(bucket) > MAX_BUCKET_SIZE:
+                del bucket[next(iter(bucket))]
+
+    def discard(self, article_ids: Iterable[int]) -> None:
+        """Drop articles again, e.g. when the transaction that assigned them rolled back."""
+        for article_id in article_ids:
+            signature = self._signatures.pop(article_id, None)
+            self._stories.pop(article_id, None)
+            if signature is not None:
+                self._remove_from_buckets(article_id, signature)
+
+    def _remove_from_buckets(self, article_id: int, signature: Signature) -> None:
+        for key in self._band_keys(signature):
+            bucket = self._buckets.get(key)
+            if bucket is not None:
+                bucket.pop(article_id, None)
+                if not bucket:
+                    del self._buckets[key]
+
+    def prune(self, now: Optional[datetime] = None) -> None:
+        """Forget articles published before the window."""
+        cutoff = (now or datetime.utcnow()) - self.window
+        while self._order and self._order[0][0] < cutoff:
+            _, article_id = self._order.popleft()
+            signature = self._signatures.pop(article_id, None)
+            self._stories.pop(article_id, None)
+            if signature is not None:
+                self._remove_from_buckets(article_id, signature)
+
+    async def sync(self, session: AsyncSession, batch_size: int = 5000) -> int:
+        """
+        Load stored signatures of articles not seen yet (all recent ones on the
+        first call), e.g. those clustered by other worker processes.
+
+        Ids are allocated when a row is inserted but become visible when its
+        transaction commits, so a worker's batch can appear after higher ids
+        have already been read. Each sync therefore re-reads the last
+        sync_overlap ids below the highest one seen, skipping known articles.
+        """
+        cutoff = datetime.utcnow() - self.window
+        query = (
+            select(Article.id, Article.minhash, Article.story_id, Article.published_at)
+            .where(
+                Article.id > self._last_id - self.sync_overlap,
+                Article.published_at >= cutoff,
+                Article.minhash.is_not(None),
+                Article.story_id.is_not(None),
+            )
+            .order_by(Article.id)
+            .execution_options(yield_per=batch_size)
+        )
+        loaded = 0
+        result = await session.stream(query)
+        async for article_id, minhash, story_id, published_at in result:
+            self._last_id = max(self._last_id, article_id)
+            if article_id in self._signatures:
+                continue
+            signature = self.hasher.unpack(minhash)
+            if signature is not None:
+                self.add(article_id, signature, story_id, published_at)
+                loaded += 1
+        self.prune()
+        return loaded
+
+    async def assign(self, session: AsyncSession, articles: Sequence[Tuple[int, ArticleCreate]]) -> Dict[int, int]:
+        """
+        Cluster newly inserted (article_id, article) pairs into stories, without committing.
+
+        Creates Story rows for articles that start a new story, sets story_id
+        and minhash on the articles and refreshes the touched stories' counts.
+
+        Returns:
+            {article_id: story_id}
+        """
+        if not articles:
+            return {}
+        try:
+            return await self._assign(session, articles)
+        except BaseException:
+            self.discard(article_id for article_id, _ in articles)
+            raise
+
+    async def _assign(self, session: AsyncSession, articles: Sequence[Tuple[int, ArticleCreate]]) -> Dict[int, int]:
+        new_stories: List[dict] = []
+        assigned: List[Tuple[int, Signature, int, datetime]] = []
+        # Articles of stories this batch starts, keyed by stand-in ids until the story rows exist.
+        # They stay out of the shared index until then: other batches being assigned concurrently
+        # (e.g. other sources in the same fetch cycle) must never see a stand-in id.
+        pending = StoryIndex(self.hasher.num_perm, self.bands, self.threshold)
+        for article_id, article in articles:
+            signature = self.hasher.signature(content_words(article.title, article.summary))
+            story_id, score = self.find(signature)
+            pending_id, pending_score = pending.find(signature)
+            if pending_id is not None and (story_id is None or pending_score > score):
+                story_id = pending_id
+            if story_id is None:
+                new_stories.append({
+                    "title": article.title,
+                    "first_published_at": article.published_at,
+                    "last_published_at": article.published_at,
+                })
+                story_id = -len(new_stories)
+            if story_id < 0:
+                pending.add(article_id, signature, story_id, article.published_at)
+            else:
+                self.add(article_id, signature, story_id, article.published_at)
+            assigned.append((article_id, signature, story_id, article.published_at))
+
+        story_ids: List[int] = []
+        if new_stories:
+            result = await session.execute(insert(Story).returning(Story.id, sort_by_parameter_order=True), new_stories)
+            story_ids = result.scalars().all()
+
+        stories = {}
+        for article_id, signature, story_id, published_at in assigned:
+            if story_id < 0:
+                story_id = story_ids[-story_id - 1]
+                self.add(article_id, signature, story_id, published_at)
+            stories[article_id] = story_id
+        await session.execute(
+            update(Article),
+            [
+                {"id": article_id, "story_id": stories[article_id], "minhash": self.hasher.pack(signature) if signature else None}
+                for article_id, signature, _, _ in assigned
+            ],
+        )
+        await refresh_story_stats(session, set(stories.values()))
+        return stories
+
+
+async def refresh_story_stats(session: AsyncSession, story_ids: Iterable[int]) -> None:
+    """Recompute article/source counts and the publication range of the given stories, without committing."""
+    story_ids = sorted(story_ids)
+    if not story_ids:
+        return
+    result = await session.execute(
+        select(
+            Article.story_id,
+            func.count(Article.id),
+            func.count(distinct(Article.source_id)),
+            func.min(Article.published_at),
+            func.max(Article.published_at),
+        )
+        .where(Article.story_id.in_(story_ids))
+        .group_by(Article.story_id)
+    )
+    rows = [
+        {
+            "id": story_id,
+            "article_count": article_count,
+            "source_count": source_count,
+            "first_published_at": first_published_at,
+            "last_published_at": last_published_at,
+        }
+        for story_id, article_count, source_count, first_published_at, last_published_at in result.all()
+    ]
+    if rows:
+        await session.execute(update(Story), rows)
+
+
+story_index = StoryIndex()
@@ -1,42 +1,65 @@
 import asyncio
+import logging
+import time
+from statistics import median
+from typing import Dict, List, Optional, Set, Tuple
 from celery import Celery
+from celery.signals import worker_process_init, worker_process_shutdown
+from sqlalchemy.ext.asyncio import AsyncSession
+from app import metrics
+from app.analytics import add_to_bias_rollups
+from app.cache import response_cache
 from app.core.config import settings
+from app.core.log import log_event
+from app.db.redis import redis_client
 from app.db.session import async_session
-from app.crud import create_article, get_sources
+from app.crud import get_source, get_sources, insert_articles, save_bias_lexicon, update_source_validators
+from app.fetcher import FeedFetcher
+from app.models import Source
+from app.scheduling import FetchOutcome, claim_due_sources, record_fetch
 from app.schemas import ArticleCreate
-from app.bias_analyzer import calculate_bias_score, get_bias_label
+from app.stories import StoryIndex, story_index
+from app.thumbnails import thumbnails
+from app.url_index import canonicalize_url, get_shared_redis, seen_urls
+from app.worker_runtime import runtime
+from app.bias_analyzer import LEXICON_VERSION, bias_terms, calculate_bias_score, lexicon_terms, match_keywords
+from app.categories import CATEGORY_KEYWORDS
 import feedparser
+import httpx
 from datetime import datetime
 from time import mktime
 
+logger = logging.getLogger(__name__)
+
 celery_app = Celery("worker", broker=settings.CELERY_BROKER_URL, backend=settings.CELERY_RESULT_BACKEND)
 
 celery_app.conf.beat_schedule = {
-    "fetch-news-every-30-minutes": {
-        "task": "app.tasks.fetch_news_task",
-        "schedule": 1800.0,
+    # Enqueues fetch_source_task for every source whose next fetch is due
+    "dispatch-due-feeds": {
+        "task": "app.tasks.dispatch_feeds_task",
+        "schedule": settings.FEED_DISPATCH_INTERVAL,
     },
 }
 
-def categorize_article(title: str, summary: str = "") -> str:
+@worker_process_init.connect
+def start_worker_runtime(**kwargs):
+    runtime.start()
+
+@worker_process_shutdown.connect
+def stop_worker_runtime(**kwargs):
+    if runtime.started:
+        runtime.run(thumbnails.aclose())
+    runtime.stop()
+
+def categorize_article(title: str, summary: str = "", matches: Optional[Dict[str, Set[str]]] = None) -> str:
     """Categorize article based on keywords in title and summary"""
-    text = (title + " " + summary).lower()
-    
-    # Category keywords
-    categories = {
-        "Politics": ["election", "government", "minister", "parliament", "political", "party", "bjp", "congress", "vote", "policy", "law", "supreme court", "president", "prime minister"],
-        "Business": ["business", "economy", "market", "stock", "company", "corporate", "trade", "finance", "bank", "rupee", "gdp", "industry", "startup", "investment"],
-        "Technology": ["technology", "tech", "ai", "artificial intelligence", "software", "app", "digital", "internet", "cyber", "smartphone", "computer", "innovation", "startup"],
-        "Health": ["health", "medical", "hospital", "doctor", "disease", "covid", "vaccine", "medicine", "patient", "treatment", "healthcare"],
-        "Environment": ["environment", "climate", "pollution", "green", "renewable", "carbon", "weather", "forest", "wildlife", "conservation"],
-        "Sports": ["cricket", "football", "sports", "match", "player", "team", "tournament", "olympics", "ipl", "fifa", "championship"],
-        "Entertainment": ["film", "movie", "actor", "actress", "bollywood", "music", "celebrity", "entertainment", "show", "series", "netflix"]
-    }
+    if matches is None:
+        matches = match_keywords(title, summary)
     
     # Count matches for each category
     scores = {}
-    for category, keywords in categories.items():
-        score = sum(1 for keyword in keywords if keyword in text)
+    for category in CATEGORY_KEYWORDS:
+        score = len(matches[category])
         if score > 0:
             scores[category] = score
     
@@ -45,65 +68,237 @@ def categorize_article(title: str, summary: str = "") -> str:
         return max(scores, key=scores.get)
     return "General"
 
-async def fetch_feed(url: str, source_id: int):
-    feed = feedparser.parse(url)
+def entry_published_at(entry) -> Optional[datetime]:
+    published_parsed = getattr(entry, "published_parsed", None)
+    return datetime.fromtimestamp(mktime(published_parsed)) if published_parsed else None
+
+def entry_to_article(entry, url: str, source_id: Optional[int]) -> Tuple[ArticleCreate, Set[str]]:
+    """Build the article for a parsed feed entry, with the lexicon terms its bias score matched."""
+    published_at = entry_published_at(entry) or datetime.utcnow()
+
+    # Get summary and image
+    summary = entry.summary if hasattr(entry, "summary") else ""
+    image_url = None
+
+    # Try to extract image from media content or enclosures
+    if hasattr(entry, "media_content") and entry.media_content:
+        image_url = entry.media_content[0].get("url")
+    elif hasattr(entry, "enclosures") and entry.enclosures:
+        for enclosure in entry.enclosures:
+            if "image" in enclosure.get("type", ""):
+                image_url = enclosure.get("href")
+                break
+
+    # Scan the text once and share the matches between categorisation and scoring
+    matches = match_keywords(entry.title, summary)
+
+    # Categorize the article
+    category = categorize_article(entry.title, summary, matches=matches)
+
+    # Calculate bias score
+    bias_score = calculate_bias_score(entry.title, summary, matches=matches)
+
+    article = ArticleCreate(
+        title=entry.title,
+        summary=summary,
+        url=url,
+        published_at=published_at,
+        source_id=source_id,
+        category=category,
+        image_url=image_url,
+        bias_score=bias_score,
+        bias_lexicon_version=LEXICON_VERSION
+    )
+    return article, bias_terms(matches)
+
+def feed_entries(feed, limit: Optional[int] = None) -> Tuple[Dict[str, object], List[datetime]]:
+    """
+    The first `limit` entries of a parsed feed keyed by canonical URL, and
+    the publication times found among them.
+    """
+    entries = {}
+    # Publication times of everything in the feed tell the scheduler how often it updates
+    published = []
+    for entry in feed.entries[:limit]:
+        if getattr(entry, "link", None):
+            entries.setdefault(canonicalize_url(entry.link), entry)
+        try:
+            published_at = entry_published_at(entry)
+        except (TypeError, ValueError, OverflowError):
+            published_at = None
+        if published_at is not None:
+            published.append(published_at)
+    return entries, published
+
+async def store_articles(
+    session: AsyncSession, articles: List[ArticleCreate], terms: Dict[str, Set[str]], index: StoryIndex = story_index
+) -> Tuple[Dict[str, int], Dict[int, int]]:
+    """
+    Insert a batch, count it in the bias rollups, cluster it into stories and commit.
+
+    Returns:
+        ({url: article_id} of the inserted articles, {article_id: story_id})
+    """
+    # Pick up articles clustered by other workers since the last batch
+    await index.sync(session)
+    # One INSERT ... ON CONFLICT for the whole batch; duplicates are skipped by the database
+    inserted_ids = await insert_articles(session, articles, terms=terms)
+    await add_to_bias_rollups(session, [article for article in articles if article.url in inserted_ids])
+    stories = await index.assign(
+        session, [(inserted_ids[article.url], article) for article in articles if article.url in inserted_ids]
+    )
+    try:
+        await session.commit()
+    except Exception:
+        index.discard(stories)
+        raise
+    return inserted_ids, stories
+
+async def fetch_feed(fetcher: FeedFetcher, source: Source) -> FetchOutcome:
+    source_id = source.id
+    labels = {"source": source.name}
+    started = time.perf_counter()
+    try:
+        response = await fetcher.fetch(source.feed_url, etag=source.etag, last_modified=source.last_modified)
+    except (httpx.HTTPError, asyncio.TimeoutError) as e:
+        metrics.FEED_FETCH_SECONDS.observe(time.perf_counter() - started, **labels)
+        metrics.FEED_FETCHES.inc(source=source.name, result="error")
+        log_event(logger, "feed_fetch_failed", logging.WARNING, source=source.name, url=source.feed_url, error=repr(e))
+        return FetchOutcome(ok=False)
+    metrics.FEED_FETCH_SECONDS.observe(time.perf_counter() - started, **labels)
+    if response.not_modified:
+        metrics.FEED_FETCHES.inc(source=source.name, result="not_modified")
+        return FetchOutcome()
+    metrics.FEED_FETCHES.inc(source=source.name, result="ok")
+    metrics.FEED_BYTES.inc(len(response.content), **labels)
+
+    # Parsing is CPU-bound; keep it off the event loop so other feeds keep downloading
+    feed = await asyncio.to_thread(feedparser.parse, response.content)
+    # Drop entries we already have before paying for categorisation and scoring
+    # Fetch more entries (up to 50) to get past week's news
+    entries, published = feed_entries(feed, limit=50)
+    metrics.ENTRIES_PARSED.inc(len(entries), **labels)
+    redis = get_shared_redis()
+    new_urls = await seen_urls.unseen(entries, redis=redis)
+
+    started = time.perf_counter()
+    articles = []
+    terms = {}
+    failed = 0
+    for url in new_urls:
+        try:
+            article, terms[url] = entry_to_article(entries[url], url, source_id)
+            articles.append(article)
+        except Exception as e:
+            failed += 1
+            # A broken feed fails the same way for every entry; one line per feed is enough
+            if failed == 1:
+                log_event(logger, "feed_entry_failed", logging.WARNING, source=source.name, url=url, error=repr(e))
+    metrics.ENRICHMENT_SECONDS.observe(time.perf_counter() - started, **labels)
+    if failed:
+        metrics.ENTRIES_FAILED.inc(failed, **labels)
+
+    started = time.perf_counter()
+    async with async_session() as session:
+        inserted_ids, stories = await store_articles(session, articles, terms)
+        metrics.DB_WRITE_SECONDS.observe(time.perf_counter() - started, **labels)
+        inserted = len(inserted_ids)
+        duplicates = len(entries) - len(new_urls) + len(articles) - inserted
+        metrics.ARTICLES_INSERTED.inc(inserted, **labels)
+        metrics.ARTICLES_DUPLICATE.inc(duplicates, **labels)
+        now = datetime.utcnow()
+        lags = [(now - article.published_at).total_seconds() for article in articles if article.url in inserted_ids]
+        for lag in lags:
+            metrics.PUBLISH_LAG_SECONDS.observe(max(lag, 0.0), **labels)
+        log_event(
+            logger, "feed_ingested", sample_rate=1.0 if failed else settings.INGEST_LOG_SAMPLE_RATE,
+            source=source.name, entries=len(entries), inserted=inserted, duplicates=duplicates, failed=failed,
+            stories=len(set(stories.values())), median_lag_s=round(median(lags)) if lags else None,
+        )
+        await seen_urls.add((article.url for article in articles), redis=redis)
+        if inserted:
+            await response_cache.bump_version()
+        if settings.THUMBNAIL_PREWARM:
+            image_urls = [article.image_url for article in articles if article.url in inserted_ids and article.image_url]
+            if image_urls:
+                prewarm_thumbnails_task.delay(image_urls)
+
+        if response.etag != source.etag or response.last_modified != source.last_modified:
+            await update_source_validators(session, source_id, response.etag, response.last_modified)
+    return FetchOutcome(new_articles=inserted, published=published)
+
+_ingest_prepared = False
+
+async def prepare_ingest():
+    """Once per process: warm the known-URL filter and record the current lexicon."""
+    global _ingest_prepared
+    if _ingest_prepared:
+        return
+    async with async_session() as session:
+        if not seen_urls.warmed:
+            await seen_urls.warm(session)
+        # Keep a snapshot of the lexicon new scores are computed with, for later rescoring diffs
+        await save_bias_lexicon(session, LEXICON_VERSION, lexicon_terms())
+    _ingest_prepared = True
+
+async def fetch_and_schedule(fetcher: FeedFetcher, source: Source) -> FetchOutcome:
+    """Fetch one source, schedule its next fetch from what came back and flush its metrics."""
+    try:
+        outcome = await fetch_feed(fetcher, source)
+    except Exception as e:
+        log_event(logger, "feed_ingest_failed", logging.ERROR, exc_info=True, source=source.name, url=source.feed_url, error=repr(e))
+        metrics.FEED_INGEST_ERRORS.inc(source=source.name)
+        outcome = FetchOutcome(ok=False)
+    async with async_session() as session:
+        interval = await record_fetch(session, source, outcome)
+    metrics.FETCH_INTERVAL_SECONDS.set(interval, source=source.name)
+    await metrics.REGISTRY.flush(redis_client)
+    return outcome
+
+async def fetch_source_async(source_id: int, fetcher: FeedFetcher) -> Optional[FetchOutcome]:
+    await prepare_ingest()
+    async with async_session() as session:
+        source = await get_source(session, source_id)
+    if source is None or not source.is_active or not source.feed_url:
+        return None
+    return await fetch_and_schedule(fetcher, source)
+
+async def dispatch_due_feeds() -> int:
     async with async_session() as session:
-        # Fetch more entries (up to 50) to get past week's news
-        for entry in feed.entries[:50]:
-            try:
-                published_at = datetime.fromtimestamp(mktime(entry.published_parsed)) if hasattr(entry, "published_parsed") else datetime.utcnow()
-                
-                # Get summary and image
-                summary = entry.summary if hasattr(entry, "summary") else ""
-                image_url = None
-                
-                # Try to extract image from media content or enclosures
-                if hasattr(entry, "media_content") and entry.media_content:
-                    image_url = entry.media_content[0].get("url")
-                elif hasattr(entry, "enclosures") and entry.enclosures:
-                    for enclosure in entry.enclosures:
-                        if "image" in enclosure.get("type", ""):
-                            image_url = enclosure.get("href")
-                            break
-                
-                # Categorize the article
-                category = categorize_article(entry.title, summary)
-                
-                # Calculate bias score
-                bias_score = calculate_bias_score(entry.title, summary)
-                
-                article = ArticleCreate(
-                    title=entry.title,
-                    summary=summary,
-                    url=entry.link,
-                    published_at=published_at,
-                    source_id=source_id,
-                    category=category,
-                    image_url=image_url,
-                    bias_score=bias_score
-                )
-                
-                try:
-                    await create_article(session, article)
-                    bias_label = get_bias_label(bias_score)
-                    print(f"Saved [{category}] [{bias_label}]: {entry.title}")
-                except Exception as e:
-                    # Skip duplicates silently
-                    await session.rollback()
-            except Exception as e:
-                print(f"Error processing entry: {e}")
-
-async def fetch_all_feeds_async():
+        source_ids = await claim_due_sources(session)
+    for source_id in source_ids:
+        fetch_source_task.delay(source_id)
+    return len(source_ids)
+
+async def fetch_all_feeds_async(fetcher: Optional[FeedFetcher] = None):
+    """Fetch every source now, regardless of schedule (manual trigger)."""
+    if fetcher is None:
+        async with FeedFetcher() as fetcher:
+            return await fetch_all_feeds_async(fetcher)
+    await prepare_ingest()
     async with async_session() as session:
         sources = await get_sources(session)
-        tasks = []
-        for source in sources:
-            if source.feed_url:
-                tasks.append(fetch_feed(source.feed_url, source.id))
-        await asyncio.gather(*tasks)
+    tasks = []
+    for source in sources:
+        if source.feed_url:
+            tasks.append(fetch_and_schedule(fetcher, source))
+    await asyncio.gather(*tasks)
+
+# Tasks run on the worker process's own loop, engine and feed client (app.worker_runtime)
+
+@celery_app.task(ignore_result=True)
+def dispatch_feeds_task():
+    return runtime.run(dispatch_due_feeds())
+
+@celery_app.task(ignore_result=True)
+def fetch_source_task(source_id: int):
+    runtime.run(fetch_source_async(source_id, runtime.fetcher))
+
+@celery_app.task(ignore_result=True)
+def prewarm_thumbnails_task(image_urls: List[str]):
+    runtime.run(thumbnails.prewarm(image_urls))
 
 @celery_app.task
 def fetch_news_task():
-    loop = asyncio.get_event_loop()
-    loop.run_until_complete(fetch_all_feeds_async())
+    runtime.run(fetch_all_feeds_async(runtime.fetcher))
     return "News fetch completed"
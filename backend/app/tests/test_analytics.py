@@ -0,0 +1,94 @@
+from datetime import date, datetime
+
+import pytest
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+from sqlalchemy.future import select
+from sqlalchemy.orm import sessionmaker
+
+from app import analytics
+from app.crud import insert_articles
+from app.models import Article, BiasRollup, Source
+from app.schemas import ArticleCreate
+
+DAY = datetime(2024, 7, 23, 9, 30)
+
+
+def article(n: int, source_id: int, bias_score: float, category: str = "Politics") -> ArticleCreate:
+    return ArticleCreate(
+        title=f"Story {n}", url=f"https://example.com/{n}", published_at=DAY,
+        source_id=source_id, category=category, bias_score=bias_score,
+    )
+
+
+async def ingest(session, articles):
+    inserted = await insert_articles(session, articles)
+    await analytics.add_to_bias_rollups(session, [a for a in articles if a.url in inserted])
+    await session.commit()
+
+
+async def rollups(session):
+    result = await session.execute(select(BiasRollup).order_by(BiasRollup.source_id, BiasRollup.label))
+    return [(r.source_id, r.category, r.label, r.article_count, r.bias_score_sum) for r in result.scalars().all()]
+
+
+@pytest.mark.asyncio
+async def test_distribution_per_source_and_window(session):
+    session.add_all([Source(id=1, name="The Hindu", url="h"), Source(id=2, name="NDTV", url="n")])
+    await ingest(session, [article(1, 1, -50), article(2, 1, -40), article(3, 1, 0), article(4, 2, 60)])
+    # Re-ingesting the same URLs adds nothing
+    await ingest(session, [article(1, 1, -50)])
+
+    [hindu, ndtv] = await analytics.get_bias_distribution(session, date(2024, 7, 1), date(2024, 7, 31), group_by="source")
+    assert (hindu["name"], hindu["article_count"], hindu["avg_bias_score"]) == ("The Hindu", 3, -30.0)
+    assert hindu["labels"]["Left"] == {"count": 2, "share": 2 / 3, "avg_bias_score": -45.0}
+    assert hindu["labels"]["Right"]["count"] == 0
+    assert ndtv["labels"]["Right"]["count"] == 1
+
+    assert await analytics.get_bias_distribution(session, date(2024, 8, 1), date(2024, 8, 31)) == []
+
+
+@pytest.mark.asyncio
+async def test_rescoring_deltas_and_rebuild_agree(session, monkeypatch):
+    await ingest(session, [article(1, 1, -50), article(2, 1, 5)])
+    rows = (await session.execute(
+        select(Article.id, Article.published_at, Article.source_id, Article.category, Article.bias_score).order_by(Article.id)
+    )).all()
+    # Article 1 is rescored from Left to Right
+    await analytics.apply_rollup_deltas(session, analytics.rescore_deltas([(rows[0], 50.0)]))
+    await session.execute(Article.__table__.update().where(Article.id == rows[0].id).values(bias_score=50.0))
+    await session.commit()
+    incremental = [row for row in await rollups(session) if row[3]]
+
+    monkeypatch.setattr(analytics, "async_session", sessionmaker(session.bind, class_=AsyncSession, expire_on_commit=False))
+    assert await analytics.rebuild_bias_rollups(chunk_size=1) == 2
+    assert await rollups(session) == incremental == [(1, "Politics", "Center", 1, 5.0), (1, "Politics", "Right", 1, 50.0)]
+
+
+class RecordingSession:
+    """Stands in for a PostgreSQL session, recording the statements it is given."""
+
+    def __init__(self, log: list):
+        self.log = log
+
+    def get_bind(self):
+        return create_async_engine("postgresql+asyncpg://x/x")
+
+    async def execute(self, statement, params=None):
+        self.log.append(str(statement))
+
+    async def commit(self):
+        self.log.append("COMMIT")
+
+
+@pytest.mark.asyncio
+async def test_bias_score_lock_holds_an_advisory_lock_around_the_job():
+    log = []
+    async with analytics.bias_score_lock(RecordingSession(log)):
+        log.append("job")
+    assert log == ["SELECT pg_advisory_lock(:key)", "job", "SELECT pg_advisory_unlock(:key)", "COMMIT"]
+
+    log.clear()
+    with pytest.raises(RuntimeError):
+        async with analytics.bias_score_lock(RecordingSession(log)):
+            raise RuntimeError
+    assert log[-2:] == ["SELECT pg_advisory_unlock(:key)", "COMMIT"]
@@ -0,0 +1,59 @@
+from datetime import datetime, timedelta
+from typing import List
+
+import httpx
+import pytest
+from fastapi import FastAPI
+from pydantic import TypeAdapter
+
+from app import crud
+from app.api import deps
+from app.api.v1.endpoints import articles
+from app.cache import response_cache
+from app.models import Source
+from app.schemas import ArticleCreate, ArticleRead
+
+
+@pytest.mark.asyncio
+async def test_article_list_fields_and_sideloaded_sources(session, monkeypatch):
+    session.add_all([Source(name="BBC", url="https://bbc.example"), Source(name="Wire", url="https://wire.example")])
+    await session.commit()
+    published = datetime(2024, 7, 23, 9, 30, 15, 250000)
+    await crud.create_articles(session, [
+        ArticleCreate(
+            title=f"Story {n}", url=f"https://example.com/{n}", published_at=published + timedelta(hours=n),
+            source_id=[1, 2, 1, None][n], bias_score=n * 2.5,
+        )
+        for n in range(4)
+    ])
+    monkeypatch.setattr(response_cache, "enabled", False)
+
+    async def get_session():
+        yield session
+
+    app = FastAPI()
+    app.include_router(articles.router, prefix="/articles")
+    app.dependency_overrides[deps.get_cached_session] = get_session
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test") as client:
+        # Same data as validating the ORM objects into ArticleRead
+        article_list = TypeAdapter(List[ArticleRead])
+        expected = article_list.validate_python(await crud.get_articles(session), from_attributes=True)
+        body = (await client.get("/articles/")).json()
+        assert body == article_list.dump_python(expected, mode="json")
+        # Internal bookkeeping columns are not part of the API
+        assert {"bias_lexicon_version", "story_id", "minhash"}.isdisjoint(body[0])
+
+        response = await client.get("/articles/", params={"fields": "title,source", "limit": 2})
+        first, second = response.json()
+        assert first == {"title": "Story 3", "id": 4, "source": None}
+        assert (list(second), second["source"]["name"]) == (["title", "id", "source"], "BBC")
+        cursor = response.headers["x-next-cursor"]
+        response = await client.get("/articles/", params={"fields": "title", "limit": 2, "cursor": cursor})
+        assert response.json() == [{"title": "Story 1", "id": 2}, {"title": "Story 0", "id": 1}]
+
+        body = (await client.get("/articles/", params={"fields": "url", "include": "sources"})).json()
+        assert [article["source_id"] for article in body["articles"]] == [None, 1, 2, 1]
+        assert [(source["id"], source["name"]) for source in body["sources"]] == [(1, "BBC"), (2, "Wire")]
+
+        for fields in ("title,minhash", "story_id"):
+            assert (await client.get("/articles/", params={"fields": fields})).status_code == 400
@@ -0,0 +1,37 @@
+from app.bias_analyzer import calculate_bias_score, get_bias_label, match_keywords, LEFT, RIGHT
+from app.keyword_matcher import KeywordMatcher
+from app.tasks import categorize_article
+
+
+def test_matcher_matches_whole_words_only():
+    matcher = KeywordMatcher({"tech": ["ai"], "politics": ["law"]})
+    found = matcher.match("He said the lawn was mowed")
+    assert found == {"tech": set(), "politics": set()}
+    assert matcher.match("New AI law passed") == {"tech": {"ai"}, "politics": {"law"}}
+
+
+def test_matcher_reports_overlapping_phrases():
+    matcher = KeywordMatcher({"party": ["congress"], "left": ["congress party"], "right": ["law and order"]})
+    found = matcher.match("The Congress Party spoke on law-and-order today")
+    assert found == {"party": {"congress"}, "left": {"congress party"}, "right": {"law and order"}}
+
+
+def test_match_keywords_covers_bias_and_category_groups():
+    matches = match_keywords("BJP promises tax cuts", "Election rally focuses on welfare")
+    assert matches[RIGHT] == {"bjp", "tax cuts"}
+    assert matches[LEFT] == {"welfare"}
+    assert matches["Politics"] == {"bjp", "election"}
+
+
+def test_bias_score_and_category_share_matches():
+    title, summary = "Free market reforms and tax cuts", "Experts say privatization will help"
+    matches = match_keywords(title, summary)
+    score = calculate_bias_score(title, summary, matches=matches)
+    assert score == calculate_bias_score(title, summary)
+    assert get_bias_label(score) == "Right"
+    assert categorize_article(title, summary, matches=matches) == "Business"
+
+
+def test_no_keywords_is_center_and_general():
+    assert calculate_bias_score("Said the lawn") == 0.0
+    assert categorize_article("Said the lawn") == "General"
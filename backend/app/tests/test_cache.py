@@ -0,0 +1,71 @@
+import asyncio
+import pytest
+from fastapi import FastAPI, Request
+from httpx import AsyncClient
+from app.cache import ResponseCache
+
+
+class FakeRedis:
+    def __init__(self):
+        self.data = {}
+
+    async def get(self, key):
+        return self.data.get(key)
+
+    async def set(self, key, value, ex=None, px=None, nx=False):
+        if nx and key in self.data:
+            return None
+        self.data[key] = value
+        return True
+
+    async def incr(self, key):
+        self.data[key] = str(int(self.data.get(key, 0)) + 1)
+        return int(self.data[key])
+
+    async def delete(self, key):
+        self.data.pop(key, None)
+
+
+def make_app(cache: ResponseCache, calls: list) -> FastAPI:
+    app = FastAPI()
+
+    @app.get("/items")
+    async def items(request: Request):
+        async def build():
+            calls.append(1)
+            await asyncio.sleep(0.01)
+            return b'[{"id": 1}]', {"X-Next-Cursor": "abc"}
+
+        return await cache.respond(request, build)
+
+    return app
+
+
+@pytest.mark.asyncio
+async def test_cached_response_etag_and_invalidation():
+    calls = []
+    cache = ResponseCache(redis=FakeRedis(), ttl=60, enabled=True)
+    async with AsyncClient(app=make_app(cache, calls), base_url="http://test") as client:
+        first = await client.get("/items")
+        assert first.json() == [{"id": 1}]
+        assert first.headers["x-next-cursor"] == "abc"
+        etag = first.headers["etag"]
+
+        again = await client.get("/items", headers={"If-None-Match": etag})
+        assert again.status_code == 304
+        assert again.content == b""
+        assert len(calls) == 1
+
+        await cache.bump_version()
+        await client.get("/items")
+        assert len(calls) == 2
+
+
+@pytest.mark.asyncio
+async def test_concurrent_misses_are_coalesced():
+    calls = []
+    cache = ResponseCache(redis=FakeRedis(), ttl=60, enabled=True)
+    async with AsyncClient(app=make_app(cache, calls), base_url="http://test") as client:
+        responses = await asyncio.gather(*(client.get("/items") for _ in range(10)))
+    assert all(response.status_code == 200 for response in responses)
+    assert len(calls) == 1
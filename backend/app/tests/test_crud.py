@@ -0,0 +1,56 @@
+from datetime import datetime, timedelta
+import pytest
+from sqlalchemy.future import select
+from app import crud
+from app.models import Article
+from app.pagination import decode_cursor, encode_cursor
+from app.schemas import ArticleCreate
+
+
+def make_article(n: int) -> ArticleCreate:
+    return ArticleCreate(title=f"Story {n}", url=f"https://example.com/{n}")
+
+
+@pytest.mark.asyncio
+async def test_create_articles_skips_stored_and_in_batch_duplicates(session):
+    assert await crud.create_articles(session, [make_article(1), make_article(2)]) == (2, 0)
+
+    batch = [make_article(1), make_article(2), make_article(3), make_article(3)]
+    assert await crud.create_articles(session, batch) == (1, 3)
+
+    result = await session.execute(select(Article.url).order_by(Article.url))
+    assert result.scalars().all() == [f"https://example.com/{n}" for n in (1, 2, 3)]
+
+
+@pytest.mark.asyncio
+async def test_create_articles_empty_batch(session):
+    assert await crud.create_articles(session, []) == (0, 0)
+
+
+@pytest.mark.asyncio
+async def test_get_articles_keyset_pages_cover_every_row_once(session):
+    published_at = datetime(2024, 1, 1)
+    await crud.create_articles(session, [
+        ArticleCreate(title=f"Story {n}", url=f"https://example.com/{n}", published_at=published_at + timedelta(hours=n // 2))
+        for n in range(7)
+    ])
+
+    seen, after = [], None
+    while True:
+        page = await crud.get_articles(session, limit=3, after=after)
+        seen.extend(article.id for article in page)
+        if len(page) < 3:
+            break
+        after = decode_cursor(encode_cursor(page[-1].published_at, page[-1].id))
+
+    assert seen == [7, 6, 5, 4, 3, 2, 1]
+
+
+@pytest.mark.asyncio
+async def test_get_articles_date_range(session):
+    await crud.create_articles(session, [
+        ArticleCreate(title=f"Story {n}", url=f"https://example.com/{n}", published_at=datetime(2024, 1, n + 1))
+        for n in range(5)
+    ])
+    page = await crud.get_articles(session, date_from=datetime(2024, 1, 2), date_to=datetime(2024, 1, 4))
+    assert [article.title for article in page] == ["Story 3", "Story 2", "Story 1"]
@@ -0,0 +1,66 @@
+import httpx
+import pytest
+import pytest_asyncio
+from fastapi import Depends, FastAPI
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.future import select
+from sqlalchemy.orm import sessionmaker
+from sqlmodel import SQLModel
+
+from app.api import deps
+from app.cache import response_cache
+from app.db.session import make_engine
+from app.models import Source
+
+
+@pytest_asyncio.fixture
+async def databases(tmp_path, monkeypatch):
+    """A primary and a replica SQLite database, told apart by the source stored in each."""
+    engines = []
+    for name in ("primary", "replica"):
+        engine = make_engine(f"sqlite+aiosqlite:///{tmp_path / name}.db")
+        async with engine.begin() as conn:
+            await conn.run_sync(SQLModel.metadata.create_all)
+        async with AsyncSession(engine) as session:
+            session.add(Source(name=name, url=f"https://{name}.example"))
+            await session.commit()
+        engines.append(engine)
+    primary, replica = engines
+    monkeypatch.setattr(deps, "async_session", sessionmaker(primary, class_=AsyncSession, expire_on_commit=False))
+    monkeypatch.setattr(deps, "async_read_session", sessionmaker(replica, class_=AsyncSession, expire_on_commit=False))
+    yield
+    for engine in engines:
+        await engine.dispose()
+
+
+@pytest.mark.asyncio
+async def test_reads_go_to_replica_and_writes_to_primary(databases):
+    app = FastAPI()
+
+    async def source_names(session: AsyncSession = Depends(deps.get_session)):
+        result = await session.execute(select(Source.name))
+        return result.scalars().all()
+
+    app.get("/sources")(source_names)
+    app.post("/sources")(source_names)
+
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test") as client:
+        assert (await client.get("/sources")).json() == ["replica"]
+        assert (await client.post("/sources")).json() == ["primary"]
+
+
+@pytest.mark.asyncio
+async def test_cached_reads_go_to_primary_while_the_cache_is_on(databases, monkeypatch):
+    app = FastAPI()
+
+    @app.get("/sources")
+    async def source_names(session: AsyncSession = Depends(deps.get_cached_session)):
+        result = await session.execute(select(Source.name))
+        return result.scalars().all()
+
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test") as client:
+        # A replica lagging behind an ingest must not fill the cache under the new version
+        monkeypatch.setattr(response_cache, "enabled", True)
+        assert (await client.get("/sources")).json() == ["primary"]
+        monkeypatch.setattr(response_cache, "enabled", False)
+        assert (await client.get("/sources")).json() == ["replica"]
@@ -0,0 +1,53 @@
+import csv
+import io
+import json
+from datetime import datetime, timedelta
+
+import httpx
+import pytest
+from fastapi import FastAPI
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import sessionmaker
+
+from app import crud, export
+from app.api.v1.endpoints import articles
+from app.models import Source
+from app.schemas import ArticleCreate
+
+
+@pytest.mark.asyncio
+async def test_export_streams_filtered_rows_in_batches(session, monkeypatch):
+    session.add(Source(name="BBC", url="https://bbc.example"))
+    await session.commit()
+    published = datetime(2024, 7, 23, 9)
+    await crud.create_articles(session, [
+        ArticleCreate(
+            title=f"Story, {n}", url=f"https://example.com/{n}", published_at=published + timedelta(hours=n),
+            category="Sports" if n % 2 else "Politics", source_id=1 if n < 4 else None,
+        )
+        for n in range(5)
+    ])
+    monkeypatch.setattr(export, "async_read_session", sessionmaker(session.bind, class_=AsyncSession, expire_on_commit=False))
+    monkeypatch.setattr(export.settings, "EXPORT_BATCH_SIZE", 2)
+
+    app = FastAPI()
+    app.include_router(articles.router, prefix="/articles")
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test") as client:
+        response = await client.get("/articles/export")
+        assert response.headers["content-type"] == "application/x-ndjson"
+        rows = [json.loads(line) for line in response.text.splitlines()]
+        assert [row["id"] for row in rows] == [5, 4, 3, 2, 1]
+        assert rows[1] == {
+            "id": 4, "title": "Story, 3", "summary": None, "url": "https://example.com/3",
+            "published_at": "2024-07-23T12:00:00", "image_url": None, "category": "Sports", "bias_score": 0.0,
+            "bias_lexicon_version": None, "source_id": 1, "source_name": "BBC", "story_id": None,
+        }
+        assert rows[0]["source_name"] is None
+
+        response = await client.get("/articles/export", params={"format": "csv", "category": "Politics"})
+        assert response.headers["content-type"] == "text/csv; charset=utf-8"
+        table = list(csv.reader(io.StringIO(response.text)))
+        assert table[0] == export.FIELDS
+        assert [(row[0], row[1]) for row in table[1:]] == [("5", "Story, 4"), ("3", "Story, 2"), ("1", "Story, 0")]
+
+        assert (await client.get("/articles/export", params={"format": "xml"})).status_code == 422
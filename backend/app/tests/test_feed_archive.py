@@ -0,0 +1,97 @@
+from datetime import datetime
+
+import pytest
+from sqlalchemy import func
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.future import select
+from sqlalchemy.orm import sessionmaker
+
+from app import feed_archive, tasks
+from app.cache import response_cache
+from app.feed_archive import ArchivedFeed, ArchiveWriter, read_archive, read_feeds, replay
+from app.fetcher import FeedResponse
+from app.models import Article, Source
+from app.url_index import SeenUrlIndex
+
+
+def rss(*numbers: int) -> bytes:
+    items = "".join(
+        f"<item><title>Replay story {n} about monsoon flooding in district {n}</title>"
+        f"<link>https://replay.example/{n}?utm_source=rss</link>"
+        f"<pubDate>Tue, 23 Jul 2024 0{n % 10}:00:00 GMT</pubDate></item>"
+        for n in numbers
+    )
+    return f"<rss><channel><title>Replay</title>{items}</channel></rss>".encode()
+
+
+def test_archive_round_trip(tmp_path):
+    path = tmp_path / "feeds.jsonl.gz"
+    source = Source(id=3, name="Wire", url="https://wire.example")
+    response = FeedResponse(url="https://wire.example/rss", status_code=200, content=rss(1), etag='"v1"', elapsed=0.2)
+    with ArchiveWriter(str(path)) as archive:
+        archive.write(source, response, fetched_at=datetime(2024, 7, 23, 9))
+    with ArchiveWriter(str(path)) as archive:
+        archive.write(source, response)
+
+    feeds = list(read_archive(str(path)))
+    assert len(feeds) == 2
+    assert feeds[0] == ArchivedFeed(
+        source_id=3, body=rss(1), source_name="Wire", feed_url="https://wire.example/rss",
+        fetched_at="2024-07-23T09:00:00", status_code=200, etag='"v1"', elapsed=0.2,
+    )
+
+
+async def use_session(session, monkeypatch) -> None:
+    session.add(Source(name="Wire", url="https://wire.example"))
+    await session.commit()
+    make_session = sessionmaker(session.bind, class_=AsyncSession, expire_on_commit=False)
+    monkeypatch.setattr(feed_archive, "async_session", make_session)
+    monkeypatch.setattr(tasks, "async_session", make_session)
+    monkeypatch.setattr(tasks, "_ingest_prepared", False)
+    monkeypatch.setattr(response_cache, "enabled", False)
+    # Known URLs are process-wide; start each replay from what this database holds
+    seen = SeenUrlIndex()
+    monkeypatch.setattr(feed_archive, "seen_urls", seen)
+    monkeypatch.setattr(tasks, "seen_urls", seen)
+
+
+@pytest.mark.asyncio
+async def test_replay_dump_directory(session, tmp_path, monkeypatch):
+    await use_session(session, monkeypatch)
+    (tmp_path / "1").mkdir()
+    (tmp_path / "1" / "2024-07-22.xml").write_bytes(rss(1, 2, 3))
+    (tmp_path / "1" / "2024-07-23.xml").write_bytes(rss(3, 4))
+    (tmp_path / "not-a-source").mkdir()
+
+    assert [feed.source_id for feed in read_feeds(str(tmp_path))] == [1, 1]
+    report = await replay(str(tmp_path), workers=1, batch_size=3)
+    assert (report.feeds, report.entries, report.inserted, report.duplicates) == (2, 5, 4, 1)
+
+    urls = (await session.execute(select(Article.url).order_by(Article.url))).scalars().all()
+    assert urls == [f"https://replay.example/{n}" for n in (1, 2, 3, 4)]
+    assert (await session.execute(select(func.count()).where(Article.story_id.is_not(None)))).scalar_one() == 4
+
+    report = await replay(str(tmp_path), workers=1)
+    assert (report.inserted, report.duplicates) == (0, 5)
+
+    # Directories are checked against the sources before anything is ingested
+    (tmp_path / "7").mkdir()
+    (tmp_path / "7" / "2024-07-24.xml").write_bytes(rss(5))
+    with pytest.raises(ValueError, match="7"):
+        await replay(str(tmp_path), workers=1)
+    assert (await session.execute(select(func.count()).select_from(Article))).scalar_one() == 4
+
+
+@pytest.mark.asyncio
+async def test_replay_archive_in_a_process_pool(session, tmp_path, monkeypatch):
+    await use_session(session, monkeypatch)
+    path = tmp_path / "feeds.jsonl.gz"
+    source = Source(id=1, name="Wire", url="https://wire.example")
+    with ArchiveWriter(str(path)) as archive:
+        for numbers in [(1, 2), (2, 3), (4,), (5, 6, 1)]:
+            archive.write(source, FeedResponse(url="https://wire.example/rss", status_code=200, content=rss(*numbers)))
+
+    report = await replay(str(path), workers=2, batch_size=2)
+    assert (report.feeds, report.entries, report.inserted, report.duplicates, report.failed) == (4, 8, 6, 2, 0)
+    urls = (await session.execute(select(Article.url).order_by(Article.url))).scalars().all()
+    assert urls == [f"https://replay.example/{n}" for n in range(1, 7)]
@@ -0,0 +1,51 @@
+import asyncio
+import httpx
+import pytest
+from app.fetcher import FeedFetcher
+
+RSS = b"""<?xml version="1.0"?><rss version="2.0"><channel><title>t</title>
+<item><title>Hello</title><link>https://example.com/a</link></item>
+</channel></rss>"""
+
+
+def feed_handler(request: httpx.Request) -> httpx.Response:
+    if request.headers.get("If-None-Match") == '"v1"':
+        return httpx.Response(304)
+    return httpx.Response(200, content=RSS, headers={"ETag": '"v1"', "Last-Modified": "Mon, 01 Jan 2024 00:00:00 GMT"})
+
+
+@pytest.mark.asyncio
+async def test_fetch_returns_validators_and_honours_conditional_get():
+    async with FeedFetcher(transport=httpx.MockTransport(feed_handler)) as fetcher:
+        first = await fetcher.fetch("https://example.com/feed")
+        assert first.status_code == 200
+        assert first.content == RSS
+        assert first.etag == '"v1"'
+
+        second = await fetcher.fetch("https://example.com/feed", etag=first.etag, last_modified=first.last_modified)
+        assert second.not_modified
+        assert second.content == b""
+
+
+@pytest.mark.asyncio
+async def test_fetch_limits_concurrency_per_host():
+    in_flight = {"now": 0, "peak": 0}
+
+    async def slow_handler(request: httpx.Request) -> httpx.Response:
+        in_flight["now"] += 1
+        in_flight["peak"] = max(in_flight["peak"], in_flight["now"])
+        await asyncio.sleep(0.01)
+        in_flight["now"] -= 1
+        return httpx.Response(200, content=RSS)
+
+    async with FeedFetcher(per_host_limit=2, transport=httpx.MockTransport(slow_handler)) as fetcher:
+        await asyncio.gather(*(fetcher.fetch(f"https://example.com/feed/{i}") for i in range(8)))
+
+    assert in_flight["peak"] == 2
+
+
+@pytest.mark.asyncio
+async def test_fetch_raises_on_error_status():
+    async with FeedFetcher(transport=httpx.MockTransport(lambda request: httpx.Response(500))) as fetcher:
+        with pytest.raises(httpx.HTTPStatusError):
+            await fetcher.fetch("https://example.com/feed")
@@ -0,0 +1,113 @@
+import json
+
+import httpx
+import pytest
+
+from app.live_scores import ApiFootballProvider, JsonFeedProvider, LiveScoreAggregator, build_providers
+from app.tests.test_cache import FakeRedis
+
+
+def stub_transport(calls: list, matches: list) -> httpx.MockTransport:
+    def handler(request: httpx.Request) -> httpx.Response:
+        calls.append(str(request.url))
+        return httpx.Response(200, json=matches)
+
+    return httpx.MockTransport(handler)
+
+
+MATCHES = [
+    {"id": "a", "sport": "Cricket", "team1": {"score": "10/1"}, "team2": {"score": ""}, "isLive": True},
+    {"id": "b", "sport": "Football", "team1": {"score": "0"}, "team2": {"score": "0"}, "isLive": False},
+]
+
+
+@pytest.mark.asyncio
+async def test_snapshot_holds_only_live_matches():
+    calls = []
+    aggregator = LiveScoreAggregator(
+        [JsonFeedProvider("http://stub/matches", interval=1)], redis=None, transport=stub_transport(calls, MATCHES)
+    )
+    assert aggregator.snapshot == b"[]"
+
+    await aggregator.refresh(aggregator.providers[0])
+    await aggregator.stop()
+    assert calls == ["http://stub/matches"]
+    assert [match["id"] for match in json.loads(aggregator.snapshot)] == ["a"]
+
+
+@pytest.mark.asyncio
+async def test_only_one_worker_polls_a_provider_per_interval():
+    redis = FakeRedis()
+    calls = []
+    workers = [
+        LiveScoreAggregator([JsonFeedProvider("http://stub/matches", interval=30)], redis=redis, transport=stub_transport(calls, MATCHES))
+        for _ in range(3)
+    ]
+    for worker in workers:
+        await worker.refresh(worker.providers[0])
+        await worker.stop()
+
+    assert len(calls) == 1
+    assert all(worker.snapshot == workers[0].snapshot != b"[]" for worker in workers)
+
+
+def test_football_fixture_is_parsed_into_match_shape():
+    match = ApiFootballProvider.parse({
+        "fixture": {"id": 9, "status": {"short": "2H", "elapsed": 67}, "venue": {"name": "Anfield"}},
+        "league": {"name": "Premier League"},
+        "teams": {"home": {"name": "Liverpool"}, "away": {"name": "Arsenal"}},
+        "goals": {"home": 2, "away": None},
+    })
+    assert match["id"] == "football_9" and match["isLive"] and match["time"] == "67'"
+    assert (match["team1"]["score"], match["team2"]["score"]) == ("2", "0")
+
+
+def test_unknown_providers_are_skipped():
+    assert [provider.name for provider in build_providers("stub, nope,")] == ["stub"]
+
+
+def cricket(score: str, overs: str, time_: str = "") -> dict:
+    return {"id": "c1", "team1": {"score": score, "overs": overs}, "team2": {"score": ""}, "isLive": True, "time": time_}
+
+
+def event(version: int, changed=(), removed=()) -> dict:
+    return {"provider": "p", "version": version, "changed": list(changed), "removed": list(removed), "ts": float(version)}
+
+
+def test_changes_since_returns_only_newer_matches_with_history():
+    aggregator = LiveScoreAggregator([], redis=None)
+    other = {"id": "f1", "team1": {"score": "0"}, "team2": {"score": "0"}, "isLive": True}
+    aggregator.apply(event(1, [cricket("10/0", "1.0"), other]))
+    aggregator.apply(event(2, [cricket("10/0", "1.1")]))
+    aggregator.apply(event(2, [cricket("10/0", "1.1")]))  # same event again via broadcast
+    aggregator.apply(event(3, [cricket("14/0", "1.2")], removed=["f1"]))
+
+    delta = aggregator.changes_since(1)
+    assert delta["version"] == 3 and delta["removed"] == ["f1"]
+    [match] = delta["changed"]
+    assert [state["v"] for state in match["history"]] == [1, 2, 3]
+    assert match["history"][-1]["score"] == ["14/0", ""]
+
+    assert aggregator.changes_since(3) == {"version": 3, "changed": [], "removed": []}
+    # Versions from before this worker started, or from the future, get everything
+    assert aggregator.changes_since(0)["reset"] is True
+    assert aggregator.changes_since(9)["reset"] is True
+
+
+def test_history_ignores_clock_only_changes():
+    aggregator = LiveScoreAggregator([], redis=None)
+    match = {"id": "f1", "team1": {"score": "0"}, "team2": {"score": "0"}, "isLive": True}
+    aggregator.apply(event(1, [{**match, "time": "10'"}]))
+    aggregator.apply(event(2, [{**match, "time": "11'"}]))
+    aggregator.apply(event(3, [{**match, "team1": {"score": "1"}, "time": "12'"}]))
+    assert [state["v"] for state in aggregator.history("f1")] == [1, 3]
+
+
+def test_polls_only_report_score_changes():
+    aggregator = LiveScoreAggregator([], redis=None)
+    football = {"id": "f1", "team1": {"score": "0"}, "team2": {"score": "0"}, "time": "10'", "lastUpdated": "a"}
+    aggregator.apply(event(1, [cricket("10/0", "1.0"), football]))
+    # The clock, the overs and the poll time moving on are not a change
+    assert aggregator._diff("p", [cricket("10/0", "1.1", "x"), {**football, "time": "11'", "lastUpdated": "b"}]) is None
+    diff = aggregator._diff("p", [cricket("14/0", "1.2"), football])
+    assert [match["team1"]["overs"] for match in diff["changed"]] == ["1.2"]
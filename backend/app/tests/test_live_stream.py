@@ -0,0 +1,68 @@
+import json
+
+import httpx
+import pytest
+
+from app.live_scores import JsonFeedProvider, LiveScoreAggregator
+from app.live_stream import RESYNC, Broadcaster, sse_stream
+
+
+def match(match_id: str, score: str) -> dict:
+    return {"id": match_id, "team1": {"score": score}, "isLive": True, "lastUpdated": score}
+
+
+class Upstream:
+    def __init__(self, matches):
+        self.matches = matches
+
+    def transport(self) -> httpx.MockTransport:
+        return httpx.MockTransport(lambda request: httpx.Response(200, json=self.matches))
+
+
+@pytest.mark.asyncio
+async def test_clients_receive_only_changed_matches():
+    upstream = Upstream([match("a", "1"), match("b", "0")])
+    aggregator = LiveScoreAggregator([JsonFeedProvider("http://stub/m", interval=1)], redis=None, transport=upstream.transport())
+    broadcaster = Broadcaster(aggregator, redis=None)
+    await broadcaster.start()
+    provider = aggregator.providers[0]
+
+    async with broadcaster.subscribe("sse") as queue:
+        await aggregator.refresh(provider)
+        first = queue.get_nowait()
+        assert [m["id"] for m in first["changed"]] == ["a", "b"]
+
+        upstream.matches = [match("a", "4"), {**match("b", "0"), "lastUpdated": "later"}]
+        await aggregator.refresh(provider)
+        update = queue.get_nowait()
+        assert [m["id"] for m in update["changed"]] == ["a"] and update["version"] == first["version"] + 1
+
+        upstream.matches = [match("a", "4")]
+        await aggregator.refresh(provider)
+        assert queue.get_nowait()["removed"] == ["b"]
+
+        # Nothing changed, nothing sent
+        await aggregator.refresh(provider)
+        assert queue.empty()
+        assert broadcaster.metrics.as_dict()["connections"]["sse"] == 1
+
+    assert broadcaster.metrics.connections["sse"] == 0
+    await aggregator.stop()
+
+
+@pytest.mark.asyncio
+async def test_slow_client_is_resynced_and_stream_starts_with_snapshot():
+    aggregator = LiveScoreAggregator([], redis=None)
+    broadcaster = Broadcaster(aggregator, redis=None, queue_size=2)
+
+    async with broadcaster.subscribe("websocket") as queue:
+        for version in range(1, 4):
+            broadcaster.deliver({"provider": "p", "version": version, "changed": [match("a", str(version))], "removed": [], "ts": 0})
+        assert queue.get_nowait() is RESYNC
+
+    stream = sse_stream(broadcaster)
+    first = await stream.__anext__()
+    await stream.aclose()
+    assert first.startswith(b"event: snapshot\nid: 3\n")
+    data = json.loads(first.split(b"data: ", 1)[1])
+    assert data["version"] == 3 and data["matches"][0]["team1"]["score"] == "3"
@@ -0,0 +1,91 @@
+from collections import defaultdict
+
+import pytest
+
+from app.metrics import Counter, Gauge, Histogram, MetricsRegistry
+
+
+class FakePipeline:
+    def __init__(self, redis):
+        self.redis = redis
+        self.commands = []
+
+    def hincrbyfloat(self, key, field, amount):
+        self.commands.append(lambda: self.redis.hashes[key].__setitem__(field, self.redis.hashes[key].get(field, 0.0) + amount))
+
+    def hset(self, key, field, value):
+        self.commands.append(lambda: self.redis.hashes[key].__setitem__(field, value))
+
+    def hgetall(self, key):
+        self.commands.append(lambda: {field: str(value) for field, value in self.redis.hashes[key].items()})
+
+    async def execute(self):
+        return [command() for command in self.commands]
+
+
+class FakeRedis:
+    def __init__(self):
+        self.hashes = defaultdict(dict)
+
+    def pipeline(self, transaction=True):
+        return FakePipeline(self)
+
+
+def make_metrics(registry):
+    return (
+        Counter("ingest_articles_inserted", "New articles stored.", ["source"], registry=registry),
+        Histogram("ingest_db_write_seconds", "DB write time.", ["source"], buckets=(0.1, 1.0), registry=registry),
+        Gauge("ingest_fetch_interval_seconds", "Fetch interval.", ["source"], registry=registry),
+    )
+
+
+@pytest.mark.asyncio
+async def test_renders_prometheus_text_format():
+    registry = MetricsRegistry()
+    inserted, write_seconds, interval = make_metrics(registry)
+    inserted.inc(3, source='The "Hindu"')
+    inserted.inc(2, source='The "Hindu"')
+    write_seconds.observe(0.05, source="BBC")
+    write_seconds.observe(0.5, source="BBC")
+    interval.set(120, source="BBC")
+    registry.add_collector(lambda: ["live_stream_events_total 7"])
+
+    text = await registry.collect()
+
+    assert text.splitlines() == [
+        "# HELP ingest_articles_inserted New articles stored.",
+        "# TYPE ingest_articles_inserted counter",
+        'ingest_articles_inserted_total{source="The \\"Hindu\\""} 5',
+        "# HELP ingest_db_write_seconds DB write time.",
+        "# TYPE ingest_db_write_seconds histogram",
+        'ingest_db_write_seconds_bucket{source="BBC",le="0.1"} 1',
+        'ingest_db_write_seconds_bucket{source="BBC",le="1"} 2',
+        'ingest_db_write_seconds_bucket{source="BBC",le="+Inf"} 2',
+        'ingest_db_write_seconds_sum{source="BBC"} 0.55',
+        'ingest_db_write_seconds_count{source="BBC"} 2',
+        "# HELP ingest_fetch_interval_seconds Fetch interval.",
+        "# TYPE ingest_fetch_interval_seconds gauge",
+        'ingest_fetch_interval_seconds{source="BBC"} 120',
+        "live_stream_events_total 7",
+    ]
+
+
+@pytest.mark.asyncio
+async def test_worker_updates_reach_api_through_redis():
+    redis = FakeRedis()
+    worker, api = MetricsRegistry(), MetricsRegistry()
+    worker_inserted, _, _ = make_metrics(worker)
+    make_metrics(api)
+
+    worker_inserted.inc(4, source="BBC")
+    await worker.flush(redis)
+    worker_inserted.inc(1, source="BBC")
+    await worker.flush(redis)
+
+    assert 'ingest_articles_inserted_total{source="BBC"} 5' in (await api.collect(redis)).splitlines()
+
+
+def test_rejects_wrong_labels():
+    counter = Counter("ingest_feed_bytes", "Feed bytes.", ["source"], registry=MetricsRegistry())
+    with pytest.raises(ValueError):
+        counter.inc(10, feed="BBC")
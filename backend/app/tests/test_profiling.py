@@ -0,0 +1,73 @@
+import json
+import logging
+
+import httpx
+import pytest
+from fastapi import FastAPI
+from fastapi.responses import StreamingResponse
+from sqlalchemy import text
+
+from app import crud
+from app.models import Source
+from app.profiling import ProfilingMiddleware
+from app.schemas import ArticleCreate
+
+
+def make_app(session, **options) -> FastAPI:
+    app = FastAPI()
+    app.add_middleware(ProfilingMiddleware, **options)
+
+    @app.get("/articles/{article_id}")
+    async def read_article(article_id: int):
+        article = await crud.get_article(session, article_id)
+        return {"title": article.title, "source": article.source.name}
+
+    @app.get("/n-plus-one")
+    async def n_plus_one():
+        for n in range(5):
+            await session.execute(text("SELECT :n"), {"n": n})
+        return {}
+
+    @app.get("/export")
+    async def export():
+        return StreamingResponse(iter([b"a\n", b"b\n"]), media_type="application/x-ndjson")
+
+    return app
+
+
+async def get(app, path):
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test") as client:
+        return await client.get(path)
+
+
+@pytest.mark.asyncio
+async def test_server_timing_counts_sql_statements(session):
+    session.add(Source(name="BBC", url="https://bbc.example"))
+    await session.commit()
+    await crud.create_articles(session, [ArticleCreate(title="Story", url="https://example.com/1", source_id=1)])
+
+    response = await get(make_app(session, server_timing=True), "/articles/1")
+
+    assert response.json() == {"title": "Story", "source": "BBC"}
+    # The article and its source in one statement
+    assert 'desc="1 queries"' in response.headers["server-timing"]
+
+
+@pytest.mark.asyncio
+async def test_logs_repeated_statements_and_slow_requests(session, caplog):
+    caplog.set_level(logging.WARNING, logger="app.profiling")
+
+    response = await get(make_app(session, repeat_threshold=5), "/n-plus-one")
+    assert "server-timing" not in response.headers
+    event = json.loads(caplog.records[-1].getMessage())
+    assert event["event"] == "repeated_sql"
+    assert (event["route"], event["repeats"], event["sql_statements"]) == ("/n-plus-one", 5, 5)
+
+    caplog.clear()
+    app = make_app(session, slow_request_ms=0)
+    await get(app, "/n-plus-one")
+    assert json.loads(caplog.records[-1].getMessage())["event"] == "slow_request"
+    # Streamed responses take as long as the client does
+    caplog.clear()
+    await get(app, "/export")
+    assert caplog.records == []
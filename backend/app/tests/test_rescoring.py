@@ -0,0 +1,72 @@
+import pytest
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.future import select
+from sqlalchemy.orm import sessionmaker
+
+from app import crud, rescoring
+from app.bias_analyzer import LEXICON_VERSION, lexicon_terms
+from app.cache import response_cache
+from app.models import Article, ArticleTerm
+from app.rescoring import _candidate_filter, _score_chunk, diff_lexicons
+from app.schemas import ArticleCreate
+
+
+def test_diff_lexicons_finds_removed_regrouped_and_added_terms():
+    old = {"left": ["welfare", "secular"], "right": ["bjp", "development"]}
+    new = {"left": ["welfare", "development"], "right": ["bjp", "tax cuts"]}
+    stale, added = diff_lexicons(old, new)
+    assert stale == {"secular", "development"}
+    assert added == {"tax cuts"}
+
+
+def test_diff_lexicons_unchanged():
+    lexicon = {"left": ["welfare"], "right": ["bjp"]}
+    assert diff_lexicons(lexicon, lexicon) == (set(), set())
+
+
+def test_score_chunk_returns_scores_and_terms():
+    [(score, terms)] = _score_chunk([("BJP announces tax cuts", "")])
+    assert score == 100.0
+    assert terms == ["bjp", "tax cuts"]
+
+
+def test_candidate_filter_skips_terms_without_words():
+    assert _candidate_filter(set(), {"--", "!"}, "sqlite") is None
+
+
+@pytest.mark.asyncio
+async def test_rescore_changed_lexicon_only_touches_affected_articles(session, monkeypatch):
+    # The previous lexicon lacked "bjp" and had a term that has since been removed
+    old_terms = lexicon_terms()
+    old_terms["right"] = [term for term in old_terms["right"] if term != "bjp"]
+    old_terms["left"] = sorted(old_terms["left"] + ["obsolete term"])
+    await crud.save_bias_lexicon(session, "old", old_terms)
+    stored = {
+        "https://e/added": ("BJP announces tax cuts", ["tax cuts"]),
+        "https://e/removed": ("Obsolete term returns", ["obsolete term"]),
+        "https://e/unaffected": ("Monsoon arrives early", []),
+    }
+    ids = await crud.insert_articles(
+        session,
+        [
+            ArticleCreate(title=title, url=url, bias_score=42.0, bias_lexicon_version="old")
+            for url, (title, _) in stored.items()
+        ],
+        terms={url: terms for url, (_, terms) in stored.items()},
+    )
+    await session.commit()
+    monkeypatch.setattr(rescoring, "async_session", sessionmaker(session.bind, class_=AsyncSession, expire_on_commit=False))
+    monkeypatch.setattr(response_cache, "enabled", False)
+
+    report = await rescoring.rescore_stale_articles(workers=1)
+    assert (report.rescored, report.changed, report.relabelled) == (2, 2, 1)
+
+    session.expire_all()
+    result = await session.execute(select(Article.url, Article.bias_score, Article.bias_lexicon_version))
+    assert sorted(result.all()) == [
+        ("https://e/added", 100.0, LEXICON_VERSION),
+        ("https://e/removed", 0.0, LEXICON_VERSION),
+        ("https://e/unaffected", 42.0, LEXICON_VERSION),
+    ]
+    result = await session.execute(select(ArticleTerm.article_id, ArticleTerm.term).order_by(ArticleTerm.term))
+    assert result.all() == [(ids["https://e/added"], "bjp"), (ids["https://e/added"], "tax cuts")]
@@ -0,0 +1,74 @@
+from datetime import datetime, timedelta
+
+import pytest
+
+from app.core.config import settings
+from app.models import Source
+from app.scheduling import FetchOutcome, claim_due_sources, next_interval, publish_gap, record_fetch
+
+NOW = datetime(2024, 7, 23, 12, 0)
+
+
+def every(minutes: float, count: int = 10):
+    return [NOW - timedelta(minutes=minutes * n) for n in range(count)]
+
+
+def test_publish_gap_averages_recent_entries():
+    assert publish_gap(every(5)) == 300
+    assert publish_gap([NOW]) is None
+    assert publish_gap([]) is None
+
+
+def test_busy_feed_converges_to_minimum_interval():
+    interval = settings.FEED_DEFAULT_INTERVAL
+    for _ in range(10):
+        interval = next_interval(interval, FetchOutcome(new_articles=3, published=every(1)))
+    assert interval == settings.FEED_MIN_INTERVAL
+
+
+def test_interval_follows_publish_rate():
+    interval = next_interval(3600, FetchOutcome(new_articles=1, published=every(20)))
+    assert interval == pytest.approx(settings.FEED_INTERVAL_SMOOTHING * 1200 + (1 - settings.FEED_INTERVAL_SMOOTHING) * 3600)
+
+
+def test_empty_and_failed_fetches_back_off_up_to_maximum():
+    assert next_interval(600, FetchOutcome()) == 600 * settings.FEED_EMPTY_BACKOFF
+    assert next_interval(600, FetchOutcome(ok=False)) == 600 * settings.FEED_FAILURE_BACKOFF
+    assert next_interval(settings.FEED_MAX_INTERVAL, FetchOutcome(ok=False)) == settings.FEED_MAX_INTERVAL
+    assert next_interval(None, FetchOutcome()) == settings.FEED_DEFAULT_INTERVAL * settings.FEED_EMPTY_BACKOFF
+
+
+@pytest.mark.asyncio
+async def test_claim_due_sources_leases_each_source_once(session):
+    session.add_all([
+        Source(name="new", url="https://a.example", feed_url="https://a.example/rss"),
+        Source(name="due", url="https://b.example", feed_url="https://b.example/rss", next_fetch_at=NOW - timedelta(minutes=1)),
+        Source(name="later", url="https://c.example", feed_url="https://c.example/rss", next_fetch_at=NOW + timedelta(minutes=5)),
+        Source(name="inactive", url="https://d.example", feed_url="https://d.example/rss", is_active=False),
+        Source(name="no feed", url="https://e.example"),
+    ])
+    await session.commit()
+
+    assert await claim_due_sources(session, now=NOW) == [1, 2]
+    assert await claim_due_sources(session, now=NOW) == []
+    # The lease expires if the fetch never reports back
+    later = NOW + timedelta(seconds=settings.FEED_DISPATCH_LEASE)
+    assert await claim_due_sources(session, now=later) == [1, 2, 3]
+
+
+@pytest.mark.asyncio
+async def test_record_fetch_schedules_next_fetch(session):
+    source = Source(name="wire", url="https://a.example", feed_url="https://a.example/rss", fetch_interval=600)
+    session.add(source)
+    await session.commit()
+
+    interval = await record_fetch(session, source, FetchOutcome(ok=False), now=NOW)
+    await session.refresh(source)
+    assert source.fetch_interval == interval == 600 * settings.FEED_FAILURE_BACKOFF
+    assert source.next_fetch_at == NOW + timedelta(seconds=interval)
+    assert source.last_fetched_at == NOW
+    assert source.fetch_failures == 1
+
+    await record_fetch(session, source, FetchOutcome(new_articles=2, published=every(2)), now=NOW)
+    await session.refresh(source)
+    assert source.fetch_failures == 0
@@ -0,0 +1,45 @@
+import pytest
+from app import crud
+from app.schemas import ArticleCreate, ArticleFilter
+from app.search import START_SENTINEL, STOP_SENTINEL, _escape_headline, search_articles
+
+
+@pytest.mark.asyncio
+async def test_fallback_search_matches_all_words_with_filters(session):
+    await crud.create_articles(session, [
+        ArticleCreate(title="Union Budget unveiled", summary="Finance minister presents the budget", url="https://e/1", category="Business"),
+        ArticleCreate(title="Budget session of parliament", summary="Opposition walks out", url="https://e/2", category="Politics"),
+        ArticleCreate(title="Cricket", summary="India win by 50% margin", url="https://e/3", category="Sports"),
+    ])
+
+    results = await search_articles(session, "budget", ArticleFilter())
+    assert {article.url for article, _, _ in results} == {"https://e/1", "https://e/2"}
+
+    [(article, rank, highlight)] = await search_articles(session, "Budget finance", ArticleFilter(category="Business"))
+    assert article.url == "https://e/1"
+    assert highlight == "<mark>Finance</mark> minister presents the <mark>budget</mark>"
+
+    assert await search_articles(session, "100%", ArticleFilter()) == []
+
+
+@pytest.mark.asyncio
+async def test_highlight_escapes_publisher_markup(session):
+    await crud.create_articles(session, [
+        ArticleCreate(
+            title="Budget", url="https://e/1",
+            summary='Budget <script>alert("x")</script> & <b>budget</b> cuts',
+        ),
+    ])
+
+    [(_, _, highlight)] = await search_articles(session, "budget", ArticleFilter())
+    assert highlight == (
+        "<mark>Budget</mark> &lt;script&gt;alert(&quot;x&quot;)&lt;/script&gt; &amp; "
+        "&lt;b&gt;<mark>budget</mark>&lt;/b&gt; cuts"
+    )
+    # Matched against the raw text, not inside the escaped entities
+    assert await search_articles(session, "amp", ArticleFilter()) == []
+
+
+def test_postgres_headline_is_escaped_around_its_sentinels():
+    headline = f"{START_SENTINEL}Budget{STOP_SENTINEL} <img src=x onerror=alert(1)>"
+    assert _escape_headline(headline) == "<mark>Budget</mark> &lt;img src=x onerror=alert(1)&gt;"
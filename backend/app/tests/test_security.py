@@ -0,0 +1,55 @@
+from datetime import timedelta
+
+import pytest
+from passlib.context import CryptContext
+
+from app.api import deps
+from app.core.security import create_access_token, hash_password, user_cache, verify_password
+from app.core.ttl_cache import TTLCache
+from app.models import User
+
+
+def test_ttl_cache_evicts_least_recently_used_and_expired():
+    cache = TTLCache(maxsize=2, ttl=60)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    cache.get("a")
+    cache.set("c", 3)
+    assert cache.get("b") is None
+    assert cache.get("a") == 1
+
+    # An expiry in the past drops the entry immediately
+    cache.set("d", 4, expires_at=0)
+    assert cache.get("d") is None
+
+
+@pytest.mark.asyncio
+async def test_principal_is_built_from_token_claims_without_a_lookup():
+    user = User(id=7, email="admin@example.com", hashed_password="x", is_superuser=True)
+    token = create_access_token(user, expires_delta=timedelta(minutes=5))
+
+    # No session: resolving the principal must not touch the database
+    principal = await deps.get_current_principal(session=None, token=token)
+    assert (principal.id, principal.email, principal.is_superuser) == (7, "admin@example.com", True)
+
+
+@pytest.mark.asyncio
+async def test_current_user_is_served_from_cache():
+    user = User(id=8, email="reader@example.com", hashed_password="x")
+    token = create_access_token(user, expires_delta=timedelta(minutes=5))
+    user_cache.set(user.email, user)
+    try:
+        assert await deps.get_current_user(session=None, token=token) is user
+    finally:
+        user_cache.invalidate(user.email)
+
+
+@pytest.mark.asyncio
+async def test_password_with_outdated_cost_is_rehashed():
+    old_hash = CryptContext(schemes=["bcrypt"], bcrypt__rounds=4).hash("secret")
+    valid, new_hash = await verify_password("secret", old_hash)
+    assert valid and new_hash is not None
+
+    valid, new_hash = await verify_password("secret", await hash_password("secret"))
+    assert valid and new_hash is None
+    assert (await verify_password("wrong", old_hash))[0] is False
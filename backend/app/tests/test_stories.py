@@ -0,0 +1,115 @@
+import asyncio
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+from sqlalchemy.future import select
+from sqlalchemy.orm import sessionmaker
+from sqlmodel import SQLModel
+
+from app.crud import get_stories, get_story_coverage, insert_articles
+from app.models import Article, Source, Story
+from app.schemas import ArticleCreate
+from app.stories import StoryIndex
+
+NOW = datetime.utcnow()
+
+BUDGET = [
+    ("Budget 2024: Nirmala Sitharaman announces income tax relief for middle class",
+     "The finance minister presented the union budget in parliament on Thursday announcing tax relief."),
+    ("Union Budget 2024 brings income tax relief for middle class, says Sitharaman",
+     "Finance Minister Nirmala Sitharaman presented the budget offering relief on income tax."),
+]
+CRICKET = ("India beat Australia by 6 wickets in first ODI at Mohali", "Shubman Gill scored a century as India chased down the target.")
+
+
+def article(url: str, title: str, summary: str, source_id: int, bias_score: float = 0.0) -> ArticleCreate:
+    return ArticleCreate(title=title, summary=summary, url=url, published_at=NOW, source_id=source_id, bias_score=bias_score)
+
+
+async def ingest(session, index: StoryIndex, articles):
+    await index.sync(session)
+    inserted = await insert_articles(session, articles)
+    stories = await index.assign(session, [(inserted[a.url], a) for a in articles if a.url in inserted])
+    await session.commit()
+    return {url: stories[article_id] for url, article_id in inserted.items()}
+
+
+@pytest.mark.asyncio
+async def test_articles_about_the_same_event_share_a_story(session):
+    session.add_all([Source(id=1, name="The Hindu", url="h"), Source(id=2, name="NDTV", url="n")])
+    await session.commit()
+    index = StoryIndex()
+
+    first = await ingest(session, index, [article("h/1", *BUDGET[0], source_id=1, bias_score=-20), article("h/2", *CRICKET, source_id=1)])
+    second = await ingest(session, index, [article("n/1", *BUDGET[1], source_id=2, bias_score=40)])
+    assert second["n/1"] == first["h/1"] != first["h/2"]
+
+    [story] = await get_stories(session, min_sources=2)
+    assert (story.article_count, story.source_count) == (2, 2)
+    coverage = (await get_story_coverage(session, [story.id]))[story.id]
+    assert {(item["source_name"], item["avg_bias_score"]) for item in coverage} == {("The Hindu", -20.0), ("NDTV", 40.0)}
+
+    # A fresh index (e.g. after a restart) is rebuilt from the stored signatures
+    restarted = StoryIndex()
+    assert await restarted.sync(session) == 3
+    signature = restarted.hasher.signature(["sitharaman", "budget", "income", "tax", "relief", "middle", "class"])
+    assert restarted.find(signature)[0] == story.id
+
+
+@pytest.mark.asyncio
+async def test_sync_picks_up_ids_committed_out_of_order(session):
+    index = StoryIndex(sync_overlap=10)
+    signature = index.hasher.signature(["budget", "tax", "relief"])
+
+    def stored(article_id: int) -> Article:
+        return Article(
+            id=article_id, title="Budget", url=f"u/{article_id}", published_at=NOW,
+            minhash=index.hasher.pack(signature), story_id=article_id,
+        )
+
+    session.add_all([stored(1), stored(3)])
+    await session.commit()
+    assert await index.sync(session) == 2
+    # Id 2 was allocated before 3 but its transaction committed later
+    session.add(stored(2))
+    await session.commit()
+    assert await index.sync(session) == 1
+    assert len(index) == 3
+
+
+@pytest.mark.asyncio
+async def test_concurrent_assigns_never_see_each_others_new_stories(tmp_path):
+    engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'stories.db'}")
+    async with engine.begin() as conn:
+        await conn.run_sync(SQLModel.metadata.create_all)
+    make_session = sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+    batches = [[article(f"s{n}/1", *BUDGET[n], source_id=n + 1)] for n in range(2)]
+    async with make_session() as session:
+        ids = await insert_articles(session, batches[0] + batches[1])
+        await session.commit()
+
+    index = StoryIndex()
+
+    async def assign(batch):
+        async with make_session() as session:
+            stories = await index.assign(session, [(ids[a.url], a) for a in batch])
+            await session.commit()
+            return stories
+
+    # Both start a story at the same time; neither may pick up the other's stand-in id
+    first, second = await asyncio.gather(assign(batches[0]), assign(batches[1]))
+    async with make_session() as session:
+        story_ids = set((await session.execute(select(Story.id))).scalars().all())
+    assert {*first.values(), *second.values()} <= story_ids
+    assert all(story_id > 0 for story_id in index._stories.values())
+    await engine.dispose()
+
+
+def test_old_articles_are_pruned_from_the_index():
+    index = StoryIndex(window_days=1)
+    signature = index.hasher.signature(["budget", "tax", "relief"])
+    index.add(1, signature, 10, NOW - timedelta(days=2))
+    index.add(2, signature, 20, NOW)
+    index.prune(NOW)
+    assert len(index) == 1 and index.find(signature)[0] == 20
@@ -0,0 +1,111 @@
+import asyncio
+import io
+import os
+
+import httpx
+import pytest
+from PIL import Image
+
+from app.thumbnails import ThumbnailCache, ThumbnailError, ThumbnailService, render, resolve_public
+
+# Test hostnames and the literal addresses they "resolve" to; the public-address check itself is real
+ADDRESSES = {"img.example": "93.184.216.34", "cdn.example": "93.184.216.35", "intranet.example": "10.0.0.5"}
+
+
+async def resolve(host: str, port: int) -> str:
+    return await resolve_public(ADDRESSES.get(host, host), port)
+
+
+def jpeg(width: int, height: int) -> bytes:
+    output = io.BytesIO()
+    Image.new("RGB", (width, height), "steelblue").save(output, "JPEG")
+    return output.getvalue()
+
+
+@pytest.mark.asyncio
+async def test_thumbnails_fetched_once_rendered_and_cached(tmp_path):
+    requests = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        requests.append(f"{request.url.scheme}://{request.headers['host']}{request.url.path}")
+        if request.url.path == "/missing.jpg":
+            return httpx.Response(404)
+        return httpx.Response(200, content=jpeg(1200, 800), headers={"Content-Type": "image/jpeg"})
+
+    service = ThumbnailService(
+        ThumbnailCache(str(tmp_path)), widths=[160, 320], transport=httpx.MockTransport(handler), resolve=resolve
+    )
+    url = "https://img.example/photo.jpg"
+
+    # Concurrent misses share one fetch, which renders every width
+    first, second = await asyncio.gather(service.get(url, 320, "webp"), service.get(url, 320, "webp"))
+    assert first == second
+    with Image.open(io.BytesIO(first)) as image:
+        assert (image.format, image.size) == ("WEBP", (320, 213))
+    with Image.open(io.BytesIO(await service.get(url, 160, "webp"))) as image:
+        assert image.size == (160, 106)
+    assert requests == [url]
+
+    with Image.open(io.BytesIO(await service.get(url, 320, "jpeg"))) as image:
+        assert image.format == "JPEG"
+    assert len(requests) == 2
+    assert await service.prewarm([url, url]) == 0
+
+    for _ in range(2):
+        with pytest.raises(ThumbnailError):
+            await service.get("https://img.example/missing.jpg", 160, "webp")
+    # Failures are not retried until THUMBNAIL_FAILURE_TTL has passed
+    assert requests.count("https://img.example/missing.jpg") == 1
+    await service.aclose()
+
+
+@pytest.mark.asyncio
+async def test_thumbnails_only_fetch_public_addresses(tmp_path):
+    requests = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        requests.append((request.url.host, request.headers["host"], request.extensions.get("sni_hostname")))
+        if request.url.path == "/moved.jpg":
+            return httpx.Response(302, headers={"Location": "https://cdn.example/photo.jpg"})
+        if request.url.path == "/metadata.jpg":
+            return httpx.Response(302, headers={"Location": "http://169.254.169.254/latest/meta-data/"})
+        return httpx.Response(200, content=jpeg(400, 300))
+
+    service = ThumbnailService(
+        ThumbnailCache(str(tmp_path)), widths=[160], transport=httpx.MockTransport(handler), resolve=resolve
+    )
+    # Redirects are followed hop by hop, connecting to the checked address
+    await service.get("https://img.example/moved.jpg", 160, "jpeg")
+    assert requests == [
+        ("93.184.216.34", "img.example", "img.example"), ("93.184.216.35", "cdn.example", "cdn.example"),
+    ]
+
+    requests.clear()
+    for url in (
+        "https://img.example/metadata.jpg", "http://intranet.example/logo.png", "http://127.0.0.1:6379/",
+        "http://[::1]/a.png", "file:///etc/passwd",
+    ):
+        with pytest.raises(ThumbnailError):
+            await service.get(url, 160, "jpeg")
+    assert requests == [("93.184.216.34", "img.example", "img.example")]
+    await service.aclose()
+
+
+def test_cache_evicts_least_recently_used(tmp_path):
+    cache = ThumbnailCache(str(tmp_path), max_bytes=150)
+    for age, key in enumerate(["cc.webp", "bb.webp", "aa.webp"]):
+        cache.put({key: b"x" * 40})
+        os.utime(cache.path(key), (1000 + age, 1000 + age))
+    # Reading it makes the oldest file the most recently used
+    assert cache.get("cc.webp") == b"x" * 40
+
+    cache.put({"dd.webp": b"x" * 40})
+    assert [cache.get(key) is not None for key in ("aa.webp", "bb.webp", "cc.webp", "dd.webp")] == [True, False, True, True]
+
+
+def test_render_refuses_oversized_images_before_decoding():
+    output = io.BytesIO()
+    Image.new("1", (9000, 5000)).save(output, "PNG")
+    assert len(output.getvalue()) < 100_000
+    with pytest.raises(ValueError):
+        render(output.getvalue(), [160], "webp", max_pixels=40_000_000)
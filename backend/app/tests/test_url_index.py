@@ -0,0 +1,30 @@
+import pytest
+from app.url_index import SeenUrlIndex, canonicalize_url
+
+
+def test_canonicalize_strips_tracking_and_normalises_host():
+    assert canonicalize_url(
+        "https://WWW.TheHindu.com:443/news/story.ece?utm_source=rss&utm_medium=feed&fbclid=abc#comments"
+    ) == "https://www.thehindu.com/news/story.ece"
+    # http-only publishers keep their scheme
+    assert canonicalize_url("HTTP://example.com:80/a?gclid=1") == "http://example.com/a"
+
+
+def test_canonicalize_keeps_content_params_sorted():
+    assert canonicalize_url("https://example.com/a?b=2&utm_campaign=x&a=1") == "https://example.com/a?a=1&b=2"
+    assert canonicalize_url("https://example.com:8443/a") == "https://example.com:8443/a"
+    # Generic names like ref may select content and are left alone
+    assert canonicalize_url("https://example.com/a?ref=2&utm_source=x") == "https://example.com/a?ref=2"
+
+
+def test_tracking_variants_compare_equal():
+    assert canonicalize_url("https://example.com/story?fbclid=abc") == canonicalize_url(
+        "https://example.com/story?utm_source=newsletter#top"
+    )
+
+
+@pytest.mark.asyncio
+async def test_seen_url_index_filters_known_urls():
+    index = SeenUrlIndex()
+    await index.add(["https://example.com/1"])
+    assert await index.unseen(["https://example.com/1", "https://example.com/2"]) == ["https://example.com/2"]
@@ -0,0 +1,43 @@
+import asyncio
+
+import pytest
+
+from app.db import session as db_session
+from app.worker_runtime import WorkerRuntime
+
+
+@pytest.fixture
+def runtime():
+    original = db_session.engine
+    runtime = WorkerRuntime(pool_size=2, max_overflow=0)
+    yield runtime
+    runtime.stop()
+    db_session.use_engine(original)
+    asyncio.set_event_loop(None)
+
+
+def test_tasks_share_one_loop_and_engine(runtime):
+    async def current_loop():
+        return asyncio.get_running_loop()
+
+    first = runtime.run(current_loop())
+    second = runtime.run(current_loop())
+    assert first is second is runtime.loop
+    assert db_session.engine is runtime.engine
+    assert db_session.async_session.kw["bind"] is runtime.engine
+    assert runtime.fetcher is runtime.fetcher
+
+
+def test_stop_closes_loop_and_forked_process_starts_over(runtime, monkeypatch):
+    runtime.start()
+    loop, engine = runtime.loop, runtime.engine
+
+    # A forked child sees a different pid and must not reuse the parent's loop or pool
+    monkeypatch.setattr("app.worker_runtime.os.getpid", lambda: -1)
+    assert not runtime.started
+    runtime.start()
+    assert runtime.loop is not loop and runtime.engine is not engine
+    loop.close()
+
+    runtime.stop()
+    assert runtime.loop is None and not runtime.started
@@ -0,0 +1,341 @@
+"""
+Thumbnail proxy for article images.
+
+Publishers' image_url values point at full-size, often multi-megabyte
+images on third-party hosts. ThumbnailService fetches each image once,
+resizes it to every THUMBNAIL_WIDTHS width, re-encodes it as WebP (or JPEG
+for clients that do not accept WebP) and keeps the results in a disk cache.
+Concurrent requests for an image that is being rendered wait for that render
+instead of fetching it again, and images that could not be fetched or
+decoded are not retried for THUMBNAIL_FAILURE_TTL.
+
+Cache files are named by a hash of the image URL, width, format and quality,
+so a rendered thumbnail never changes and can be served with a year-long,
+immutable Cache-Control. A hit touches the file's mtime; once the cache
+grows past THUMBNAIL_CACHE_MAX_BYTES the directory is scanned and the least
+recently used files are removed. The scan sees files written by every
+process sharing the directory (API and workers).
+
+image_url comes from publishers' feeds, so it is fetched only over http(s)
+from hosts that resolve to public addresses. The connection goes to the
+address that was checked, which rules out DNS rebinding. Redirects are
+followed by hand, and every hop is checked the same way, so neither a feed
+nor a redirect can point the server at loopback, private or link-local
+addresses (Redis, cloud metadata, internal services).
+"""
+import asyncio
+import hashlib
+import io
+import ipaddress
+import os
+import socket
+import threading
+import time
+from pathlib import Path
+from typing import Awaitable, Callable, Dict, Iterable, List, Optional, Tuple
+
+import httpx
+from PIL import Image, ImageOps
+
+from app.core.config import settings
+from app.metrics import Counter, Histogram
+
+# Eviction removes files until the cache is back under this share of the limit, so it does not run on every write
+EVICT_TO = 0.9
+
+FORMATS = {"webp": "image/webp", "jpeg": "image/jpeg"}
+
+MAX_REDIRECTS = 5
+
+THUMBNAIL_REQUESTS = Counter("thumbnail_requests", "Thumbnail requests by result (hit, miss, error).", ["result"])
+THUMBNAIL_RENDER_SECONDS = Histogram("thumbnail_render_seconds", "Time to fetch and render an image's thumbnails.")
+
+
+class ThumbnailError(Exception):
+    """The image could not be fetched or decoded."""
+
+
+async def resolve_public(host: str, port: int) -> str:
+    """
+    An address of host to connect to. Raises ValueError when host resolves
+    to any address that is not publicly routable.
+    """
+    infos = await asyncio.get_running_loop().getaddrinfo(host, port, type=socket.SOCK_STREAM)
+    addresses = [info[4][0] for info in infos]
+    for address in addresses:
+        # Scoped IPv6 addresses (fe80::1%eth0) are link-local anyway
+        if not ipaddress.ip_address(address.split("%")[0]).is_global:
+            raise ValueError(f"{host} resolves to non-public address {address}")
+    if not addresses:
+        raise ValueError(f"{host} does not resolve")
+    return addresses[0]
+
+
+def negotiate_format(accept: Optional[str]) -> str:
+    return "webp" if accept and "image/webp" in accept else "jpeg"
+
+
+def render(
+    original: bytes, widths: Iterable[int], format: str, quality: int = settings.THUMBNAIL_QUALITY,
+    max_pixels: int = settings.THUMBNAIL_MAX_PIXELS,
+) -> Dict[int, bytes]:
+    """
+    Encode original at each width (never upscaled). CPU-bound; run it in a thread.
+
+    Raises ValueError for images over max_pixels: a small, highly compressed
+    file can otherwise decode to gigabytes.
+    """
+    widths = sorted(set(widths), reverse=True)
+    with Image.open(io.BytesIO(original)) as image:
+        # Opening only reads the header; check the size before anything is decoded.
+        # (Pillow's own MAX_IMAGE_PIXELS check merely warns below twice its ~89M limit.)
+        if image.width * image.height > max_pixels:
+            raise ValueError(f"image is {image.width}x{image.height} pixels")
+        # JPEGs can be decoded at 1/2, 1/4 or 1/8 scale, far cheaper than decoding in full and then shrinking
+        image.draft("RGB", (widths[0], 1))
+        image = ImageOps.exif_transpose(image)
+        has_alpha = image.mode in ("RGBA", "LA") or (image.mode == "P" and "transparency" in image.info)
+        if format == "webp" and has_alpha:
+            image = image.convert("RGBA")
+        elif has_alpha:
+            background = Image.new("RGB", image.size, "white")
+            background.paste(image.convert("RGBA"), mask=image.convert("RGBA"))
+            image = background
+        else:
+            image = image.convert("RGB")
+
+        rendered = {}
+        for width in widths:
+            # Each size is resized from the previous, larger one
+            if image.width > width:
+                image = image.resize((width, max(1, round(image.height * width / image.width))), Image.LANCZOS, reducing_gap=3.0)
+            output = io.BytesIO()
+            if format == "webp":
+                image.save(output, "WEBP", quality=quality, method=4)
+            else:
+                image.save(output, "JPEG", quality=quality, optimize=True, progressive=True)
+            rendered[width] = output.getvalue()
+    return rendered
+
+
+class ThumbnailCache:
+    """Disk cache of rendered thumbnails, evicted least recently used first once over max_bytes."""
+
+    def __init__(self, directory: str = settings.THUMBNAIL_CACHE_DIR, max_bytes: int = settings.THUMBNAIL_CACHE_MAX_BYTES):
+        self.directory = Path(directory)
+        self.max_bytes = max_bytes
+        self._size: Optional[int] = None  # estimate; recounted by every eviction scan
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def key(image_url: str, width: int, format: str, quality: int = settings.THUMBNAIL_QUALITY) -> str:
+        digest = hashlib.sha256(f"{image_url}\n{width}\n{format}\n{quality}".encode()).hexdigest()
+        return f"{digest}.{format}"
+
+    def path(self, key: str) -> Path:
+        return self.directory / key[:2] / key
+
+    def get(self, key: str) -> Optional[bytes]:
+        path = self.path(key)
+        try:
+            data = path.read_bytes()
+            os.utime(path)  # mark as recently used
+        except FileNotFoundError:
+            return None
+        return data
+
+    def put(self, items: Dict[str, bytes]) -> None:
+        for key, data in items.items():
+            path = self.path(key)
+            path.parent.mkdir(parents=True, exist_ok=True)
+            # Written aside and renamed, so readers never see a partial file
+            temporary = path.with_name(f".{path.name}.{os.getpid()}.{threading.get_ident()}")
+            temporary.write_bytes(data)
+            os.replace(temporary, path)
+        with self._lock:
+            if self._size is None:
+                self._size = self._scan_size()
+            else:
+                self._size += sum(len(data) for data in items.values())
+            if self._size > self.max_bytes:
+                self._evict()
+
+    def _files(self) -> List[Tuple[str, os.stat_result]]:
+        files = []
+        for shard in self.directory.glob("??"):
+            for entry in os.scandir(shard):
+                if entry.is_file() and not entry.name.startswith("."):
+                    try:
+                        files.append((entry.path, entry.stat()))
+                    except FileNotFoundError:
+                        pass
+        return files
+
+    def _scan_size(self) -> int:
+        return sum(stat.st_size for _, stat in self._files())
+
+    def _evict(self) -> None:
+        files = sorted(self._files(), key=lambda item: item[1].st_mtime)
+        total = sum(stat.st_size for _, stat in files)
+        for path, stat in files:
+            if total <= self.max_bytes * EVICT_TO:
+                break
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+            total -= stat.st_size
+        self._size = total
+
+
+class ThumbnailService:
+    """
+    Fetches, renders and caches thumbnails. The HTTP client is created on
+    first use, on the event loop of the process using it.
+    """
+
+    def __init__(
+        self,
+        cache: Optional[ThumbnailCache] = None,
+        widths: Iterable[int] = settings.THUMBNAIL_WIDTHS,
+        max_source_bytes: int = settings.THUMBNAIL_MAX_SOURCE_BYTES,
+        timeout: float = settings.THUMBNAIL_FETCH_TIMEOUT,
+        failure_ttl: float = settings.THUMBNAIL_FAILURE_TTL,
+        transport: Optional[httpx.AsyncBaseTransport] = None,
+        resolve: Callable[[str, int], Awaitable[str]] = resolve_public,
+    ):
+        self.cache = cache or ThumbnailCache()
+        self.widths = sorted(widths)
+        self.max_source_bytes = max_source_bytes
+        self.timeout = timeout
+        self.failure_ttl = failure_ttl
+        self.transport = transport
+        self.resolve = resolve
+        self._client: Optional[httpx.AsyncClient] = None
+        self._inflight: Dict[str, "asyncio.Future[Dict[int, bytes]]"] = {}
+        self._failures: Dict[str, float] = {}  # image URL -> when it may be tried again
+
+    @property
+    def client(self) -> httpx.AsyncClient:
+        if self._client is None:
+            self._client = httpx.AsyncClient(
+                timeout=httpx.Timeout(self.timeout),
+                headers={"User-Agent": settings.FEED_USER_AGENT, "Accept": "image/*"},
+                # Every hop has to pass the address check, see _fetch
+                follow_redirects=False,
+                transport=self.transport,
+            )
+        return self._client
+
+    async def aclose(self) -> None:
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+    async def get(self, image_url: str, width: int, format: str) -> bytes:
+        """
+        The thumbnail of image_url at width (one of self.widths) in format.
+
+        Raises ThumbnailError when the image cannot be fetched or decoded.
+        """
+        data = await asyncio.to_thread(self.cache.get, ThumbnailCache.key(image_url, width, format))
+        if data is not None:
+            THUMBNAIL_REQUESTS.inc(result="hit")
+            return data
+        try:
+            rendered = await self._render_once(image_url, format)
+        except ThumbnailError:
+            THUMBNAIL_REQUESTS.inc(result="error")
+            raise
+        THUMBNAIL_REQUESTS.inc(result="miss")
+        return rendered[width]
+
+    async def prewarm(self, image_urls: Iterable[str], format: str = "webp") -> int:
+        """Render every width of each image not cached yet. Returns the number of images rendered."""
+        rendered = 0
+        for image_url in dict.fromkeys(image_urls):
+            key = ThumbnailCache.key(image_url, self.widths[-1], format)
+            if await asyncio.to_thread(self.cache.path(key).exists):
+                continue
+            try:
+                await self._render_once(image_url, format)
+                rendered += 1
+            except ThumbnailError:
+                pass
+        return rendered
+
+    async def _render_once(self, image_url: str, format: str) -> Dict[int, bytes]:
+        """Render and cache every width, sharing one render between concurrent callers."""
+        inflight_key = f"{format}:{image_url}"
+        inflight = self._inflight.get(inflight_key)
+        if inflight is not None:
+            return await asyncio.shield(inflight)
+
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[inflight_key] = future
+        try:
+            rendered = await self._render(image_url, format)
+            future.set_result(rendered)
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except Exception as e:
+            future.set_exception(e)
+            # Nobody may be waiting; retrieve it so asyncio doesn't log it as unhandled
+            future.exception()
+            raise
+        finally:
+            del self._inflight[inflight_key]
+        return rendered
+
+    async def _render(self, image_url: str, format: str) -> Dict[int, bytes]:
+        now = time.monotonic()
+        if self._failures.get(image_url, 0) > now:
+            raise ThumbnailError(f"{image_url} failed recently")
+        started = time.perf_counter()
+        try:
+            original = await self._fetch(image_url)
+            rendered = await asyncio.to_thread(render, original, self.widths, format)
+        except (httpx.HTTPError, asyncio.TimeoutError, OSError, ValueError, Image.DecompressionBombError) as e:
+            # OSError covers Pillow's UnidentifiedImageError and truncated images
+            if len(self._failures) > 10000:
+                self._failures = {url: until for url, until in self._failures.items() if until > now}
+            self._failures[image_url] = now + self.failure_ttl
+            raise ThumbnailError(f"{image_url}: {e!r}") from e
+        await asyncio.to_thread(
+            self.cache.put, {ThumbnailCache.key(image_url, width, format): data for width, data in rendered.items()}
+        )
+        THUMBNAIL_RENDER_SECONDS.observe(time.perf_counter() - started)
+        return rendered
+
+    async def _fetch(self, image_url: str) -> bytes:
+        url = httpx.URL(image_url)
+        for _ in range(MAX_REDIRECTS + 1):
+            if url.scheme not in ("http", "https") or not url.host:
+                raise ValueError(f"not an http(s) URL: {url}")
+            address = await self.resolve(url.host, url.port or (443 if url.scheme == "https" else 80))
+            # Connect to the checked address; Host and TLS server name stay those of the URL
+            request = self.client.build_request(
+                "GET", url.copy_with(host=address), headers={"Host": url.netloc.decode()},
+                extensions={"sni_hostname": url.host},
+            )
+            response = await self.client.send(request, stream=True)
+            try:
+                if response.is_redirect:
+                    url = url.join(response.headers["Location"])
+                    continue
+                response.raise_for_status()
+                length = response.headers.get("Content-Length")
+                if length and length.isdigit() and int(length) > self.max_source_bytes:
+                    raise ValueError(f"image is {length} bytes")
+                body = bytearray()
+                async for chunk in response.aiter_bytes():
+                    body += chunk
+                    if len(body) > self.max_source_bytes:
+                        raise ValueError(f"image is over {self.max_source_bytes} bytes")
+                return bytes(body)
+            finally:
+                await response.aclose()
+        raise ValueError(f"more than {MAX_REDIRECTS} redirects")
+
+thumbnails = ThumbnailService()
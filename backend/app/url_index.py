@@ -0,0 +1,120 @@
+"""
+URL canonicalisation and the ingest-side "seen URL" index.
+
+Feed entries whose canonical URL is already known are dropped before
+categorisation and bias scoring, so a fetch cycle only pays for enrichment
+on genuinely new stories. The index is an in-process set warmed from the
+articles table and can optionally be shared between workers through Redis.
+"""
+from datetime import datetime, timedelta
+from typing import Iterable, List, Optional, Set
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.future import select
+
+from app.core.config import settings
+from app.db.redis import redis_client
+from app.models import Article
+
+# Campaign and click identifiers. Kept deliberately narrow: the result is
+# stored as Article.url, so a generic name like `ref` or `cmp` that some
+# publisher uses to select content must survive canonicalisation.
+TRACKING_PARAMS = {"fbclid", "gclid", "dclid", "msclkid"}
+TRACKING_PREFIXES = ("utm_",)
+
+DEFAULT_PORTS = {"http": "80", "https": "443"}
+
+
+def _is_tracking_param(name: str) -> bool:
+    name = name.lower()
+    return name in TRACKING_PARAMS or name.startswith(TRACKING_PREFIXES)
+
+
+def canonicalize_url(url: str) -> str:
+    """
+    Normalise an article URL so tracking variants of the same link compare equal.
+
+    Lower-cases the scheme and host, drops default ports, fragments and
+    tracking query parameters (utm_*, fbclid, gclid, ...), and sorts whatever
+    query parameters remain. The scheme itself is kept: the result is the
+    stored link, and not every publisher serves https.
+    """
+    url = url.strip()
+    parts = urlsplit(url)
+    if not parts.scheme or not parts.netloc:
+        return url
+
+    scheme = parts.scheme.lower()
+    host = (parts.hostname or "").rstrip(".")
+    if parts.port and DEFAULT_PORTS.get(scheme) != str(parts.port):
+        host = f"{host}:{parts.port}"
+
+    query = [
+        (name, value)
+        for name, value in parse_qsl(parts.query, keep_blank_values=True)
+        if not _is_tracking_param(name)
+    ]
+    query.sort()
+
+    return urlunsplit((scheme, host, parts.path or "/", urlencode(query), ""))
+
+
+class SeenUrlIndex:
+    """
+    Set of canonical article URLs already stored.
+
+    Warmed from articles published within SEEN_URL_WARM_DAYS; older entries
+    that still appear in a feed simply fall through to the database's
+    ON CONFLICT check. When a Redis client is passed in, misses are checked
+    against (and new URLs written to) a shared Redis set as well.
+    """
+
+    def __init__(self, redis_key: str = "ingest:seen-urls"):
+        self.redis_key = redis_key
+        self._urls: Set[str] = set()
+        self.warmed = False
+
+    def __len__(self) -> int:
+        return len(self._urls)
+
+    def __contains__(self, url: str) -> bool:
+        return url in self._urls
+
+    async def warm(self, session: AsyncSession, days: int = settings.SEEN_URL_WARM_DAYS) -> None:
+        cutoff = datetime.utcnow() - timedelta(days=days)
+        result = await session.stream_scalars(
+            select(Article.url).where(Article.published_at >= cutoff).execution_options(yield_per=5000)
+        )
+        async for url in result:
+            self._urls.add(canonicalize_url(url))
+        self.warmed = True
+
+    async def unseen(self, urls: Iterable[str], redis=None) -> List[str]:
+        """Return the URLs (already canonical) not known to the index, in order."""
+        candidates = [url for url in urls if url not in self._urls]
+        if redis is None or not candidates:
+            return candidates
+
+        flags = await redis.smismember(self.redis_key, candidates)
+        fresh = []
+        for url, known in zip(candidates, flags):
+            if known:
+                self._urls.add(url)
+            else:
+                fresh.append(url)
+        return fresh
+
+    async def add(self, urls: Iterable[str], redis=None) -> None:
+        urls = list(urls)
+        self._urls.update(urls)
+        if redis is not None and urls:
+            await redis.sadd(self.redis_key, *urls)
+
+
+seen_urls = SeenUrlIndex()
+
+
+def get_shared_redis() -> Optional[object]:
+    """Redis client for the shared index, or None when sharing is disabled."""
+    return redis_client if settings.SEEN_URL_SHARED else None
@@ -0,0 +1,96 @@
+"""
+Process-scoped async runtime for Celery workers.
+
+Celery tasks are synchronous, but ingestion is async. Each worker process
+gets one event loop, one database engine sized for that process and one
+pooled feed client, created when the process starts and reused by every
+task it runs, then closed when it exits. Prefork children therefore never
+touch connections opened by the parent before the fork, and a task pays
+neither loop nor pool setup.
+
+Processes that never get the worker_process_init signal (solo pool, eager
+tasks, scripts) start the runtime lazily on their first task.
+"""
+import asyncio
+import logging
+import os
+from typing import Awaitable, Optional, TypeVar
+
+import httpx
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+from app.core.config import settings
+from app.db import session as db_session
+from app.fetcher import FeedFetcher
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+
+class WorkerRuntime:
+    """
+    Event loop, engine and feed client shared by the tasks of one process.
+
+    Args:
+        pool_size: Database connections kept open by this process
+        max_overflow: Extra connections allowed under bursts (fetch_all_feeds)
+        transport: Optional httpx transport for the feed client (tests, benchmarks)
+    """
+
+    def __init__(
+        self,
+        pool_size: int = settings.WORKER_DB_POOL_SIZE,
+        max_overflow: int = settings.WORKER_DB_MAX_OVERFLOW,
+        transport: Optional[httpx.AsyncBaseTransport] = None,
+    ):
+        self.pool_size = pool_size
+        self.max_overflow = max_overflow
+        self.transport = transport
+        self.loop: Optional[asyncio.AbstractEventLoop] = None
+        self.engine: Optional[AsyncEngine] = None
+        self._fetcher: Optional[FeedFetcher] = None
+        self._pid: Optional[int] = None
+
+    @property
+    def started(self) -> bool:
+        return self.loop is not None and self._pid == os.getpid()
+
+    @property
+    def fetcher(self) -> FeedFetcher:
+        """The process's pooled feed client, starting the runtime if needed."""
+        self.start()
+        return self._fetcher
+
+    def start(self) -> None:
+        if self.started:
+            return
+        # Inherited over fork: drop the parent's pool without closing its connections
+        db_session.engine.sync_engine.dispose(close=False)
+        self.loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(self.loop)
+        self.engine = db_session.make_engine(pool_size=self.pool_size, max_overflow=self.max_overflow)
+        db_session.use_engine(self.engine)
+        self._fetcher = self.loop.run_until_complete(FeedFetcher(transport=self.transport).__aenter__())
+        self._pid = os.getpid()
+        logger.info("Worker runtime started in process %d", self._pid)
+
+    def run(self, coroutine: Awaitable[T]) -> T:
+        """Run a task's coroutine to completion on this process's loop."""
+        self.start()
+        return self.loop.run_until_complete(coroutine)
+
+    def stop(self) -> None:
+        if not self.started:
+            return
+        try:
+            self.loop.run_until_complete(self._fetcher.aclose())
+            self.loop.run_until_complete(self.engine.dispose())
+            self.loop.run_until_complete(self.loop.shutdown_asyncgens())
+        finally:
+            self.loop.close()
+            self.loop = self.engine = self._fetcher = None
+            self._pid = None
+
+
+runtime = WorkerRuntime()
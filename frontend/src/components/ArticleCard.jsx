@@ -49,7 +49,10 @@ export default function ArticleCard({ article }) {
             {article.image_url && (
                 <div className="relative h-52 overflow-hidden bg-gradient-to-br from-gray-100 to-gray-200 dark:from-[#2d2d2d] dark:to-[#1a1a1a]">
                     <img
-                        src={article.image_url}
+                        src={`/api/v1/thumbnails/${article.id}?width=640`}
+                        srcSet={`/api/v1/thumbnails/${article.id}?width=320 320w, /api/v1/thumbnails/${article.id}?width=640 640w`}
+                        sizes="(min-width: 1024px) 33vw, (min-width: 768px) 50vw, 100vw"
+                        loading="lazy"
                         alt={article.title}
                         className="w-full h-full object-cover group-hover:scale-110 transition-transform duration-500"
                         onError={(e) => e.target.style.display = 'none'}
@@ -32,7 +32,8 @@ export default function SportsHighlights({ articles }) {
                         {article.image_url && (
                             <div className="absolute inset-0">
                                 <img
-                                    src={article.image_url}
+                                    src={`/api/v1/thumbnails/${article.id}?width=640`}
+                                    loading="lazy"
                                     alt={article.title}
                                     className="w-full h-full object-cover opacity-30 group-hover:opacity-40 transition-opacity duration-300"
                                     onError={(e) => e.target.style.display = 'none'}
@@ -7,9 +7,15 @@ import ArticleCard from '../components/ArticleCard'
 import ArticleSkeleton from '../components/ArticleSkeleton'
 import SportsHighlights from '../components/SportsHighlights'
 
+// Only the fields the cards use, with each source sent once rather than per article
+const ARTICLE_FIELDS = 'title,summary,url,published_at,image_url,category,bias_score'
+
 const fetchArticles = async () => {
-    const { data } = await axios.get('/api/v1/articles/')
-    return data
+    const { data } = await axios.get('/api/v1/articles/', {
+        params: { fields: ARTICLE_FIELDS, include: 'sources' }
+    })
+    const sources = Object.fromEntries(data.sources.map(source => [source.id, source]))
+    return data.articles.map(article => ({ ...article, source: sources[article.source_id] }))
 }
 
 export default function Home() {
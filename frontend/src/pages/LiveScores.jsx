@@ -1,8 +1,8 @@
 import { Trophy, ExternalLink, Clock, Tv, RefreshCw } from 'lucide-react'
 import { formatDistanceToNow } from 'date-fns'
-import { useQuery } from 'react-query'
+import { useQuery, useQueryClient } from 'react-query'
 import axios from 'axios'
-import { useState } from 'react'
+import { useEffect, useRef, useState } from 'react'
 
 // Fetch live scores from backend API
 const fetchLiveScores = async () => {
@@ -133,13 +133,56 @@ function ScoreCard({ match }) {
 
 export default function LiveScores() {
     const [autoRefresh, setAutoRefresh] = useState(true)
+    const [streaming, setStreaming] = useState(false)
+    // Whether the cached list came from the stream; otherwise it is polled or demo data
+    const fromStream = useRef(false)
+    const queryClient = useQueryClient()
 
-    // Fetch live scores with auto-refresh every 30 seconds
+    // Push only changed matches from the server; polling is the fallback while the stream is down
+    useEffect(() => {
+        if (!autoRefresh || typeof EventSource === 'undefined') return
+
+        const source = new EventSource('/api/v1/sports/live-scores/stream')
+        source.addEventListener('snapshot', (event) => {
+            const { matches } = JSON.parse(event.data)
+            fromStream.current = matches.length > 0
+            setStreaming(matches.length > 0)
+            if (matches.length > 0) queryClient.setQueryData('liveScores', matches)
+        })
+        source.addEventListener('update', (event) => {
+            const { changed, removed } = JSON.parse(event.data)
+            // Never merge real matches into the demo list shown while nothing was live
+            const replace = !fromStream.current
+            fromStream.current = true
+            setStreaming(true)
+            queryClient.setQueryData('liveScores', (current = []) => {
+                if (replace) return changed
+                const updated = new Map(changed.map(match => [match.id, match]))
+                const kept = current
+                    .filter(match => !removed.includes(match.id))
+                    .map(match => updated.get(match.id) || match)
+                const added = changed.filter(match => !current.some(existing => existing.id === match.id))
+                return [...kept, ...added]
+            })
+        })
+        source.onerror = () => {
+            fromStream.current = false
+            setStreaming(false)
+        }
+
+        return () => {
+            source.close()
+            fromStream.current = false
+            setStreaming(false)
+        }
+    }, [autoRefresh, queryClient])
+
+    // Fetch live scores, polling every 30 seconds unless the stream is delivering updates
     const { data: liveScores, isLoading, error, refetch } = useQuery(
         'liveScores',
         fetchLiveScores,
         {
-            refetchInterval: autoRefresh ? 30000 : false, // Refresh every 30 seconds
+            refetchInterval: autoRefresh && !streaming ? 30000 : false, // Refresh every 30 seconds
             refetchIntervalInBackground: true,
         }
     )
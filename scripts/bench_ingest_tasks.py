@@ -0,0 +1,106 @@
+"""
+Throughput of many small ingest tasks.
+
+Runs TASKS fetch_source tasks (ITEMS new entries each, spread over SOURCES
+sources, feeds served in-process) two ways:
+
+  per-task  a fresh event loop, engine and feed client for every task,
+            which is what a task has to do when it cannot reuse them
+  runtime   the worker's process-scoped loop, engine and feed client
+
+Uses BENCH_DATABASE_URI (default: a throwaway SQLite file), never the
+configured database, because it creates sources and articles.
+"""
+import asyncio
+import contextlib
+import hashlib
+import io
+import itertools
+import logging
+import os
+import sys
+import time
+from datetime import datetime
+
+# Add /app to path so we can import app modules
+sys.path.append('/app')
+
+os.environ["SQLALCHEMY_DATABASE_URI"] = os.environ.get("BENCH_DATABASE_URI", "sqlite+aiosqlite:////tmp/bench_ingest.db")
+os.environ.setdefault("RESPONSE_CACHE_ENABLED", "false")
+
+import httpx
+
+from app.db import session as db_session
+from app.fetcher import FeedFetcher
+from app.models import Source
+from app.tasks import fetch_source_async
+from app.worker_runtime import WorkerRuntime
+
+TASKS = int(os.environ.get("TASKS", "200"))
+SOURCES = int(os.environ.get("SOURCES", "20"))
+ITEMS = int(os.environ.get("ITEMS", "3"))
+
+_counter = itertools.count()
+
+
+def title(n: int) -> str:
+    # Unrelated titles, so every article starts its own story
+    digest = hashlib.sha1(str(n).encode()).hexdigest()
+    return " ".join("w" + digest[i:i + 6] for i in range(0, 36, 6))
+
+
+def feed(request: httpx.Request) -> httpx.Response:
+    now = datetime.utcnow().strftime("%a, %d %b %Y %H:%M:%S GMT")
+    items = "".join(
+        f"<item><title>{title(n)}</title><link>https://bench.invalid/{n}</link>"
+        f"<pubDate>{now}</pubDate></item>"
+        for n in (next(_counter) for _ in range(ITEMS))
+    )
+    return httpx.Response(200, content=f"<rss><channel><title>bench</title>{items}</channel></rss>".encode())
+
+
+async def create_sources() -> list:
+    await db_session.init_db()
+    async with db_session.async_session() as session:
+        sources = [
+            Source(name=f"Bench {n}", url=f"https://bench.invalid/{n}", feed_url=f"https://bench.invalid/feed/{n}")
+            for n in range(SOURCES)
+        ]
+        session.add_all(sources)
+        await session.commit()
+        return [source.id for source in sources]
+
+
+async def per_task(source_id: int) -> None:
+    engine = db_session.make_engine()
+    db_session.use_engine(engine)
+    try:
+        async with FeedFetcher(transport=httpx.MockTransport(feed)) as fetcher:
+            await fetch_source_async(source_id, fetcher)
+    finally:
+        await engine.dispose()
+
+
+def bench(name: str, run_task, source_ids: list) -> None:
+    started = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        for n in range(TASKS):
+            run_task(source_ids[n % len(source_ids)])
+    elapsed = time.perf_counter() - started
+    print(f"{name:<10} {TASKS} tasks in {elapsed:6.2f}s   {TASKS / elapsed:7.1f} tasks/s   {elapsed / TASKS * 1000:6.1f} ms/task")
+
+
+def bench_ingest_tasks():
+    logging.disable(logging.WARNING)
+    source_ids = asyncio.run(create_sources())
+
+    bench("per-task", lambda source_id: asyncio.run(per_task(source_id)), source_ids)
+
+    runtime = WorkerRuntime(transport=httpx.MockTransport(feed))
+    try:
+        bench("runtime", lambda source_id: runtime.run(fetch_source_async(source_id, runtime.fetcher)), source_ids)
+    finally:
+        runtime.stop()
+
+if __name__ == "__main__":
+    bench_ingest_tasks()
@@ -0,0 +1,62 @@
+"""
+Article-list latency while a burst of logins is in flight.
+
+Runs against a live API (defaults to http://localhost:8000/api/v1, override
+with API_URL) using the test user from create_test_user.py. It samples
+GET /articles/ on its own, then again while LOGINS concurrent logins are
+running. With password hashing off the event loop both should look the same.
+"""
+import asyncio
+import os
+import statistics
+import time
+
+import httpx
+
+API_URL = os.environ.get("API_URL", "http://localhost:8000/api/v1")
+EMAIL = os.environ.get("BENCH_EMAIL", "admin@example.com")
+PASSWORD = os.environ.get("BENCH_PASSWORD", "admin")
+LOGINS = int(os.environ.get("LOGINS", "50"))
+SAMPLES = int(os.environ.get("SAMPLES", "40"))
+
+
+async def sample_articles(client: httpx.AsyncClient, count: int) -> list:
+    latencies = []
+    for _ in range(count):
+        started = time.perf_counter()
+        response = await client.get("/articles/", params={"limit": 20}, headers={"Cache-Control": "no-cache"})
+        response.raise_for_status()
+        latencies.append((time.perf_counter() - started) * 1000)
+        await asyncio.sleep(0.01)
+    return latencies
+
+
+async def login(client: httpx.AsyncClient) -> float:
+    started = time.perf_counter()
+    response = await client.post("/login/access-token", data={"username": EMAIL, "password": PASSWORD})
+    response.raise_for_status()
+    return (time.perf_counter() - started) * 1000
+
+
+def summary(name: str, latencies: list) -> str:
+    ordered = sorted(latencies)
+    p95 = ordered[int(len(ordered) * 0.95) - 1]
+    return f"{name:<28} p50 {statistics.median(ordered):7.1f} ms   p95 {p95:7.1f} ms   max {ordered[-1]:7.1f} ms"
+
+
+async def bench_login_latency():
+    limits = httpx.Limits(max_connections=LOGINS + 10)
+    async with httpx.AsyncClient(base_url=API_URL, timeout=120, limits=limits) as client:
+        await login(client)
+        idle = await sample_articles(client, SAMPLES)
+
+        logins = asyncio.gather(*(login(client) for _ in range(LOGINS)))
+        busy = await sample_articles(client, SAMPLES)
+        login_latencies = await logins
+
+    print(summary("GET /articles (idle)", idle))
+    print(summary(f"GET /articles ({LOGINS} logins)", busy))
+    print(summary("POST /login/access-token", login_latencies))
+
+if __name__ == "__main__":
+    asyncio.run(bench_login_latency())
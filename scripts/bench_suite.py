@@ -0,0 +1,313 @@
+"""
+Performance baseline for enrichment, ingestion and the API hot paths.
+
+    python scripts/bench_suite.py [micro] [ingest] [api] [--output FILE] [--compare FILE]
+
+micro   categorize_article, calculate_bias_score, get_bias_percentage and
+        feed entry extraction (entry_to_article) over a generated corpus
+ingest  fetch_all_feeds_async against a local fixture RSS server with
+        SOURCES feeds x 50 entries: a cold run storing every entry, then a
+        warm run in which every entry is already known
+api     concurrent GET /api/v1/articles/ and /api/v1/sources/ through the
+        ASGI app, with the response cache off so every request hits the
+        database (API_URL benchmarks a running server instead)
+
+Latencies are reported as p50/p95/p99, throughput as rows/sec. Without
+arguments all three run. Results are written to JSON together with the git
+commit, and --compare prints each number next to an earlier results file.
+
+Uses BENCH_DATABASE_URI (default: a fresh SQLite file), never the
+configured database, because it creates sources and articles.
+"""
+import argparse
+import asyncio
+import json
+import logging
+import os
+import platform
+import random
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime, timedelta
+from email.utils import format_datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# Add /app to path so we can import app modules
+sys.path.append('/app')
+
+os.environ["SQLALCHEMY_DATABASE_URI"] = os.environ.get(
+    "BENCH_DATABASE_URI", f"sqlite+aiosqlite:///{tempfile.mkdtemp(prefix='bench-')}/bench.db"
+)
+os.environ.setdefault("RESPONSE_CACHE_ENABLED", "false")
+
+import feedparser
+import httpx
+from sqlalchemy import func
+from sqlalchemy.future import select
+
+from app.bias_analyzer import calculate_bias_score, get_bias_percentage, lexicon_terms
+from app.categories import CATEGORY_KEYWORDS
+from app.db.session import async_session, init_db
+from app.models import Article, Source
+from app.tasks import categorize_article, entry_to_article, fetch_all_feeds_async
+
+SOURCES = int(os.environ.get("SOURCES", "20"))
+ENTRIES = int(os.environ.get("ENTRIES", "50"))
+MICRO_ITEMS = int(os.environ.get("MICRO_ITEMS", "2000"))
+REQUESTS = int(os.environ.get("REQUESTS", "500"))
+CONCURRENCY = int(os.environ.get("CONCURRENCY", "20"))
+API_URL = os.environ.get("API_URL")
+
+SUITES = ["micro", "ingest", "api"]
+
+FILLER = "the minister said on state government city police court report plan new week people".split()
+
+
+def percentiles(samples: list, scale: float = 1.0) -> dict:
+    ordered = sorted(samples)
+    if not ordered:
+        return {}
+
+    def rank(p):
+        return ordered[min(len(ordered) - 1, max(0, int(round(p / 100 * len(ordered))) - 1))] * scale
+
+    return {"p50": round(rank(50), 3), "p95": round(rank(95), 3), "p99": round(rank(99), 3)}
+
+
+class Corpus:
+    """Deterministic headlines mixing category keywords, lexicon terms and filler."""
+
+    def __init__(self, seed: int = 42):
+        self.random = random.Random(seed)
+        self.keywords = [keyword for keywords in CATEGORY_KEYWORDS.values() for keyword in keywords]
+        self.terms = [term for terms in lexicon_terms().values() for term in terms]
+
+    def text(self, words: int) -> str:
+        choices = []
+        for _ in range(words):
+            roll = self.random.random()
+            pool = self.keywords if roll < 0.15 else self.terms if roll < 0.25 else FILLER
+            choices.append(self.random.choice(pool))
+        return " ".join(choices).capitalize()
+
+    def items(self, count: int) -> list:
+        return [(self.text(10), self.text(40)) for _ in range(count)]
+
+
+def rss(source: int, run: str, entries: int = ENTRIES) -> bytes:
+    corpus = Corpus(seed=source)
+    now = datetime.utcnow()
+    items = []
+    for n, (title, summary) in enumerate(corpus.items(entries)):
+        published = format_datetime(now - timedelta(minutes=7 * n)).replace("-0000", "GMT")
+        items.append(
+            f"<item><title>{title}</title><link>https://bench.invalid/{run}/{source}/{n}</link>"
+            f"<description>{summary}</description><pubDate>{published}</pubDate>"
+            f'<media:content url="https://bench.invalid/{run}/{source}/{n}.jpg" /></item>'
+        )
+    return (
+        '<rss version="2.0" xmlns:media="http://search.yahoo.com/mrss/"><channel><title>Bench</title>'
+        + "".join(items) + "</channel></rss>"
+    ).encode()
+
+
+def time_calls(function, inputs: list) -> dict:
+    latencies = []
+    started = time.perf_counter()
+    for args in inputs:
+        call_started = time.perf_counter_ns()
+        function(*args)
+        latencies.append(time.perf_counter_ns() - call_started)
+    elapsed = time.perf_counter() - started
+    return {"calls": len(inputs), "ops_per_sec": round(len(inputs) / elapsed, 1), "latency_us": percentiles(latencies, 1 / 1000)}
+
+
+def bench_micro() -> dict:
+    items = Corpus().items(MICRO_ITEMS)
+    scores = [calculate_bias_score(title, summary) for title, summary in items]
+    entries = feedparser.parse(rss(0, "micro", MICRO_ITEMS)).entries
+    return {
+        "micro.categorize_article": time_calls(categorize_article, items),
+        "micro.calculate_bias_score": time_calls(calculate_bias_score, items),
+        "micro.get_bias_percentage": time_calls(get_bias_percentage, [(score,) for score in scores]),
+        "micro.entry_to_article": time_calls(entry_to_article, [(entry, entry.link, 1) for entry in entries]),
+    }
+
+
+class FixtureFeeds:
+    """Local HTTP server serving /feed/<n> for n in range(sources)."""
+
+    def __init__(self, run: str):
+        feeds = {f"/feed/{n}": rss(n, run) for n in range(SOURCES)}
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                body = feeds.get(self.path)
+                self.send_response(200 if body else 404)
+                self.send_header("Content-Type", "application/rss+xml")
+                self.send_header("Content-Length", str(len(body or b"")))
+                self.end_headers()
+                self.wfile.write(body or b"")
+
+            def log_message(self, *args):
+                pass
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.url = f"http://127.0.0.1:{self.server.server_port}"
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+
+    def close(self):
+        self.server.shutdown()
+
+
+async def count_articles() -> int:
+    async with async_session() as session:
+        return (await session.execute(select(func.count(Article.id)))).scalar_one()
+
+
+async def bench_ingest() -> dict:
+    run = datetime.utcnow().strftime("%Y%m%d%H%M%S%f")
+    feeds = FixtureFeeds(run)
+    try:
+        await init_db()
+        async with async_session() as session:
+            session.add_all(
+                Source(name=f"Bench {run} {n}", url=f"https://bench.invalid/{n}", feed_url=f"{feeds.url}/feed/{n}")
+                for n in range(SOURCES)
+            )
+            await session.commit()
+
+        results = {}
+        for name in ("cold", "warm"):
+            before = await count_articles()
+            started = time.perf_counter()
+            await fetch_all_feeds_async()
+            elapsed = time.perf_counter() - started
+            stored = await count_articles() - before
+            results[f"ingest.{name}"] = {
+                "sources": SOURCES,
+                "entries": SOURCES * ENTRIES,
+                "stored": stored,
+                "seconds": round(elapsed, 3),
+                "entries_per_sec": round(SOURCES * ENTRIES / elapsed, 1),
+                "rows_per_sec": round(stored / elapsed, 1),
+            }
+        return results
+    finally:
+        feeds.close()
+
+
+async def load(client: httpx.AsyncClient, path: str, params: dict) -> dict:
+    latencies, rows = [], 0
+    queue = asyncio.Queue()
+    for _ in range(REQUESTS):
+        queue.put_nowait(None)
+
+    async def worker():
+        nonlocal rows
+        while not queue.empty():
+            queue.get_nowait()
+            started = time.perf_counter()
+            response = await client.get(path, params=params)
+            latencies.append(time.perf_counter() - started)
+            response.raise_for_status()
+            rows += len(response.json())
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(CONCURRENCY)))
+    elapsed = time.perf_counter() - started
+    return {
+        "requests": REQUESTS,
+        "concurrency": CONCURRENCY,
+        "requests_per_sec": round(REQUESTS / elapsed, 1),
+        "rows_per_sec": round(rows / elapsed, 1),
+        "latency_ms": percentiles(latencies, 1000),
+    }
+
+
+async def bench_api() -> dict:
+    if API_URL:
+        client = httpx.AsyncClient(base_url=API_URL, timeout=60)
+    else:
+        from app.main import app
+
+        if not await count_articles():
+            await bench_ingest()
+        client = httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://bench/api/v1", timeout=60)
+    async with client:
+        return {
+            "api.articles": await load(client, "/articles/", {"limit": 50}),
+            "api.sources": await load(client, "/sources/", {}),
+        }
+
+
+def git_commit() -> str:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def flatten(result: dict, prefix: str = "") -> dict:
+    values = {}
+    for key, value in result.items():
+        if isinstance(value, dict):
+            values.update(flatten(value, f"{prefix}{key}."))
+        elif isinstance(value, (int, float)):
+            values[f"{prefix}{key}"] = value
+    return values
+
+
+def compare(baseline: dict, current: dict) -> None:
+    print(f"\nAgainst {baseline.get('commit', '?')} ({baseline.get('timestamp', '?')}):")
+    old, new = flatten(baseline["results"]), flatten(current["results"])
+    for key in sorted(new):
+        if key in old and old[key]:
+            change = (new[key] - old[key]) / old[key] * 100
+            print(f"  {key:<48} {old[key]:>12} -> {new[key]:>12}  {change:+6.1f}%")
+
+
+async def run(suites: list) -> dict:
+    results = {}
+    if "micro" in suites:
+        results.update(bench_micro())
+    if "ingest" in suites:
+        results.update(await bench_ingest())
+    if "api" in suites:
+        results.update(await bench_api())
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("suites", nargs="*", metavar="{micro,ingest,api}")
+    parser.add_argument("--output", default="bench-results.json")
+    parser.add_argument("--compare", help="earlier results file to compare against")
+    args = parser.parse_args()
+    suites = args.suites or SUITES
+    unknown = set(suites) - set(SUITES)
+    if unknown:
+        parser.error(f"unknown suite(s): {', '.join(sorted(unknown))}")
+
+    logging.disable(logging.WARNING)
+    results = asyncio.run(run(suites))
+    report = {
+        "commit": git_commit(),
+        "timestamp": datetime.utcnow().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "database": os.environ["SQLALCHEMY_DATABASE_URI"].split(":", 1)[0],
+        "results": results,
+    }
+    with open(args.output, "w") as f:
+        json.dump(report, f, indent=2)
+    print(json.dumps(results, indent=2))
+    print(f"\nWrote {args.output}")
+    if args.compare:
+        with open(args.compare) as f:
+            compare(json.load(f), report)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,17 @@
+import asyncio
+import sys
+import time
+
+# Add /app to path so we can import app modules
+sys.path.append('/app')
+
+from app.analytics import rebuild_bias_rollups
+
+async def rebuild():
+    print("Rebuilding bias rollups from stored articles...")
+    started = time.perf_counter()
+    counted = await rebuild_bias_rollups()
+    print(f"Counted {counted} articles in {time.perf_counter() - started:.1f}s")
+
+if __name__ == "__main__":
+    asyncio.run(rebuild())
@@ -0,0 +1,21 @@
+import asyncio
+import sys
+import time
+
+# Add /app to path so we can import app modules
+sys.path.append('/app')
+
+from app.rescoring import rescore_stale_articles
+
+async def rescore_bias():
+    print("Rescoring articles against the current bias lexicon...")
+    started = time.perf_counter()
+    report = await rescore_stale_articles()
+    elapsed = time.perf_counter() - started
+    print(f"Lexicon version: {report.version}")
+    print(f"Rescored: {report.rescored} ({report.changed} scores changed)")
+    print(f"Unaffected, version bumped: {report.relabelled}")
+    print(f"Done in {elapsed:.1f}s")
+
+if __name__ == "__main__":
+    asyncio.run(rescore_bias())
@@ -0,0 +1,96 @@
+"""
+Local stand-in for a live score provider.
+
+Serves GET /matches as a JSON list in the shape of /sports/live-scores/demo,
+with scores that move on as time passes: a ball is bowled every BALL_SECONDS
+and the football match sees an occasional goal. Point the backend at it with
+
+    LIVE_SCORE_PROVIDERS=stub LIVE_SCORE_STUB_URL=http://localhost:9000/matches
+"""
+import json
+import os
+import random
+import time
+from datetime import datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+PORT = int(os.environ.get("PORT", "9000"))
+BALL_SECONDS = float(os.environ.get("BALL_SECONDS", "6"))
+STARTED = time.monotonic()
+
+
+def cricket_state(balls: int):
+    rng = random.Random(1)
+    runs = wickets = 0
+    for _ in range(balls):
+        outcome = rng.choices([0, 1, 2, 4, 6, "W"], weights=[35, 35, 10, 12, 5, 3])[0]
+        if outcome == "W":
+            wickets = min(wickets + 1, 10)
+        else:
+            runs += outcome
+    return runs, wickets, f"{balls // 6}.{balls % 6}"
+
+
+def football_goals(minute: int):
+    rng = random.Random(2)
+    home = away = 0
+    for _ in range(minute):
+        roll = rng.random()
+        if roll < 0.015:
+            home += 1
+        elif roll < 0.03:
+            away += 1
+    return home, away
+
+
+def matches():
+    ticks = int((time.monotonic() - STARTED) / BALL_SECONDS)
+    runs, wickets, overs = cricket_state(min(ticks, 120))
+    minute = min(ticks, 90)
+    home, away = football_goals(minute)
+    now = datetime.now().isoformat()
+    return [
+        {
+            "id": "stub_cricket_1",
+            "sport": "Cricket",
+            "league": "Stub Premier League",
+            "status": "LIVE",
+            "team1": {"name": "Mumbai Indians", "short": "MI", "score": f"{runs}/{wickets}", "overs": overs},
+            "team2": {"name": "Chennai Super Kings", "short": "CSK", "score": "", "overs": ""},
+            "venue": "Wankhede Stadium, Mumbai",
+            "detailsUrl": "https://www.espncricinfo.com",
+            "isLive": ticks < 120,
+            "lastUpdated": now,
+        },
+        {
+            "id": "stub_football_1",
+            "sport": "Football",
+            "league": "Stub League",
+            "status": "LIVE",
+            "team1": {"name": "Manchester United", "short": "MUN", "score": str(home)},
+            "team2": {"name": "Liverpool", "short": "LIV", "score": str(away)},
+            "time": f"{minute}'",
+            "venue": "Old Trafford",
+            "detailsUrl": "https://www.premierleague.com",
+            "isLive": minute < 90,
+            "lastUpdated": now,
+        },
+    ]
+
+
+class Handler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path.split("?")[0] != "/matches":
+            self.send_error(404)
+            return
+        body = json.dumps(matches()).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+if __name__ == "__main__":
+    print(f"Stub score provider on http://localhost:{PORT}/matches")
+    ThreadingHTTPServer(("", PORT), Handler).serve_forever()
@@ -1,16 +1,56 @@
+"""
+Manual feed ingestion.
+
+    python trigger_fetch.py                  fetch and ingest every source now
+    python trigger_fetch.py record ARCHIVE   append every source's raw feed to a .jsonl.gz archive, without ingesting
+    python trigger_fetch.py replay PATH      ingest an archive, or a dump directory of <source_id>/*.xml files,
+                                             offline and as fast as possible
+"""
+import argparse
 import asyncio
+import logging
 import sys
 import os
 
 # Add /app to path so we can import app modules
 sys.path.append('/app')
 
+from app.core.config import settings
 from app.tasks import fetch_all_feeds_async
+from app.feed_archive import record, replay
 
 async def trigger_fetch():
     print("Triggering manual news fetch...")
     await fetch_all_feeds_async()
     print("Manual news fetch completed.")
 
+async def record_archive(path: str):
+    print(f"Recording feeds to {path}...")
+    recorded = await record(path)
+    print(f"Recorded {recorded} feeds.")
+
+async def replay_archive(path: str, workers: int, batch_size: int):
+    print(f"Replaying {path}...")
+    report = await replay(path, workers=workers, batch_size=batch_size)
+    print(f"Feeds: {report.feeds}, entries: {report.entries}")
+    print(f"Inserted: {report.inserted}, duplicates: {report.duplicates}, failed: {report.failed}")
+    print(f"Done in {report.seconds:.1f}s ({report.articles_per_sec:.0f} articles/sec)")
+
 if __name__ == "__main__":
-    asyncio.run(trigger_fetch())
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    modes = parser.add_subparsers(dest="mode")
+    record_parser = modes.add_parser("record", help="archive raw feeds without ingesting them")
+    record_parser.add_argument("archive")
+    replay_parser = modes.add_parser("replay", help="ingest an archive or dump directory offline")
+    replay_parser.add_argument("path")
+    replay_parser.add_argument("--workers", type=int, default=settings.REPLAY_WORKERS, help="parsing processes (default: CPU count)")
+    replay_parser.add_argument("--batch-size", type=int, default=settings.REPLAY_BATCH_SIZE, help="articles written per transaction")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    if args.mode == "record":
+        asyncio.run(record_archive(args.archive))
+    elif args.mode == "replay":
+        asyncio.run(replay_archive(args.path, args.workers, args.batch_size))
+    else:
+        asyncio.run(trigger_fetch())